@@ -13,9 +13,12 @@ export async function fetchData() {
             const historyRes = await fetch(`/history?user_email=${currentUser.email}`, {
                 signal: historyController.signal,
                 method: 'GET',
+                // Ответ из HTTP-кэша WebView с проверкой ETag: сервер отвечает 304,
+                // если данные не менялись (заголовок Cache-Control: no-cache
+                // в запросе отключил бы кэш и If-None-Match)
+                cache: 'no-cache',
                 headers: {
-                    'Accept': 'application/json',
-                    'Cache-Control': 'no-cache'
+                    'Accept': 'application/json'
                 }
             });
             clearTimeout(historyTimeout);
@@ -43,9 +46,10 @@ export async function fetchData() {
             const templatesRes = await fetch(`/templates?user_email=${currentUser.email}`, {
                 signal: templatesController.signal,
                 method: 'GET',
+                // Проверка ETag, как у истории
+                cache: 'no-cache',
                 headers: {
-                    'Accept': 'application/json',
-                    'Cache-Control': 'no-cache'
+                    'Accept': 'application/json'
                 }
             });
             clearTimeout(templatesTimeout);
@@ -676,7 +676,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 // Обновляем тег в последней записи истории
                 if (lastHistoryId && tagName) {
                     try {
-                        await fetch(`/history/${lastHistoryId}/tag`, {
+                        await fetch(`/history/${lastHistoryId}/tag?user_email=${encodeURIComponent(currentUser.email)}`, {
                             method: 'PUT',
                             headers: { 'Content-Type': 'application/json' },
                             body: JSON.stringify({ tag_name: tagName, tag_color: tagColor })
@@ -768,7 +768,7 @@ document.addEventListener('DOMContentLoaded', () => {
             e.stopPropagation();
             const id = deleteBtn.dataset.id;
             try {
-                await fetch(`/history/${id}`, { method: 'DELETE' });
+                await fetch(`/history/${id}?user_email=${encodeURIComponent(currentUser.email)}`, { method: 'DELETE' });
                 await fetchData();
                 renderAll();
                 showToast('Запись удалена');
@@ -797,7 +797,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 const res = await fetch(`https://clck.ru/--?url=${encodeURIComponent(url)}`);
                 const shortUrl = await res.text();
                 if (shortUrl && !shortUrl.includes('error')) {
-                    await fetch(`/history/${id}/short_url`, {
+                    await fetch(`/history/${id}/short_url?user_email=${encodeURIComponent(currentUser.email)}`, {
                         method: 'PUT',
                         headers: { 'Content-Type': 'application/json' },
                         body: JSON.stringify({ short_url: shortUrl.trim() })
@@ -848,7 +848,7 @@ document.addEventListener('DOMContentLoaded', () => {
             e.stopPropagation();
             const id = deleteTemplateBtn.dataset.id;
             try {
-                await fetch(`/templates/${id}`, { method: 'DELETE' });
+                await fetch(`/templates/${id}?user_email=${encodeURIComponent(currentUser.email)}`, { method: 'DELETE' });
                 await fetchData();
                 renderAll();
                 showToast('Шаблон удалён');
@@ -950,7 +950,7 @@ document.addEventListener('DOMContentLoaded', () => {
     document.getElementById('deleteUrlBtn')?.addEventListener('click', async () => {
         if (!currentDetailItem) return;
         try {
-            await fetch(`/history/${currentDetailItem.id}`, { method: 'DELETE' });
+            await fetch(`/history/${currentDetailItem.id}?user_email=${encodeURIComponent(currentUser.email)}`, { method: 'DELETE' });
             await fetchData();
             renderAll();
             showToast('Удалено');
@@ -973,7 +973,7 @@ document.addEventListener('DOMContentLoaded', () => {
             const res = await fetch(`https://clck.ru/--?url=${encodeURIComponent(url)}`);
             const shortUrl = await res.text();
             if (shortUrl && !shortUrl.includes('error')) {
-                await fetch(`/history/${currentDetailItem.id}/short_url`, {
+                await fetch(`/history/${currentDetailItem.id}/short_url?user_email=${encodeURIComponent(currentUser.email)}`, {
                     method: 'PUT',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ short_url: shortUrl.trim() })
@@ -1492,12 +1492,17 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let updateData = null;
 
-    async function checkForUpdates() {
+    async function checkForUpdates(attempt = 0) {
         try {
             const resp = await fetch('/api/update/check');
             if (!resp.ok) return;
 
             const data = await resp.json();
+            if (!data.available && data.checking && attempt < 5) {
+                // Проверка ещё идёт в фоне — спросим позже
+                setTimeout(() => checkForUpdates(attempt + 1), 3000);
+                return;
+            }
             if (data.available) {
                 updateData = data;
                 showUpdateModal(data);
@@ -1557,30 +1562,55 @@ document.addEventListener('DOMContentLoaded', () => {
             installBtn.disabled = true;
             installBtn.classList.add('opacity-50', 'cursor-not-allowed');
 
-            // Скачиваем
-            progressLabel.textContent = t.update_downloading;
-            const downloadResp = await fetch('/api/update/download', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ url: updateData.download_url })
-            });
+            // Скачиваем (в фоне на бэкенде, прогресс — опросом) и устанавливаем
+            const downloadAndInstall = async (url, sha256) => {
+                progressLabel.textContent = t.update_downloading;
+                const downloadResp = await fetch('/api/update/download', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ url, sha256 })
+                });
 
-            if (!downloadResp.ok) throw new Error('Download failed');
+                if (!downloadResp.ok) throw new Error('Download failed');
 
-            const downloadData = await downloadResp.json();
+                let downloadData = await downloadResp.json();
+                while (downloadData.status === 'downloading') {
+                    progressBar.style.width = `${downloadData.percent}%`;
+                    progressPercent.textContent = `${downloadData.percent}%`;
+                    await new Promise(resolve => setTimeout(resolve, 500));
+                    const progressResp = await fetch('/api/update/progress');
+                    if (!progressResp.ok) throw new Error('Download failed');
+                    downloadData = await progressResp.json();
+                }
+                if (downloadData.status !== 'done') throw new Error(downloadData.error || 'Download failed');
 
-            // Устанавливаем
-            progressLabel.textContent = t.update_installing;
-            progressBar.style.width = '100%';
-            progressPercent.textContent = '100%';
+                // Устанавливаем
+                progressLabel.textContent = t.update_installing;
+                progressBar.style.width = '100%';
+                progressPercent.textContent = '100%';
 
-            await fetch('/api/update/install', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ path: downloadData.installer_path })
-            });
+                return fetch('/api/update/install', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ path: downloadData.installer_path })
+                });
+            };
+
+            // Сначала дельта-патч (только изменившиеся файлы), при неудаче — полный установщик
+            let patched = false;
+            if (updateData.patch_url) {
+                try {
+                    const installResp = await downloadAndInstall(updateData.patch_url, updateData.patch_sha256);
+                    patched = installResp.ok;
+                } catch (e) {
+                    console.warn('Patch update failed, falling back to installer:', e);
+                }
+            }
+            if (!patched) {
+                await downloadAndInstall(updateData.download_url, updateData.sha256);
+            }
 
-            // Приложение будет закрыто sys.exit(0) на бэкенде
+            // Приложение будет закрыто на бэкенде (установщиком или для применения патча)
         } catch (e) {
             console.error('Update error:', e);
             showToast(t.update_error, 'error');
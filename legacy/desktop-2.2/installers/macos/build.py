@@ -86,6 +86,17 @@ def get_current_arch() -> str:
         return machine
 
 
+def build_assets():
+    """Сборка статики с хешами в именах (frontend/assets/)"""
+    print("\nСборка статики...")
+
+    result = subprocess.run([sys.executable, '-m', 'src.core.assets'], cwd=PROJECT_ROOT)
+
+    if result.returncode != 0:
+        print("✗ Ошибка сборки статики")
+        sys.exit(1)
+
+
 def build_app(arch: str = None):
     """Сборка .app для указанной архитектуры"""
     if arch:
@@ -269,6 +280,7 @@ def main():
     
     # Сборка
     clean()
+    build_assets()
     build_app(arch)
     create_dmg()
     
@@ -60,6 +60,17 @@ def clean():
         shutil.rmtree(DIST_DIR)
 
 
+def build_assets():
+    """Сборка статики с хешами в именах (frontend/assets/)"""
+    print("\nСборка статики...")
+
+    result = subprocess.run([sys.executable, '-m', 'src.core.assets'], cwd=PROJECT_ROOT)
+
+    if result.returncode != 0:
+        print("✗ Ошибка сборки статики")
+        sys.exit(1)
+
+
 def build_app_for_arch(arch: str) -> Path:
     """Сборка .app для указанной архитектуры"""
     print(f"\n{'='*60}")
@@ -189,6 +200,8 @@ def main():
     print("\nОчистка...")
     clean()
     print("✓ Очистка завершена")
+
+    build_assets()
     
     # Собираем для обеих архитектур
     architectures = ['x86_64', 'arm64']
@@ -225,6 +238,9 @@ def main():
     print("  1. Протестируйте оба DMG")
     print("  2. Загрузите в GitHub Releases с тегом v" + version)
     print("  3. Для подписи используйте: ./installers/macos/sign_and_notarize.sh")
+    print("  4. После подписи — манифест и патч для дельта-обновлений:")
+    print(f"     python -m src.core.delta dist/UTMka-<arch>.app --version {version} "
+          f"--platform macos-<arch> [--previous UTMka-manifest-<прошлая>-macos-<arch>.json]")
 
 
 if __name__ == '__main__':
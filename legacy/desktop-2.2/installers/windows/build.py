@@ -89,6 +89,17 @@ def clean():
     print("✓ Очистка завершена")
 
 
+def build_assets():
+    """Сборка статики с хешами в именах (frontend/assets/)"""
+    print("\nСборка статики...")
+
+    result = subprocess.run([sys.executable, '-m', 'src.core.assets'], cwd=PROJECT_ROOT)
+
+    if result.returncode != 0:
+        print("✗ Ошибка сборки статики")
+        sys.exit(1)
+
+
 def build_pyinstaller():
     """Сборка с PyInstaller"""
     print("\nСборка PyInstaller...")
@@ -109,6 +120,28 @@ def build_pyinstaller():
     print("✓ PyInstaller завершён")
 
 
+def build_delta(version: str):
+    """
+    Манифест бандла и дельта-патч для автообновлений (src/core/delta.py)
+
+    Патч собирается, если в UTMKA_PREVIOUS_MANIFEST указан манифест
+    прошлого релиза (ассет UTMka-manifest-<версия>-windows.json).
+    """
+    print("\nМанифест и патч обновления...")
+
+    command = [sys.executable, '-m', 'src.core.delta', str(DIST_DIR / 'UTMka'),
+               '--version', version, '--platform', 'windows']
+    previous = os.environ.get('UTMKA_PREVIOUS_MANIFEST')
+    if previous:
+        command += ['--previous', previous]
+
+    result = subprocess.run(command, cwd=PROJECT_ROOT)
+
+    if result.returncode != 0:
+        print("✗ Ошибка сборки манифеста")
+        sys.exit(1)
+
+
 def build_installer():
     """Сборка установщика Inno Setup"""
     print("\nСборка установщика...")
@@ -158,7 +191,9 @@ def main():
     sync_version(version)
 
     clean()
+    build_assets()
     build_pyinstaller()
+    build_delta(version)
     build_installer()
 
     print("\n" + "=" * 50)
@@ -38,6 +38,16 @@ def clean():
 
     print("✓ Очистка завершена\n")
 
+def build_assets():
+    """Сборка статики с хешами в именах (frontend/assets/)"""
+    print("\nСборка статики...")
+
+    result = subprocess.run([sys.executable, '-m', 'src.core.assets'], cwd=PROJECT_ROOT)
+
+    if result.returncode != 0:
+        print("✗ Ошибка сборки статики")
+        sys.exit(1)
+
 def build():
     """Сборка с PyInstaller"""
     print("🔨 Сборка PyInstaller...")
@@ -109,6 +119,7 @@ def main():
     if args.clean:
         clean()
 
+    build_assets()
     build()
 
     if check_result():
@@ -5,7 +5,9 @@
 Usage:
     python run_desktop.py          # Запуск с pywebview окном
     python run_desktop.py --dev    # Запуск в dev режиме (browser)
+    python run_desktop.py --trace-startup  # + время каждого импорта в logs/startup.log
 """
+import os
 import sys
 import argparse
 
@@ -15,8 +17,14 @@ def main():
                        help='Development mode (открыть в браузере)')
     parser.add_argument('--port', type=int, default=None,
                        help='Порт для Flask (по умолчанию: случайный свободный)')
+    parser.add_argument('--trace-startup', action='store_true',
+                       help='Замерить время каждого импорта при запуске (logs/startup.log)')
     args = parser.parse_args()
 
+    if args.trace_startup:
+        # Читается при импорте src.core.startup — до остальных модулей приложения
+        os.environ['UTMKA_TRACE_STARTUP'] = '1'
+
     if args.dev:
         # Development mode - запуск Flask без pywebview
         from src.api import create_app
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Запуск web-версии UTMka (production)
+
+Usage:
+    python run_web.py                          # gunicorn, WEB_* из ProductionConfig
+    python run_web.py --bind 127.0.0.1:8000 --workers 4 --threads 8
+    python run_web.py --config web             # WebConfig без настроек пула
+
+Окружение: DATABASE_URL, SECRET_KEY, WEB_CONCURRENCY (воркеры),
+WEB_THREADS, DB_POOL_SIZE, DB_MAX_OVERFLOW.
+
+Перезапуск без простоя: kill -HUP <pid мастера>.
+Проверки: GET /healthz (процесс жив), GET /readyz (БД и схема готовы).
+"""
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description='UTMka Web Launcher')
+    parser.add_argument('--config', default='production', choices=['production', 'web'],
+                        help='Конфигурация приложения (по умолчанию: production)')
+    parser.add_argument('--bind', default=None,
+                        help='Адрес host:port (по умолчанию: WEB_BIND)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Число процессов (по умолчанию: WEB_CONCURRENCY или 2*CPU+1)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Потоков на процесс (по умолчанию: WEB_THREADS)')
+    args = parser.parse_args()
+
+    from src.web.server import run
+
+    run(args.config, bind=args.bind, workers=args.workers, threads=args.threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,16 @@ import os
 import sys
 from flask import Flask
 
-from src.core.config import (
-    Config, DesktopConfig, DevelopmentConfig, WebConfig, ProductionConfig
-)
+from src.core.config import get_config
 from src.core.models import db
+from src.core.database import install_sqlite_pragmas
+from src.core.search import ensure_history_fts
+from src.core.migrations import run_migrations
+from src.core.assets import AssetStore
+from src.api.json_provider import install_json_provider
+from src.api.compression import install_compression
+from src.core.services import UTMService
+from src.core.startup import trace
 
 
 def get_resource_path(relative_path: str) -> str:
@@ -42,51 +48,52 @@ def create_app(config_name: str = 'development') -> Flask:
     )
     
     # Загружаем конфигурацию
-    configs = {
-        'development': DevelopmentConfig,
-        'desktop': DesktopConfig,
-        'web': WebConfig,
-        'production': ProductionConfig,
-        'default': Config
-    }
-    app.config.from_object(configs.get(config_name, Config))
+    app.config.from_object(get_config(config_name))
+
+    UTMService.configure_cache(app.config.get('UTM_CACHE_SIZE', 4096))
+    install_json_provider(
+        app,
+        app.config.get('JSON_PROVIDER', 'auto'),
+        app.config.get('JSON_ENSURE_ASCII', False)
+    )
+    install_compression(app)
+
+    # Статика с хешами в именах (собирается python -m src.core.assets)
+    app.extensions['assets'] = (
+        AssetStore.load(static_folder) if app.config.get('FINGERPRINTED_ASSETS') else None
+    )
     
     # Инициализируем SQLAlchemy
     db.init_app(app)
     
-    with app.app_context():
-        db.create_all()
+    with trace.phase('db init'), app.app_context():
+        install_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
+        # Схема проверяется одним SELECT из schema_version; create_all,
+        # ALTER и индексы выполняются только при смене версии схемы
+        run_migrations(db.engine)
+        # Индекс мог не создаться миграцией (SQLite без FTS5) — проверяем при старте
+        app.extensions['history_fts'] = ensure_history_fts(db.engine)
 
-        # Миграция: добавление tag_name и tag_color в history_new
-        import sqlalchemy
-        inspector = sqlalchemy.inspect(db.engine)
-        if 'history_new' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('history_new')]
-            with db.engine.connect() as conn:
-                if 'tag_name' not in columns:
-                    conn.execute(sqlalchemy.text(
-                        'ALTER TABLE history_new ADD COLUMN tag_name VARCHAR(100)'
-                    ))
-                    conn.commit()
-                if 'tag_color' not in columns:
-                    conn.execute(sqlalchemy.text(
-                        'ALTER TABLE history_new ADD COLUMN tag_color VARCHAR(20)'
-                    ))
-                    conn.commit()
-    
     # Регистрируем blueprints
-    from src.api.routes.main import main_bp
-    from src.api.routes.history import history_bp
-    from src.api.routes.templates import templates_bp
-    from src.api.routes.auth import auth_bp
-    from src.api.routes.preferences import preferences_bp
-    from src.api.routes.update import update_bp
+    with trace.phase('blueprints'):
+        from src.api.routes.main import main_bp
+        from src.api.routes.history import history_bp
+        from src.api.routes.templates import templates_bp
+        from src.api.routes.auth import auth_bp
+        from src.api.routes.preferences import preferences_bp
+        from src.api.routes.update import update_bp
+        from src.api.routes.build import build_bp
+        from src.api.routes.sync import sync_bp
+        from src.api.routes.health import health_bp
+
+        app.register_blueprint(main_bp)
+        app.register_blueprint(history_bp)
+        app.register_blueprint(templates_bp)
+        app.register_blueprint(auth_bp)
+        app.register_blueprint(preferences_bp)
+        app.register_blueprint(update_bp)
+        app.register_blueprint(build_bp)
+        app.register_blueprint(sync_bp)
+        app.register_blueprint(health_bp)
 
-    app.register_blueprint(main_bp)
-    app.register_blueprint(history_bp)
-    app.register_blueprint(templates_bp)
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(preferences_bp)
-    app.register_blueprint(update_bp)
-    
     return app
\ No newline at end of file
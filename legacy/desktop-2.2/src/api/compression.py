@@ -0,0 +1,169 @@
+"""
+Сжатие ответов (gzip / brotli)
+
+Ответ сжимается, если клиент прислал подходящий Accept-Encoding, тип
+содержимого текстовый (JSON, CSV, HTML, JS, CSS) и тело не меньше
+COMPRESSION_MIN_SIZE. Потоковые выгрузки сжимаются на лету по мере
+генерации. brotli — необязательная зависимость: без неё только gzip.
+
+Счётчики исходных и сжатых байтов — app.extensions['compression'],
+GET /api/compression/stats.
+"""
+import gzip
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость
+    brotli = None
+
+# Типы, которые имеет смысл сжимать (картинки и архивы уже сжаты)
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/csv',
+    'text/html',
+    'text/css',
+    'text/javascript',
+    'text/plain',
+    'image/svg+xml',
+}
+
+
+class CompressionStats:
+    """Потокобезопасные счётчики сжатия по кодировкам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def add(self, encoding: str, original: int, compressed: int):
+        with self._lock:
+            stats = self._stats.setdefault(
+                encoding, {'responses': 0, 'original_bytes': 0, 'compressed_bytes': 0}
+            )
+            stats['responses'] += 1
+            stats['original_bytes'] += original
+            stats['compressed_bytes'] += compressed
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Копия счётчиков с долей сжатия (compressed / original)"""
+        with self._lock:
+            result = {}
+            for encoding, stats in self._stats.items():
+                ratio = stats['compressed_bytes'] / stats['original_bytes'] if stats['original_bytes'] else None
+                result[encoding] = {**stats, 'ratio': round(ratio, 4) if ratio is not None else None}
+            return result
+
+
+def available_encodings() -> list:
+    """Поддерживаемые кодировки в порядке предпочтения сервера"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Лучшая кодировка по Accept-Encoding (при равном q — br, затем gzip)"""
+    return accept_encodings.best_match(available_encodings())
+
+
+def compress_body(data: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def _compressor(encoding: str, gzip_level: int, brotli_quality: int):
+    """Объект с compress()/flush() для потокового сжатия"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=brotli_quality)
+        return compressor.process, compressor.finish
+    # wbits=31 — zlib пишет gzip-заголовок и контрольную сумму
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def iter_compressed(chunks: Iterable[bytes], encoding: str, gzip_level: int,
+                    brotli_quality: int, stats: CompressionStats) -> Iterator[bytes]:
+    """Сжимает поток по частям; счётчики обновляются, когда поток дочитан"""
+    compress, finish = _compressor(encoding, gzip_level, brotli_quality)
+    original = compressed = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        original += len(chunk)
+        data = compress(chunk)
+        if data:
+            compressed += len(data)
+            yield data
+    data = finish()
+    compressed += len(data)
+    yield data
+    stats.add(encoding, original, compressed)
+
+
+def _should_compress(response: Response, min_size: int) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers or response.direct_passthrough:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    if response.is_streamed:
+        return True
+    return response.content_length is not None and response.content_length >= min_size
+
+
+def install_compression(app: Flask) -> bool:
+    """
+    Подключает сжатие ответов, если оно включено в конфигурации
+
+    Настройки: COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY.
+
+    Returns:
+        True, если сжатие включено
+    """
+    stats = CompressionStats()
+    app.extensions['compression'] = stats
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return False
+
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESSION_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 5)
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        if not _should_compress(response, min_size):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = iter_compressed(
+                response.response, encoding, gzip_level, brotli_quality, stats
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            body = compress_body(data, encoding, gzip_level, brotli_quality)
+            if len(body) >= len(data):
+                return response
+            response.set_data(body)
+            stats.add(encoding, len(data), len(body))
+
+        response.headers['Content-Encoding'] = encoding
+        # Сжатое тело — другое представление: сильный ETag помечаем слабым
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return True
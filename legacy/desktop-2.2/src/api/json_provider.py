@@ -0,0 +1,89 @@
+"""
+Быстрый JSON-провайдер Flask
+
+Если установлен orjson, jsonify кодирует ответы им (в разы быстрее
+stdlib json на больших списках); иначе остаётся стандартный провайдер.
+Выбор — Config.JSON_PROVIDER: 'auto', 'orjson' или 'stdlib'.
+
+Формат ответа тот же, что у стандартного провайдера: date/datetime
+кодируются его default (HTTP-дата, а не ISO), не-ASCII текст отдаётся
+в UTF-8 (Config.JSON_ENSURE_ASCII = False). orjson не умеет ensure_ascii:
+если экранирование включено, провайдер остаётся стандартным — выбор
+делается один раз при создании приложения, а не на каждый ответ.
+"""
+import typing as t
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON-провайдер на orjson с откатом на stdlib
+
+    Вызовы с нестандартными аргументами (indent, cls и т.п.) и объекты,
+    которые orjson не умеет кодировать, уходят в DefaultJSONProvider.
+    """
+
+    # Не-ASCII текст orjson отдаёт только в UTF-8
+    ensure_ascii = False
+
+    def _options(self) -> int:
+        # Даты — через default, чтобы формат совпадал со стандартным провайдером
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def _encode(self, obj: t.Any) -> t.Optional[bytes]:
+        """JSON от orjson или None, если кодировать должен stdlib"""
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options())
+        except TypeError:
+            return None
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        body = None if kwargs else self._encode(obj)
+        if body is None:
+            return super().dumps(obj, **kwargs)
+        return body.decode('utf-8')
+
+    def loads(self, s: t.Union[str, bytes], **kwargs: t.Any) -> t.Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any):
+        # Отладочный режим печатает JSON с отступами — это умеет только stdlib
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self._encode(obj)
+        if body is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def install_json_provider(app: Flask, name: str = 'auto', ensure_ascii: bool = False) -> str:
+    """
+    Подключает JSON-провайдер к приложению
+
+    ensure_ascii=True экранирует не-ASCII текст, как Flask по умолчанию;
+    orjson этого не умеет, поэтому тогда используется стандартный json.
+
+    Returns:
+        Имя выбранного провайдера ('orjson' или 'stdlib')
+    """
+    if name == 'stdlib' or orjson is None or ensure_ascii:
+        if name == 'orjson':
+            print("orjson недоступен (не установлен или включён JSON_ENSURE_ASCII), "
+                  "используется стандартный json")
+        app.json.ensure_ascii = ensure_ascii
+        return 'stdlib'
+    app.json = OrjsonProvider(app)
+    return 'orjson'
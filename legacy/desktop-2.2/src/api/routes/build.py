@@ -0,0 +1,39 @@
+"""
+Пакетная сборка UTM-ссылок
+"""
+from flask import Blueprint, request, jsonify, current_app
+
+from src.core.services import UTMService
+
+build_bp = Blueprint('build', __name__, url_prefix='/api/build')
+
+
+@build_bp.route('/batch', methods=['POST'])
+def build_batch():
+    """
+    Строит ссылки для всех сочетаний базовых URL и наборов UTM-параметров.
+
+    Expects JSON: {
+        "base_urls": ["https://site.ru/a", ...],
+        "utm_params": [{"utm_source": "yandex", "utm_medium": "cpc", ...}, ...]
+    }
+
+    Returns:
+        JSON: { success, count, urls } — urls сгруппированы по base_urls:
+        для каждого базового URL по одной ссылке на каждый набор utm_params
+    """
+    data = request.get_json(silent=True) or {}
+    base_urls = data.get('base_urls')
+    utm_param_sets = data.get('utm_params')
+
+    if not isinstance(base_urls, list) or not all(isinstance(u, str) for u in base_urls):
+        return jsonify({'error': 'base_urls must be a list of strings'}), 400
+    if not isinstance(utm_param_sets, list) or not all(isinstance(p, dict) for p in utm_param_sets):
+        return jsonify({'error': 'utm_params must be a list of objects'}), 400
+
+    max_urls = current_app.config.get('BUILD_BATCH_MAX_URLS', 100000)
+    if len(base_urls) * len(utm_param_sets) > max_urls:
+        return jsonify({'error': f'Too many combinations (max {max_urls})'}), 400
+
+    urls = UTMService.build_many(base_urls, utm_param_sets)
+    return jsonify({'success': True, 'count': len(urls), 'urls': urls})
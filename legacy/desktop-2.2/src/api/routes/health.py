@@ -0,0 +1,47 @@
+"""
+Проверки состояния для балансировщика и оркестратора
+
+/healthz — процесс жив и отвечает (БД не трогается), /readyz — воркер
+может обслуживать запросы: база доступна и схема не старее кода.
+"""
+import sqlalchemy
+from flask import Blueprint, jsonify
+
+from src.core.models import db
+from src.core.migrations import SCHEMA_VERSION, current_version
+
+health_bp = Blueprint('health', __name__)
+
+
+def _no_store(response, status: int = 200):
+    response.status_code = status
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: 200, пока воркер принимает запросы"""
+    return _no_store(jsonify({'status': 'ok'}))
+
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Readiness: 200 — база отвечает и миграции применены, иначе 503.
+
+    Соединение берётся из пула воркера, поэтому проверка заодно
+    показывает исчерпание пула или недоступность Postgres.
+    """
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(sqlalchemy.text('SELECT 1'))
+        version = current_version(db.engine)
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        return _no_store(jsonify({'status': 'unavailable', 'error': str(e)}), 503)
+
+    if version < SCHEMA_VERSION:
+        return _no_store(jsonify({
+            'status': 'migrating', 'schema_version': version, 'expected': SCHEMA_VERSION
+        }), 503)
+    return _no_store(jsonify({'status': 'ready', 'schema_version': version}))
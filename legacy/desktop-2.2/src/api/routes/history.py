@@ -1,30 +1,150 @@
 """
 Маршруты для работы с историей UTM-ссылок
 """
+import csv
 import json
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify, send_from_directory, current_app, abort
 
 from src.core.models import db, History
 from src.core.services import UTMService
 from src.core.config import get_downloads_dir
+from src.core.pagination import keyset_page, parse_page_size, InvalidCursor
+from src.core.search import filter_history_search
+from src.core.filters import parse_history_filters, apply_history_filters, history_facets
+from src.core.versions import ConditionalGet, HISTORY
+from src.core.changes import record_change, INSERT, UPDATE, DELETE
+from src.core.batch import validate_operations, apply_history_batch, BatchError
+from src.core.mutations import update_owned, delete_owned
 
 history_bp = Blueprint('history', __name__)
 
 
 @history_bp.route('/history', methods=['GET'])
 def get_history():
-    """Получает историю пользователя."""
+    """
+    Получает историю пользователя.
+
+    Без параметров limit/cursor отдаёт список последних 500 записей (как раньше).
+    С ними — страницу {items, next_cursor}; следующая страница запрашивается
+    с cursor=next_cursor, пока он не станет null.
+
+    Фильтры: utm_source, utm_medium, utm_campaign, tag_name (точное
+    совпадение), date_from, date_to (YYYY-MM-DD или ISO дата-время).
+
+    Ответ несёт ETag версии данных; при совпадении If-None-Match — 304.
+    """
     user_email = request.args.get('user_email')
+    paginated = 'limit' in request.args or 'cursor' in request.args
     if not user_email:
-        return jsonify([])
-    
-    items = History.query.filter_by(user_email=user_email)\
-                         .order_by(History.created_at.desc())\
-                         .limit(500).all()
-    
-    response = jsonify([item.to_dict() for item in items])
-    response.headers['Cache-Control'] = 'no-cache'
-    return response
+        return jsonify({'items': [], 'next_cursor': None} if paginated else [])
+
+    conditional = ConditionalGet(user_email, HISTORY)
+    if conditional.not_modified:
+        return conditional.not_modified_response()
+
+    try:
+        filters = parse_history_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Только нужные колонки кортежами, без ORM-объектов
+    query = History.project(
+        apply_history_filters(History.query.filter_by(user_email=user_email), filters)
+    )
+
+    if not paginated:
+        items, _ = keyset_page(query, History, None, 500)
+        return conditional.apply(jsonify(History.rows_to_dicts(items)))
+
+    limit = parse_page_size(
+        request.args.get('limit'),
+        current_app.config.get('HISTORY_PAGE_SIZE', 100),
+        current_app.config.get('HISTORY_PAGE_SIZE_MAX', 1000)
+    )
+    try:
+        items, next_cursor = keyset_page(query, History, request.args.get('cursor'), limit)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return conditional.apply(jsonify({
+        'items': History.rows_to_dicts(items),
+        'next_cursor': next_cursor
+    }))
+
+
+@history_bp.route('/history/search', methods=['GET'])
+def search_history():
+    """
+    Ищет по истории пользователя (ссылки, UTM-метки, тег).
+
+    Параметры: user_email, q, limit, cursor и фильтры GET /history — ответ
+    и пагинация как у GET /history с limit/cursor. Каждое слово запроса
+    ищется как префикс, все слова должны найтись.
+    """
+    user_email = request.args.get('user_email')
+    text = (request.args.get('q') or '').strip()
+    if not user_email or not text:
+        return jsonify({'items': [], 'next_cursor': None})
+
+    conditional = ConditionalGet(user_email, HISTORY)
+    if conditional.not_modified:
+        return conditional.not_modified_response()
+
+    try:
+        filters = parse_history_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = History.project(filter_history_search(
+        apply_history_filters(History.query.filter_by(user_email=user_email), filters),
+        text,
+        current_app.extensions.get('history_fts', False)
+    ))
+    limit = parse_page_size(
+        request.args.get('limit'),
+        current_app.config.get('HISTORY_PAGE_SIZE', 100),
+        current_app.config.get('HISTORY_PAGE_SIZE_MAX', 1000)
+    )
+    try:
+        items, next_cursor = keyset_page(query, History, request.args.get('cursor'), limit)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return conditional.apply(jsonify({
+        'items': History.rows_to_dicts(items),
+        'next_cursor': next_cursor
+    }))
+
+
+@history_bp.route('/history/facets', methods=['GET'])
+def get_history_facets():
+    """
+    Считает записи по utm_source, utm_medium, utm_campaign и tag_name.
+
+    Параметры: user_email, фильтры GET /history, q (поиск),
+    facet_limit — сколько самых частых значений отдавать (по умолчанию 50).
+
+    Returns:
+        JSON: { utm_source: [{value, count}], utm_medium: [...], ... }
+    """
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+
+    conditional = ConditionalGet(user_email, HISTORY)
+    if conditional.not_modified:
+        return conditional.not_modified_response()
+
+    try:
+        filters = parse_history_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = apply_history_filters(History.query.filter_by(user_email=user_email), filters)
+
+    text = (request.args.get('q') or '').strip()
+    if text:
+        query = filter_history_search(query, text, current_app.extensions.get('history_fts', False))
+
+    limit = parse_page_size(request.args.get('facet_limit'), 50, 500)
+    return conditional.apply(jsonify(history_facets(query, limit)))
 
 
 @history_bp.route('/history', methods=['POST'])
@@ -50,6 +170,8 @@ def add_history():
     )
     
     db.session.add(history)
+    db.session.flush()
+    record_change(history.user_email, HISTORY, INSERT, history.id)
     db.session.commit()
     
     return jsonify({'success': True, 'id': history.id})
@@ -57,9 +179,15 @@ def add_history():
 
 @history_bp.route('/history/<int:item_id>', methods=['DELETE'])
 def delete_history(item_id):
-    """Удаляет запись из истории."""
-    history = History.query.get_or_404(item_id)
-    db.session.delete(history)
+    """Удаляет запись из истории (только свою: ?user_email= обязателен)."""
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+
+    if not delete_owned(History, item_id, user_email):
+        db.session.rollback()
+        abort(404)
+    record_change(user_email, HISTORY, DELETE, item_id)
     db.session.commit()
     return jsonify({'success': True})
 
@@ -68,9 +196,19 @@ def delete_history(item_id):
 def update_history_tag(item_id):
     """Обновляет тег для записи в истории."""
     data = request.json
-    history = History.query.get_or_404(item_id)
-    history.tag_name = data.get('tag_name', '')
-    history.tag_color = data.get('tag_color', '')
+    user_email = request.args.get('user_email') or data.get('user_email')
+    if not user_email:
+        return jsonify({'success': False, 'error': 'user_email is required'}), 400
+
+    updated = update_owned(
+        History, item_id, user_email,
+        tag_name=data.get('tag_name', ''),
+        tag_color=data.get('tag_color', '')
+    )
+    if not updated:
+        db.session.rollback()
+        abort(404)
+    record_change(user_email, HISTORY, UPDATE, item_id)
     db.session.commit()
     return jsonify({'success': True})
 
@@ -83,14 +221,53 @@ def update_history_short_url(item_id):
     
     if not short_url:
         return jsonify({'success': False, 'error': 'short_url is required'}), 400
+
+    user_email = request.args.get('user_email') or data.get('user_email')
+    if not user_email:
+        return jsonify({'success': False, 'error': 'user_email is required'}), 400
     
-    history = History.query.get_or_404(item_id)
-    history.short_url = short_url
+    if not update_owned(History, item_id, user_email, short_url=short_url):
+        db.session.rollback()
+        abort(404)
+    record_change(user_email, HISTORY, UPDATE, item_id)
     db.session.commit()
     
     return jsonify({'success': True, 'short_url': short_url})
 
 
+@history_bp.route('/history/batch', methods=['POST'])
+def batch_history():
+    """
+    Пакетно удаляет записи, меняет теги и сокращённые ссылки.
+
+    Expects JSON: {
+        "user_email": "...",
+        "operations": [
+            {"op": "delete", "ids": [1, 2]},
+            {"op": "tag", "ids": [3], "tag_name": "...", "tag_color": "..."},
+            {"op": "short_url", "items": [{"id": 4, "short_url": "..."}]}
+        ]
+    }
+
+    Все операции — одна транзакция; затрагиваются только записи user_email.
+
+    Returns:
+        JSON: { success, results: [{op, affected, missing}] } или { error }
+    """
+    data = request.get_json(silent=True) or {}
+    user_email = data.get('user_email')
+    if not user_email:
+        return jsonify({'success': False, 'error': 'user_email is required'}), 400
+
+    try:
+        operations = validate_operations(data.get('operations'))
+    except BatchError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    results = apply_history_batch(user_email, operations)
+    return jsonify({'success': True, 'results': results})
+
+
 @history_bp.route('/export_history', methods=['POST'])
 def export_history():
     """Экспортирует историю пользователя в файл."""
@@ -101,8 +278,19 @@ def export_history():
     if not user_email:
         return jsonify({'error': 'user_email is required'}), 400
     
-    items = History.query.filter_by(user_email=user_email)\
-                         .order_by(History.created_at.desc()).all()
+    query = History.query.filter_by(user_email=user_email)\
+                         .order_by(History.created_at.desc())
+
+    # Потоковая выгрузка настоящим файлом вместо JSON-обёртки с file_content
+    if data.get('stream'):
+        # Экспорт и импорт нужны редко — модули грузятся при первом вызове
+        from src.core.export import stream_export, EXPORT_MIMETYPES, HISTORY_EXPORT_FIELDS
+        if format_type not in EXPORT_MIMETYPES:
+            return jsonify({'error': 'Invalid format'}), 400
+        basename = f'utm_history_{user_email.replace("@", "_")}'
+        return stream_export(query, HISTORY_EXPORT_FIELDS, format_type, basename)
+
+    items = query.all()
     
     export_data = []
     for item in items:
@@ -114,7 +302,9 @@ def export_history():
     
     if format_type == 'json':
         filename = f'utm_history_{user_email.replace("@", "_")}.json'
-        file_content = json.dumps(export_data, ensure_ascii=False, indent=2)
+        # Компактный JSON; с отступами — только по запросу ("pretty": true)
+        file_content = json.dumps(export_data, ensure_ascii=False,
+                                  indent=2 if data.get('pretty') else None)
     elif format_type == 'csv':
         import csv
         import io
@@ -138,32 +328,61 @@ def export_history():
 
 @history_bp.route('/import_history', methods=['POST'])
 def import_history():
-    """Импортирует историю пользователя из списка."""
+    """
+    Импортирует историю пользователя из списка.
+
+    Вставка идёт пачками по IMPORT_CHUNK_SIZE, по транзакции на пачку;
+    в ответе — сводка по пачкам и отклонённые записи.
+    """
+    from src.core.importer import bulk_import_history
+
     data = request.json
     items_to_add = data if isinstance(data, list) else [data]
-    
-    imported_count = 0
-    for item in items_to_add:
-        try:
-            history = History(
-                user_email=item['user_email'],
-                base_url=item.get('base_url', ''),
-                full_url=item.get('full_url') or item.get('url', ''),
-                utm_source=item.get('utm_source'),
-                utm_medium=item.get('utm_medium'),
-                utm_campaign=item.get('utm_campaign'),
-                utm_content=item.get('utm_content'),
-                utm_term=item.get('utm_term'),
-                tag_name=item.get('tag_name'),
-                tag_color=item.get('tag_color')
-            )
-            db.session.add(history)
-            imported_count += 1
-        except Exception as e:
-            print(f"Error importing history item: {e}")
-    
-    db.session.commit()
-    return jsonify({'success': True, 'imported_count': imported_count})
+
+    report = bulk_import_history(
+        items_to_add,
+        chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 5000)
+    )
+    return jsonify({'success': True, **report})
+
+
+@history_bp.route('/import_history/upload', methods=['POST'])
+def upload_history():
+    """
+    Импортирует историю из файла CSV/JSON, разбирая его потоково.
+
+    Файл — поле file в multipart/form-data или само тело запроса.
+    Параметры (query или поля формы): user_email, format (csv|json|ndjson,
+    по умолчанию — по расширению файла или Content-Type).
+    """
+    from src.core.importer import bulk_import_history, detect_upload_format, iter_upload_records
+
+    user_email = request.values.get('user_email')
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    format_type = detect_upload_format(
+        request.values.get('format'),
+        upload.filename if upload else None,
+        upload.mimetype if upload else request.mimetype
+    )
+    if not format_type:
+        return jsonify({'error': 'Invalid format'}), 400
+
+    try:
+        report = bulk_import_history(
+            iter_upload_records(
+                stream, format_type, user_email,
+                current_app.config.get('IMPORT_MAX_RECORD_SIZE', 1024 * 1024)
+            ),
+            chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 5000)
+        )
+    except (ValueError, csv.Error) as e:
+        # Уже вставленные пачки остаются; сообщаем, где разбор оборвался
+        return jsonify({'success': False, 'error': f'Invalid file: {e}'}), 400
+    return jsonify({'success': True, **report})
 
 
 @history_bp.route('/download_file/<path:filename>')
@@ -3,8 +3,10 @@
 """
 import os
 import sys
-from flask import Blueprint, render_template, make_response, send_file, Response, jsonify
+from flask import Blueprint, render_template, make_response, send_file, Response, jsonify, current_app, request, abort
 from src.core.version import __version__
+from src.core.services import UTMService
+from src.core.assets import IMMUTABLE_MAX_AGE
 
 main_bp = Blueprint('main', __name__)
 
@@ -18,9 +20,32 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 
+def _asset_response(store, rel_path: str) -> Response:
+    """Файл собранной статики из памяти, в сжатой версии, если клиент её принимает."""
+    found = store.get(rel_path, request.accept_encodings)
+    if found is None:
+        abort(404)
+    content, encoding = found
+    response = Response(content, mimetype=store.mimetype(rel_path))
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 @main_bp.route('/')
 def index():
     """Отдает главный HTML файл."""
+    store = current_app.extensions.get('assets')
+    if store is not None:
+        # Собранный index.html ссылается на файлы с хешами — их кэш вечный,
+        # а сам index.html браузер перепроверяет каждый раз (ETag → 304)
+        response = _asset_response(store, 'index.html')
+        response.set_etag(store.etag('index.html'), weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Favicon'] = 'none'
+        return response.make_conditional(request)
+
     response = make_response(render_template('index.html'))
     response.headers['X-Favicon'] = 'none'
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
@@ -29,6 +54,17 @@ def index():
     return response
 
 
+@main_bp.route('/assets/<path:filename>')
+def fingerprinted_asset(filename: str):
+    """Отдает JS/CSS с хешем в имени: содержимое не меняется, кэш на год."""
+    store = current_app.extensions.get('assets')
+    if store is None:
+        abort(404)
+    response = _asset_response(store, filename)
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+
 @main_bp.route('/favicon.ico')
 def favicon():
     """Отдает favicon (legacy PNG для .ico-запросов браузера)."""
@@ -74,3 +110,19 @@ def logo_asset(filename: str):
 def get_version():
     """Возвращает текущую версию приложения."""
     return jsonify({'version': __version__})
+
+
+
+@main_bp.route('/api/cache/stats')
+def get_cache_stats():
+    """Возвращает статистику кэшей разбора URL (попадания/промахи)."""
+    return jsonify(UTMService.cache_stats())
+
+
+@main_bp.route('/api/compression/stats')
+def get_compression_stats():
+    """Возвращает статистику сжатия ответов (исходные и сжатые байты)."""
+    return jsonify({
+        'enabled': current_app.config.get('COMPRESSION_ENABLED', False),
+        'encodings': current_app.extensions['compression'].snapshot()
+    })
@@ -0,0 +1,37 @@
+"""
+Дельта-синхронизация истории и шаблонов
+"""
+from flask import Blueprint, request, jsonify
+
+from src.core.changes import changes_since
+
+sync_bp = Blueprint('sync', __name__)
+
+
+@sync_bp.route('/sync', methods=['GET'])
+def get_changes():
+    """
+    Возвращает изменения истории и шаблонов после события since.
+
+    Параметры: user_email, since (0 — с начала журнала), limit (событий
+    за запрос, по умолчанию 1000).
+
+    Клиент применяет upserted/deleted к своим спискам, перечитывает
+    целиком списки из reset и запоминает next_since; при has_more
+    запрос повторяется с since=next_since. resync_required=true — события
+    после since уже удалены из журнала (CHANGE_LOG_RETENTION_DAYS): оба
+    списка перечитываются целиком.
+    """
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+
+    try:
+        since = max(0, int(request.args.get('since', 0)))
+        limit = max(1, min(int(request.args.get('limit', 1000)), 10000))
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+
+    response = jsonify(changes_since(user_email, since, limit))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
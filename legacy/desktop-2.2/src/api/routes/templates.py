@@ -1,29 +1,35 @@
 """
 Маршруты для работы с шаблонами UTM
 """
+import csv
 import json
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify, send_from_directory, current_app, abort
 
 from src.core.models import db, Template
 from src.core.config import get_resource_path
+from src.core.versions import ConditionalGet, TEMPLATES
+from src.core.changes import record_change, INSERT, DELETE
+from src.core.mutations import delete_owned
 
 templates_bp = Blueprint('templates', __name__)
 
 
 @templates_bp.route('/templates', methods=['GET'])
 def get_templates():
-    """Получает шаблоны пользователя."""
+    """Получает шаблоны пользователя (с ETag версии данных, 304 при совпадении)."""
     user_email = request.args.get('user_email')
     if not user_email:
         return jsonify([])
+
+    conditional = ConditionalGet(user_email, TEMPLATES)
+    if conditional.not_modified:
+        return conditional.not_modified_response()
     
-    items = Template.query.filter_by(user_email=user_email)\
-                          .order_by(Template.created_at.desc())\
-                          .limit(500).all()
+    rows = Template.project(Template.query.filter_by(user_email=user_email))\
+                   .order_by(Template.created_at.desc())\
+                   .limit(500).all()
     
-    response = jsonify([item.to_dict() for item in items])
-    response.headers['Cache-Control'] = 'no-cache'
-    return response
+    return conditional.apply(jsonify(Template.rows_to_dicts(rows)))
 
 
 @templates_bp.route('/templates', methods=['POST'])
@@ -32,6 +38,7 @@ def add_template():
     data = request.json
     items_to_add = data if isinstance(data, list) else [data]
     
+    templates = []
     for item in items_to_add:
         template = Template(
             user_email=item['user_email'],
@@ -45,20 +52,66 @@ def add_template():
             tag_color=item.get('tag_color')
         )
         db.session.add(template)
+        templates.append(template)
     
+    db.session.flush()
+    for template in templates:
+        record_change(template.user_email, TEMPLATES, INSERT, template.id)
     db.session.commit()
     return jsonify({'success': True, 'imported_count': len(items_to_add)})
 
 
 @templates_bp.route('/templates/<int:template_id>', methods=['DELETE'])
 def delete_template(template_id):
-    """Удаляет шаблон."""
-    template = Template.query.get_or_404(template_id)
-    db.session.delete(template)
+    """Удаляет шаблон (только свой: ?user_email= обязателен)."""
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+
+    if not delete_owned(Template, template_id, user_email):
+        db.session.rollback()
+        abort(404)
+    record_change(user_email, TEMPLATES, DELETE, template_id)
     db.session.commit()
     return jsonify({'success': True})
 
 
+@templates_bp.route('/templates/upload', methods=['POST'])
+def upload_templates():
+    """
+    Импортирует шаблоны из файла CSV/JSON, разбирая его потоково.
+
+    Параметры — как у /import_history/upload.
+    """
+    from src.core.importer import bulk_import_templates, detect_upload_format, iter_upload_records
+
+    user_email = request.values.get('user_email')
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    format_type = detect_upload_format(
+        request.values.get('format'),
+        upload.filename if upload else None,
+        upload.mimetype if upload else request.mimetype
+    )
+    if not format_type:
+        return jsonify({'error': 'Invalid format'}), 400
+
+    try:
+        report = bulk_import_templates(
+            iter_upload_records(
+                stream, format_type, user_email,
+                current_app.config.get('IMPORT_MAX_RECORD_SIZE', 1024 * 1024)
+            ),
+            chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 5000)
+        )
+    except (ValueError, csv.Error) as e:
+        return jsonify({'success': False, 'error': f'Invalid file: {e}'}), 400
+    return jsonify({'success': True, **report})
+
+
 @templates_bp.route('/download_template/<path:filename>')
 def download_template(filename):
     """Отдает файлы-шаблоны для импорта."""
@@ -117,8 +170,18 @@ def export_templates():
     if not user_email:
         return jsonify({'error': 'user_email is required'}), 400
     
-    items = Template.query.filter_by(user_email=user_email)\
-                          .order_by(Template.created_at.desc()).all()
+    query = Template.query.filter_by(user_email=user_email)\
+                          .order_by(Template.created_at.desc())
+
+    # Потоковая выгрузка настоящим файлом вместо JSON-обёртки с file_content
+    if data.get('stream'):
+        from src.core.export import stream_export, EXPORT_MIMETYPES, TEMPLATE_EXPORT_FIELDS
+        if format_type not in EXPORT_MIMETYPES:
+            return jsonify({'error': 'Invalid format'}), 400
+        basename = f'utm_templates_{user_email.replace("@", "_")}'
+        return stream_export(query, TEMPLATE_EXPORT_FIELDS, format_type, basename)
+
+    items = query.all()
     
     export_data = []
     for item in items:
@@ -129,7 +192,9 @@ def export_templates():
     
     if format_type == 'json':
         filename = f'utm_templates_{user_email.replace("@", "_")}.json'
-        file_content = json.dumps(export_data, ensure_ascii=False, indent=2)
+        # Компактный JSON; с отступами — только по запросу ("pretty": true)
+        file_content = json.dumps(export_data, ensure_ascii=False,
+                                  indent=2 if data.get('pretty') else None)
     elif format_type == 'csv':
         import csv
         import io
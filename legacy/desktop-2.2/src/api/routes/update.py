@@ -2,52 +2,78 @@
 API эндпоинты для автообновлений
 """
 from flask import Blueprint, request, jsonify
-from src.core import updater
 
 update_bp = Blueprint('update', __name__, url_prefix='/api/update')
 
 
+def _updater():
+    """
+    src.core.updater импортируется при первом запросе: он тянет requests
+    (около 60 мс), которые не нужны до появления окна
+    """
+    from src.core import updater
+    return updater
+
+
 @update_bp.route('/check', methods=['GET'])
 def check_updates():
     """
-    Проверяет наличие обновлений на GitHub Releases.
+    Наличие обновлений по кэшу релиза — без ожидания GitHub.
+
+    Проверка идёт в фоне (запускается при старте desktop); если кэш
+    устарел, она запускается заново, а ответ приходит с checking=true —
+    клиент может повторить запрос позже. ?refresh=1 — проверить заново,
+    не дожидаясь истечения TTL кэша.
 
     Returns:
         JSON: {
             available, current_version, latest_version,
-            download_url, release_url, release_notes
+            download_url, release_url, release_notes, checking
         }
     """
-    result = updater.check_for_updates()
-    return jsonify(result)
+    updater = _updater()
+    if request.args.get('refresh') == '1':
+        updater.start_background_check(force=True)
+    return jsonify(updater.cached_check())
 
 
 @update_bp.route('/download', methods=['POST'])
 def download_update():
     """
-    Скачивает установщик обновления.
+    Запускает скачивание установщика в фоне.
+
+    Expects JSON: { "url": "download_url", "sha256": "sha256:<hex>" (необязательно) }
 
-    Expects JSON: { "url": "download_url" }
+    Прогресс — GET /api/update/progress; путь к установщику появляется
+    в нём, когда status = 'done'.
 
     Returns:
-        JSON: { success, installer_path } или { error }
+        202, JSON: состояние скачивания (см. /progress) или { error }
     """
-    try:
-        data = request.get_json()
-        download_url = data.get('url')
+    data = request.get_json(silent=True) or {}
+    download_url = data.get('url')
 
-        if not download_url:
-            return jsonify({'error': 'URL not provided'}), 400
+    if not download_url:
+        return jsonify({'error': 'URL not provided'}), 400
 
-        installer_path = updater.download_installer(download_url)
+    job = _updater().start_download(download_url, data.get('sha256'))
+    return jsonify(job.to_dict()), 202
 
-        return jsonify({
-            'success': True,
-            'installer_path': installer_path
-        })
 
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+@update_bp.route('/progress', methods=['GET'])
+def download_progress():
+    """
+    Состояние фонового скачивания.
+
+    Returns:
+        JSON: {
+            status ('idle' | 'downloading' | 'done' | 'error'),
+            downloaded, total, percent, speed, installer_path, error
+        }
+    """
+    response = jsonify(_updater().download_progress())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 @update_bp.route('/install', methods=['POST'])
@@ -55,23 +81,27 @@ def install_update():
     """
     Запускает установщик и завершает приложение.
 
-    Expects JSON: { "path": "installer_path" } или использует сохранённый путь
+    Expects JSON: { "path": "installer_path" } или использует сохранённый путь.
+    Путь к .zip — дельта-патч (см. src/core/delta.py).
 
     Returns:
-        JSON: { success } или { error }
+        JSON: { success } или { error, fallback } — 409 с fallback=true,
+        если патч не подходит и нужен полный установщик
     """
     try:
         data = request.get_json() or {}
-        installer_path = data.get('path') or updater.get_installer_path()
+        installer_path = data.get('path') or _updater().get_installer_path()
 
         if not installer_path:
             return jsonify({'error': 'Installer path not found'}), 400
 
-        # Запускаем установщик (эта функция вызовет sys.exit)
-        updater.install_update(installer_path)
+        # Запускаем установщик (эта функция вызовет sys.exit);
+        # патч применяется после выхода приложения, ответ успевает уйти
+        _updater().install_update(installer_path)
 
-        # Этот return никогда не выполнится, так как sys.exit() выше
         return jsonify({'success': True})
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        # Патч не подошёл к установке — клиент переходит на полный установщик
+        fallback = isinstance(e, _updater().DeltaError)
+        return jsonify({'error': str(e), 'fallback': fallback}), 409 if fallback else 500
@@ -1,13 +1,24 @@
 """
 UTMka Core - общая бизнес-логика
+
+Имена пакета загружаются при первом обращении: импорт лёгкого модуля
+(например, src.core.startup) не тянет за собой Flask и SQLAlchemy.
 """
-from .models import db, User, History, Template
-from .services import UTMService
-from .config import get_data_dir, get_db_path, get_exports_dir, get_downloads_dir, Config, DesktopConfig, DevelopmentConfig
-
-__all__ = [
-    'db', 'User', 'History', 'Template',
-    'UTMService',
-    'get_data_dir', 'get_db_path', 'get_exports_dir', 'get_downloads_dir',
-    'Config', 'DesktopConfig', 'DevelopmentConfig'
-]
\ No newline at end of file
+import importlib
+
+_EXPORTS = {
+    'db': 'models', 'User': 'models', 'History': 'models', 'Template': 'models',
+    'UTMService': 'services',
+    'get_data_dir': 'config', 'get_db_path': 'config',
+    'get_exports_dir': 'config', 'get_downloads_dir': 'config',
+    'Config': 'config', 'DesktopConfig': 'config', 'DevelopmentConfig': 'config',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+    return getattr(module, name)
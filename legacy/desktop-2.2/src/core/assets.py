@@ -0,0 +1,239 @@
+"""
+Статика с хешами в именах (fingerprinting)
+
+При сборке (python -m src.core.assets, вызывается из build-скриптов)
+JS и CSS из frontend/ копируются в frontend/assets/ под именами с хешем
+содержимого (js/app.3f2a9c1b7e.js) вместе с готовыми .gz/.br версиями,
+ссылки в index.html и импорты ES-модулей переписываются на новые имена,
+а соответствие имён записывается в assets/manifest.json.
+
+Такие файлы никогда не меняются, поэтому отдаются с immutable-кэшем на
+год; перепроверяется только index.html. Сервер держит прочитанные файлы
+в памяти и не ходит за ними на диск повторно.
+"""
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость
+    brotli = None
+
+ASSETS_DIR = 'assets'
+MANIFEST_NAME = 'manifest.json'
+
+# Что получает хеш в имени (пути относительно frontend/)
+FINGERPRINT_GLOBS = ['js/*.js', 'css/*.css']
+
+ASSET_MIMETYPES = {
+    '.js': 'text/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+}
+
+# Расширение файла → Content-Encoding, в порядке предпочтения
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Относительные импорты ES-модулей: from './x.js', import './x.js', import('./x.js')
+_IMPORT_RE = re.compile(r'''((?:\bfrom|\bimport)\s*\(?\s*)(['"])(\.\.?/[^'"\n]+)\2''')
+
+# Ссылки на локальные файлы в index.html
+_HTML_REF_RE = re.compile(r'''\b(src|href)=(['"])([^'"]+)\2''')
+
+
+def _hashed_name(rel_path: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    stem, _, ext = rel_path.rpartition('.')
+    return f'{stem}.{digest}.{ext}'
+
+
+def _module_imports(source: str, rel_path: str) -> List[str]:
+    """Пути (относительно frontend/) модулей, которые импортирует файл"""
+    base = Path(rel_path).parent
+    return [_normalize((base / match.group(3)).as_posix()) for match in _IMPORT_RE.finditer(source)]
+
+
+def _normalize(path: str) -> str:
+    """Схлопывает ./ и ../ в относительном пути"""
+    parts = []
+    for part in path.split('/'):
+        if part == '..':
+            if parts:
+                parts.pop()
+        elif part and part != '.':
+            parts.append(part)
+    return '/'.join(parts)
+
+
+def _build_order(sources: Dict[str, str]) -> List[str]:
+    """
+    Порядок обработки: модуль — после всех, кого он импортирует
+
+    Хеш модуля зависит от имён его зависимостей, поэтому они должны
+    получить имена раньше. Циклические импорты не поддерживаются.
+    """
+    order, state = [], {}
+
+    def visit(path: str, stack: Tuple[str, ...]):
+        if state.get(path) == 'done':
+            return
+        if state.get(path) == 'visiting':
+            raise ValueError(f'Циклический импорт: {" -> ".join(stack + (path,))}')
+        state[path] = 'visiting'
+        for dependency in _module_imports(sources[path], path):
+            if dependency in sources:
+                visit(dependency, stack + (path,))
+        state[path] = 'done'
+        order.append(path)
+
+    for path in sorted(sources):
+        visit(path, ())
+    return order
+
+
+def _rewrite_imports(source: str, rel_path: str, names: Dict[str, str]) -> str:
+    base = Path(rel_path).parent
+
+    def replace(match):
+        target = _normalize((base / match.group(3)).as_posix())
+        if target not in names:
+            return match.group(0)
+        new_name = Path(names[target]).name
+        prefix = match.group(3).rsplit('/', 1)[0]
+        return f'{match.group(1)}{match.group(2)}{prefix}/{new_name}{match.group(2)}'
+
+    return _IMPORT_RE.sub(replace, source)
+
+
+def _write_variants(path: Path, content: bytes):
+    """Файл и его заранее сжатые версии (.gz всегда, .br — если есть brotli)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    path.with_name(path.name + '.gz').write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + '.br').write_bytes(brotli.compress(content, quality=11))
+
+
+def build_assets(frontend_dir: Path) -> Dict[str, str]:
+    """
+    Собирает frontend/assets/ и manifest.json
+
+    Args:
+        frontend_dir: Папка frontend/ с index.html
+
+    Returns:
+        Манифест {исходный путь: путь с хешем}, пути относительно frontend/
+    """
+    frontend_dir = Path(frontend_dir)
+    out_dir = frontend_dir / ASSETS_DIR
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+
+    sources = {}
+    for pattern in FINGERPRINT_GLOBS:
+        for path in frontend_dir.glob(pattern):
+            sources[path.relative_to(frontend_dir).as_posix()] = path.read_text(encoding='utf-8')
+
+    names = {}  # исходный путь -> путь с хешем (относительно assets/)
+    for rel_path in _build_order(sources):
+        content = _rewrite_imports(sources[rel_path], rel_path, names).encode('utf-8')
+        names[rel_path] = _hashed_name(rel_path, content)
+        _write_variants(out_dir / names[rel_path], content)
+
+    manifest = {rel_path: f'{ASSETS_DIR}/{name}' for rel_path, name in names.items()}
+
+    def replace(match):
+        target = manifest.get(_normalize(match.group(3)))
+        if not target:
+            return match.group(0)
+        return f'{match.group(1)}={match.group(2)}{target}{match.group(2)}'
+
+    index = (frontend_dir / 'index.html').read_text(encoding='utf-8')
+    _write_variants(out_dir / 'index.html', _HTML_REF_RE.sub(replace, index).encode('utf-8'))
+
+    (out_dir / MANIFEST_NAME).write_text(
+        json.dumps({'files': manifest}, ensure_ascii=False, indent=2, sort_keys=True),
+        encoding='utf-8'
+    )
+    return manifest
+
+
+class AssetStore:
+    """
+    Собранная статика из frontend/assets/, закэшированная в памяти
+
+    Файл (и каждая его сжатая версия) читается с диска один раз.
+    """
+
+    def __init__(self, frontend_dir: Path, manifest: Dict[str, str]):
+        self.root = Path(frontend_dir) / ASSETS_DIR
+        self.manifest = manifest
+        self._served = {Path(path).relative_to(ASSETS_DIR).as_posix() for path in manifest.values()}
+        self._served.add('index.html')
+        self._cache: Dict[Tuple[str, str], Optional[bytes]] = {}
+        self._etags: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, frontend_dir: Path) -> Optional['AssetStore']:
+        """Хранилище по manifest.json или None, если статика не собрана"""
+        manifest_path = Path(frontend_dir) / ASSETS_DIR / MANIFEST_NAME
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return cls(frontend_dir, json.load(f)['files'])
+
+    def _read(self, rel_path: str, suffix: str) -> Optional[bytes]:
+        key = (rel_path, suffix)
+        if key not in self._cache:
+            path = self.root / (rel_path + suffix)
+            content = path.read_bytes() if path.is_file() else None
+            with self._lock:
+                self._cache[key] = content
+        return self._cache[key]
+
+    def get(self, rel_path: str, accept_encodings) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        Содержимое файла из assets/ в лучшей доступной кодировке
+
+        Returns:
+            (bytes, Content-Encoding или None) либо None, если файла нет в сборке
+        """
+        if rel_path not in self._served:
+            return None
+        for encoding, suffix in PRECOMPRESSED:
+            if accept_encodings[encoding] and self._read(rel_path, suffix) is not None:
+                return self._read(rel_path, suffix), encoding
+        return self._read(rel_path, ''), None
+
+    def etag(self, rel_path: str) -> str:
+        """ETag по содержимому файла (считается один раз)"""
+        if rel_path not in self._etags:
+            self._etags[rel_path] = hashlib.sha256(self._read(rel_path, '') or b'').hexdigest()[:16]
+        return self._etags[rel_path]
+
+    @staticmethod
+    def mimetype(rel_path: str) -> str:
+        return ASSET_MIMETYPES.get(Path(rel_path).suffix, 'application/octet-stream')
+
+
+def main():
+    """Сборка статики: python -m src.core.assets [путь к frontend/]"""
+    frontend_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent.parent / 'frontend'
+    manifest = build_assets(frontend_dir)
+    for source, target in sorted(manifest.items()):
+        print(f"  ✓ {source} → {target}")
+    print(f"✓ Статика собрана: {frontend_dir / ASSETS_DIR}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Пакетные изменения истории
+
+Операции применяются множественными UPDATE ... WHERE id IN (...) и
+DELETE в одной транзакции: тысяча удалений — это несколько запросов
+и один commit вместо тысячи SELECT + commit.
+"""
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import bindparam, delete, update
+
+from src.core.models import db, History
+from src.core.changes import record_changes, UPDATE, DELETE
+from src.core.versions import HISTORY
+
+# SQLite в старых сборках ограничивает число параметров запроса 999
+IN_CHUNK_SIZE = 500
+
+BATCH_OPS = ('delete', 'tag', 'short_url')
+
+
+class BatchError(ValueError):
+    """Некорректная операция в пакете (весь пакет отклоняется)"""
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        yield ids[start:start + IN_CHUNK_SIZE]
+
+
+# Ограничения длины — как у колонок History
+_MAX_LENGTHS = {'short_url': 500, 'tag_name': 100, 'tag_color': 20}
+
+
+def _is_id(value) -> bool:
+    # bool — подкласс int, но true/false из JSON не являются id
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _ids(value, position: int) -> List[int]:
+    if not isinstance(value, list) or not all(_is_id(i) for i in value):
+        raise BatchError(f'operations[{position}].ids must be a list of integers')
+    return list(dict.fromkeys(value))
+
+
+def _tag_field(operation: dict, field: str, position: int) -> str:
+    value = operation.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise BatchError(f'operations[{position}].{field} must be a string')
+    if len(value) > _MAX_LENGTHS[field]:
+        raise BatchError(f'operations[{position}].{field} is longer than {_MAX_LENGTHS[field]} characters')
+    return value
+
+
+def validate_operations(operations) -> List[dict]:
+    """
+    Проверяет пакет целиком до выполнения
+
+    Форматы операций:
+        {"op": "delete", "ids": [1, 2]}
+        {"op": "tag", "ids": [1, 2], "tag_name": "...", "tag_color": "..."}
+        {"op": "short_url", "items": [{"id": 1, "short_url": "..."}]}
+
+    Raises:
+        BatchError: с указанием первой некорректной операции
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations must be a non-empty list')
+
+    validated = []
+    for position, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPS:
+            raise BatchError(f'operations[{position}].op must be one of {", ".join(BATCH_OPS)}')
+        op = operation['op']
+        if op == 'short_url':
+            items = operation.get('items')
+            if not isinstance(items, list) or not all(
+                isinstance(item, dict)
+                and _is_id(item.get('id'))
+                and isinstance(item.get('short_url'), str)
+                and 0 < len(item['short_url']) <= _MAX_LENGTHS['short_url']
+                for item in items
+            ):
+                raise BatchError(f'operations[{position}].items must be a list of {{id, short_url}}')
+            validated.append({'op': op, 'items': {item['id']: item['short_url'] for item in items}})
+        elif op == 'tag':
+            validated.append({
+                'op': op,
+                'ids': _ids(operation.get('ids'), position),
+                'tag_name': _tag_field(operation, 'tag_name', position),
+                'tag_color': _tag_field(operation, 'tag_color', position),
+            })
+        else:
+            validated.append({'op': op, 'ids': _ids(operation.get('ids'), position)})
+    return validated
+
+
+def _owned_ids(user_email: str, ids: Set[int]) -> Set[int]:
+    """Какие из id существуют и принадлежат пользователю"""
+    owned = set()
+    for chunk in _chunks(sorted(ids)):
+        owned.update(db.session.execute(
+            db.select(History.id).where(History.user_email == user_email, History.id.in_(chunk))
+        ).scalars())
+    return owned
+
+
+def apply_history_batch(user_email: str, operations: List[dict]) -> List[Dict[str, object]]:
+    """
+    Выполняет проверенный пакет операций в одной транзакции
+
+    Операции идут по порядку: запись, удалённая раньше в пакете, для
+    последующих операций считается отсутствующей.
+
+    Returns:
+        По элементу на операцию: {'op', 'affected', 'missing': [id, ...]}
+    """
+    requested = set()
+    for operation in operations:
+        requested.update(operation['items'] if operation['op'] == 'short_url' else operation['ids'])
+    alive = _owned_ids(user_email, requested)
+
+    results = []
+    try:
+        for operation in operations:
+            op = operation['op']
+            targets = list(operation['items'] if op == 'short_url' else operation['ids'])
+            found = [item_id for item_id in targets if item_id in alive]
+            missing = [item_id for item_id in targets if item_id not in alive]
+
+            if op == 'delete':
+                for chunk in _chunks(found):
+                    db.session.execute(
+                        delete(History).where(History.user_email == user_email, History.id.in_(chunk)),
+                        execution_options={'synchronize_session': False}
+                    )
+                alive.difference_update(found)
+                record_changes(user_email, HISTORY, DELETE, found)
+            elif op == 'tag':
+                for chunk in _chunks(found):
+                    db.session.execute(
+                        update(History)
+                        .where(History.user_email == user_email, History.id.in_(chunk))
+                        .values(tag_name=operation['tag_name'], tag_color=operation['tag_color']),
+                        execution_options={'synchronize_session': False}
+                    )
+                record_changes(user_email, HISTORY, UPDATE, found)
+            else:
+                if found:
+                    # Разные значения на каждую запись — один executemany
+                    db.session.connection().execute(
+                        update(History.__table__)
+                        .where(History.__table__.c.id == bindparam('item_id'))
+                        .values(short_url=bindparam('new_short_url')),
+                        [{'item_id': item_id, 'new_short_url': operation['items'][item_id]}
+                         for item_id in found]
+                    )
+                record_changes(user_email, HISTORY, UPDATE, found)
+
+            results.append({'op': op, 'affected': len(found), 'missing': missing})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return results
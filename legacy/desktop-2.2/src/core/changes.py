@@ -0,0 +1,251 @@
+"""
+Журнал изменений для дельта-синхронизации
+
+Маршруты записи фиксируют каждое изменение (insert/update/delete) в
+change_log в той же транзакции, что и само изменение, и увеличивают
+версию данных для ETag. Клиент запоминает номер последнего события и
+запрашивает GET /sync?since=N — получает только то, что изменилось.
+
+Пакетный импорт пишет одно событие reset на пользователя и пачку:
+клиенту проще перечитать список целиком, чем применить тысячи вставок.
+
+Номер события выдаётся при INSERT, а виден он после COMMIT. В Postgres
+транзакция с меньшим seq может закоммититься позже транзакции с большим,
+и клиент, уже продвинувший since, пропустил бы её событие. Поэтому перед
+записью в журнал транзакция блокирует строку (user_email, 'log') в
+change_versions до своего COMMIT: события одного пользователя получают
+seq в порядке коммитов. В SQLite запись и так идёт по одной транзакции,
+и блокировка не выполняется — маршрут записи не платит за неё запросами.
+
+Журнал хранится CHANGE_LOG_RETENTION_DAYS дней: prune_change_log
+вызывается один раз при запуске — в фоне после старта desktop-сервера
+и в мастере gunicorn (src/web/server.py), а не в create_app каждого
+воркера. Номер последнего удалённого события пользователя хранится
+в строке 'log'; клиенту с since старше него отвечают resync_required.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.core.models import db, ChangeLog, ChangeVersion, History, Template
+from src.core.versions import bump_version, HISTORY, TEMPLATES
+
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+RESET = 'reset'
+
+# Строка change_versions журнала пользователя: блокировка записи событий,
+# version — seq последнего удалённого события
+LOG = 'log'
+
+_MODELS = {HISTORY: History, TEMPLATES: Template}
+
+
+def _is_postgresql(session) -> bool:
+    return session.get_bind().dialect.name == 'postgresql'
+
+
+def _ensure_log_row(session, user_email: str):
+    """Строка 'log' пользователя в change_versions (если её ещё нет)"""
+    insert = postgresql.insert if _is_postgresql(session) else sqlite.insert
+    session.execute(
+        insert(ChangeVersion)
+        .values(user_email=user_email, scope=LOG, version=0, updated_at=datetime.utcnow())
+        .on_conflict_do_nothing()
+    )
+
+
+def _lock_log(user_email: str, session=None):
+    """
+    Блокирует журнал пользователя до конца транзакции (см. описание модуля)
+
+    Только в Postgres: в SQLite пишущие транзакции и так идут по одной.
+    """
+    session = db.session if session is None else session
+    if not _is_postgresql(session):
+        return
+    _ensure_log_row(session, user_email)
+    session.execute(
+        update(ChangeVersion)
+        .where(ChangeVersion.user_email == user_email, ChangeVersion.scope == LOG)
+        .values(updated_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def record_change(user_email: str, scope: str, op: str, item_id: Optional[int] = None):
+    """Записывает событие и увеличивает версию данных пользователя (без commit)"""
+    _lock_log(user_email)
+    db.session.execute(
+        ChangeLog.__table__.insert().values(user_email=user_email, scope=scope, op=op, item_id=item_id)
+    )
+    bump_version(user_email, scope)
+
+
+def record_changes(user_email: str, scope: str, op: str, item_ids: Iterable[int]):
+    """Пакет событий одного вида одним executemany и одно увеличение версии"""
+    rows = [
+        {'user_email': user_email, 'scope': scope, 'op': op, 'item_id': item_id}
+        for item_id in item_ids
+    ]
+    if not rows:
+        return
+    _lock_log(user_email)
+    db.session.execute(ChangeLog.__table__.insert(), rows)
+    bump_version(user_email, scope)
+
+
+def record_reset(user_emails: Iterable[str], scope: str):
+    """Событие reset для каждого пользователя: список нужно перечитать целиком"""
+    for user_email in set(user_emails):
+        record_change(user_email, scope, RESET)
+
+
+def latest_seq(user_email: str) -> int:
+    """Номер последнего события пользователя (0, если событий нет)"""
+    seq = db.session.execute(
+        db.select(db.func.max(ChangeLog.seq)).where(ChangeLog.user_email == user_email)
+    ).scalar()
+    return seq or 0
+
+
+def pruned_seq(user_email: str) -> int:
+    """Номер последнего удалённого из журнала события пользователя (0 — не удалялись)"""
+    seq = db.session.execute(
+        db.select(ChangeVersion.version)
+        .where(ChangeVersion.user_email == user_email, ChangeVersion.scope == LOG)
+    ).scalar()
+    return seq or 0
+
+
+def prune_change_log(retention_days: int, session=None) -> int:
+    """
+    Удаляет события старше retention_days дней (с commit)
+
+    Для каждого пользователя запоминается seq последнего удалённого
+    события — по нему changes_since узнаёт, что клиенту нужна полная
+    пересинхронизация.
+
+    Args:
+        retention_days: Сколько дней хранятся события
+        session: Сессия SQLAlchemy (по умолчанию db.session приложения;
+            мастер gunicorn передаёт свою — приложения в нём нет)
+
+    Returns:
+        Число удалённых событий
+    """
+    session = db.session if session is None else session
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    horizons = session.execute(
+        db.select(ChangeLog.user_email, db.func.max(ChangeLog.seq))
+        .where(ChangeLog.created_at < cutoff)
+        .group_by(ChangeLog.user_email)
+        .order_by(ChangeLog.user_email)  # один порядок блокировок во всех процессах
+    ).all()
+
+    deleted = 0
+    for user_email, seq in horizons:
+        _ensure_log_row(session, user_email)
+        _lock_log(user_email, session)
+        session.execute(
+            update(ChangeVersion)
+            .where(ChangeVersion.user_email == user_email, ChangeVersion.scope == LOG,
+                   ChangeVersion.version < seq)
+            .values(version=seq),
+            execution_options={'synchronize_session': False}
+        )
+        deleted += session.execute(
+            delete(ChangeLog).where(ChangeLog.user_email == user_email, ChangeLog.seq <= seq),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+    session.commit()
+    return deleted
+
+
+def _resync(since: int, user_email: str) -> Dict[str, object]:
+    """Ответ для клиента, отставшего дальше хранимого журнала: перечитать всё"""
+    result = {
+        'since': since,
+        'next_since': latest_seq(user_email),
+        'has_more': False,
+        'reset': sorted(_MODELS),
+        'resync_required': True,
+    }
+    for scope in _MODELS:
+        result[scope] = {'upserted': [], 'deleted': []}
+    return result
+
+
+def changes_since(user_email: str, since: int, limit: int = 1000) -> Dict[str, object]:
+    """
+    Изменения пользователя после события since, схлопнутые по записям
+
+    Из нескольких событий одной записи остаётся итог: запись либо
+    изменена/добавлена (отдаётся её текущее состояние), либо удалена.
+
+    Returns:
+        dict: {
+            'since': N,
+            'next_since': номер последнего отданного события,
+            'has_more': есть ли ещё события (повторить запрос с next_since),
+            'reset': ['history', ...] — списки, которые нужно перечитать,
+            'resync_required': события после since уже удалены из журнала —
+                перечитать оба списка и продолжить с next_since,
+            'history': {'upserted': [...], 'deleted': [id, ...]},
+            'templates': {'upserted': [...], 'deleted': [id, ...]}
+        }
+    """
+    if since < pruned_seq(user_email):
+        return _resync(since, user_email)
+
+    events = db.session.execute(
+        db.select(ChangeLog.seq, ChangeLog.scope, ChangeLog.op, ChangeLog.item_id)
+        .where(ChangeLog.user_email == user_email, ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    reset = set()
+    latest = {scope: {} for scope in _MODELS}  # scope -> {item_id: op}
+    for event in events:
+        if event.op == RESET:
+            reset.add(event.scope)
+        elif event.scope in latest and event.item_id is not None:
+            latest[event.scope][event.item_id] = event.op
+
+    if events:
+        next_since = events[-1].seq
+    else:
+        next_since = latest_seq(user_email)
+        if since > next_since:
+            # Клиент знает события, которых в базе нет (база пересоздана) — всё заново
+            reset.update(_MODELS)
+
+    result = {
+        'since': since,
+        'next_since': next_since,
+        'has_more': has_more,
+        'reset': sorted(reset),
+        'resync_required': False,
+    }
+    for scope, model in _MODELS.items():
+        changed = [item_id for item_id, op in latest[scope].items() if op != DELETE]
+        deleted = {item_id for item_id, op in latest[scope].items() if op == DELETE}
+        upserted = []
+        if changed and scope not in reset:
+            rows = model.project(
+                model.query.filter(model.id.in_(changed), model.user_email == user_email)
+            ).all()
+            upserted = model.rows_to_dicts(rows)
+            # Записи, удалённые уже после этой порции событий, тоже отдаём как удалённые
+            deleted |= set(changed) - {row.id for row in rows}
+        result[scope] = {
+            'upserted': upserted,
+            'deleted': sorted(deleted) if scope not in reset else [],
+        }
+    return result
@@ -80,6 +80,57 @@ class Config:
         'connect_args': {'timeout': 30}
     }
 
+    # PRAGMA для каждого нового SQLite-соединения (для Postgres не применяются).
+    # WAL позволяет читать во время записи, synchronous=NORMAL в WAL не теряет
+    # целостность при сбое приложения, mmap/cache ускоряют чтение.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # в КиБ (отрицательное значение), т.е. 64 МиБ
+        'temp_store': 'MEMORY',
+    }
+
+    # Пагинация истории (GET /history?limit=&cursor=)
+    HISTORY_PAGE_SIZE = 100
+    HISTORY_PAGE_SIZE_MAX = 1000
+
+    # Импорт истории: строк на одну транзакцию
+    IMPORT_CHUNK_SIZE = 5000
+    # Потоковый импорт JSON: предел одной записи в символах
+    IMPORT_MAX_RECORD_SIZE = 1024 * 1024
+
+    # Пакетная сборка ссылок: максимум сочетаний за один запрос
+    BUILD_BATCH_MAX_URLS = 100000
+
+    # LRU-кэши разбора URL в UTMService (0 — выключены)
+    UTM_CACHE_SIZE = 4096
+
+    # Журнал изменений для GET /sync: сколько дней хранятся события
+    CHANGE_LOG_RETENTION_DAYS = 30
+
+    # JSON-провайдер ответов: 'auto' (orjson, если установлен), 'orjson', 'stdlib'
+    JSON_PROVIDER = 'auto'
+    # Экранировать не-ASCII в ответах (\uXXXX), как Flask по умолчанию.
+    # Frontend читает UTF-8; True отключает orjson — он так не умеет
+    JSON_ENSURE_ASCII = False
+
+    # Сжатие ответов gzip/brotli (desktop работает по localhost — не нужно)
+    COMPRESSION_ENABLED = False
+    COMPRESSION_MIN_SIZE = 1024  # байт; меньшие ответы отдаются как есть
+    COMPRESSION_GZIP_LEVEL = 6
+    COMPRESSION_BROTLI_QUALITY = 5
+
+    # Отдавать собранную статику из frontend/assets/ (если она есть)
+    FINGERPRINTED_ASSETS = True
+
+    # WSGI-сервер desktop: 'auto' (waitress, затем cheroot, иначе dev-сервер
+    # werkzeug), 'waitress', 'cheroot' или 'werkzeug'
+    SERVER_BACKEND = 'auto'
+    SERVER_THREADS = 8               # рабочих потоков в пуле
+    SERVER_CONNECTION_LIMIT = 100    # одновременных соединений
+    SERVER_CHANNEL_TIMEOUT = 120     # сек; простаивающее keep-alive соединение закрывается
+
 
 class DesktopConfig(Config):
     """Конфигурация для desktop"""
@@ -91,6 +142,15 @@ class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_ECHO = False  # True для отладки SQL
 
+    # В разработке — исходные файлы frontend/, чтобы правки были видны сразу
+    FINGERPRINTED_ASSETS = False
+
+    # Без mmap: dev-база часто лежит в синхронизируемых/сетевых папках
+    SQLITE_PRAGMAS = {
+        **Config.SQLITE_PRAGMAS,
+        'mmap_size': 0,
+    }
+
 
 class WebConfig(Config):
     """Конфигурация для Web версии"""
@@ -102,6 +162,9 @@ class WebConfig(Config):
     # Security
     SECRET_KEY = os.environ.get('SECRET_KEY')
 
+    # Сжатие ответов (за прокси и на медленных каналах)
+    COMPRESSION_ENABLED = True
+
     # OAuth
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -120,6 +183,16 @@ class WebConfig(Config):
     YOOKASSA_SHOP_ID = os.environ.get('YOOKASSA_SHOP_ID')
     YOOKASSA_SECRET_KEY = os.environ.get('YOOKASSA_SECRET_KEY')
 
+    # Web-сервер (run_web.py): gunicorn, pre-fork воркеры с пулом потоков.
+    # Каждый воркер создаёт своё приложение и свой пул соединений с БД.
+    WEB_BIND = os.environ.get('WEB_BIND', '0.0.0.0:8000')
+    WEB_WORKERS = int(os.environ.get('WEB_CONCURRENCY') or 2 * (os.cpu_count() or 1) + 1)
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', '4'))
+    WEB_TIMEOUT = 60                 # сек; зависший воркер перезапускается
+    WEB_GRACEFUL_TIMEOUT = 30        # сек на завершение запросов при перезапуске
+    WEB_MAX_REQUESTS = 1000          # воркер перезапускается после N запросов
+    WEB_MAX_REQUESTS_JITTER = 100    # ...со случайным разбросом, чтобы не все сразу
+
     # Limits
     FREE_HISTORY_LIMIT = 100
     FREE_TEMPLATES_LIMIT = 10
@@ -129,8 +202,27 @@ class WebConfig(Config):
 
 class ProductionConfig(WebConfig):
     """Конфигурация для production"""
+    # Пул на воркер: по соединению на поток (+ запас). Всего соединений
+    # с Postgres до WEB_WORKERS * (pool_size + max_overflow) — должно
+    # укладываться в max_connections сервера
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 10,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or WebConfig.WEB_THREADS),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '2')),
+        'pool_timeout': 10,
         'pool_recycle': 3600,
         'pool_pre_ping': True,
     }
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'desktop': DesktopConfig,
+    'web': WebConfig,
+    'production': ProductionConfig,
+    'default': Config
+}
+
+
+def get_config(config_name: str) -> type:
+    """Класс конфигурации по имени ('development', 'desktop', 'web', 'production')"""
+    return CONFIGS.get(config_name, Config)
@@ -0,0 +1,33 @@
+"""
+Настройка соединений с базой данных
+"""
+from typing import Dict
+
+from sqlalchemy import event
+
+
+def install_sqlite_pragmas(engine, pragmas: Dict[str, object]):
+    """
+    Выполняет PRAGMA на каждом новом SQLite-соединении пула
+
+    journal_mode=WAL сохраняется в самом файле БД, остальные PRAGMA
+    действуют только на соединение — поэтому они применяются в хуке
+    connect, а не один раз при старте.
+
+    Args:
+        engine: SQLAlchemy engine
+        pragmas: {имя: значение}, например {'journal_mode': 'WAL'}
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
@@ -0,0 +1,372 @@
+"""
+Дельта-обновления: замена только изменившихся файлов установки
+
+При сборке релиза для бандла (dist/UTMka на Windows, UTMka.app на macOS)
+записывается манифест — SHA-256 и размер каждого файла. Патч от версии A
+к версии B строится по манифесту A и бандлу B: в zip попадают только
+новые и изменившиеся файлы, а patch.json перечисляет их хеши, хеши
+заменяемых файлов версии A и удалённые файлы. Старый бандл для сборки
+патча не нужен — только его манифест (ассет прошлого релиза).
+
+Перед применением патч распаковывается в папку данных и проверяется
+целиком: заменяемые файлы установки должны совпасть с версией A,
+распакованные — с версией B. Если что-то не сходится, патч не
+применяется и обновление идёт полным установщиком. Копирует файлы
+поверх установки отдельный скрипт после выхода приложения: запущенный
+exe и загруженные библиотеки на Windows заблокированы. Первым делом
+скрипт создаёт файл-отметку: приложение завершается, только увидев её.
+Если пользователь отклонил запрос прав (UAC, пароль администратора
+на macOS), отметки нет — установка не тронута, и клиент переходит на
+полный установщик.
+
+Файлы заменяются целиком, без побайтовых диффов: обычный релиз меняет
+frontend и сам exe (в нём упакован Python-код), остальное — библиотеки
+Python и Qt/WebView — остаётся прежним. На macOS манифест строится по
+уже подписанному бандлу: изменённые _CodeSignature и исполняемый файл
+попадают в патч, и подпись после применения остаётся верной.
+
+Модуль использует только stdlib.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional
+
+PATCH_INFO = 'patch.json'
+PATCH_FILES_DIR = 'files'
+
+_BUFFER_SIZE = 1024 * 1024
+
+# Сколько ждать запуска apply-скрипта: запрос прав ждёт ответа пользователя
+APPLY_START_TIMEOUT = 300
+
+
+class DeltaError(Exception):
+    """Патч нельзя построить или применить — нужен полный установщик"""
+
+
+def platform_tag() -> str:
+    """Платформа в именах ассетов: windows, macos-arm64, macos-x86_64"""
+    if sys.platform == 'win32':
+        return 'windows'
+    if sys.platform == 'darwin':
+        return f'macos-{platform.machine()}'
+    return sys.platform
+
+
+def manifest_asset_name(version: str, tag: Optional[str] = None) -> str:
+    return f'UTMka-manifest-{version}-{tag or platform_tag()}.json'
+
+
+def patch_asset_name(from_version: str, to_version: str, tag: Optional[str] = None) -> str:
+    return f'UTMka-patch-{from_version}-{to_version}-{tag or platform_tag()}.zip'
+
+
+def file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_BUFFER_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def install_root() -> Path:
+    """
+    Корень установленного бандла: папка с UTMka.exe или UTMka.app
+
+    Raises:
+        DeltaError: Приложение запущено не из сборки PyInstaller
+    """
+    if not getattr(sys, 'frozen', False):
+        raise DeltaError('Патч применяется только к установленному приложению')
+    exe = Path(sys.executable).resolve()
+    if sys.platform == 'darwin' and exe.parent.name == 'MacOS':
+        return exe.parents[2]
+    return exe.parent
+
+
+def bundle_manifest(root: Path, version: str) -> dict:
+    """
+    Манифест бандла: {'version', 'files': {путь: {sha256, size}}, 'links': {путь: цель}}
+
+    Пути относительные, через '/'. Символические ссылки (фреймворки
+    в .app) не хешируются, а записываются отдельно.
+    """
+    root = Path(root)
+    files, links = {}, {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        current = Path(dirpath)
+        for name in list(dirnames):
+            if (current / name).is_symlink():
+                dirnames.remove(name)
+                filenames.append(name)
+        for name in filenames:
+            path = current / name
+            rel_path = path.relative_to(root).as_posix()
+            if path.is_symlink():
+                links[rel_path] = os.readlink(path)
+            else:
+                files[rel_path] = {'sha256': file_sha256(path), 'size': path.stat().st_size}
+    return {'version': version, 'files': dict(sorted(files.items())), 'links': dict(sorted(links.items()))}
+
+
+def build_patch(old_manifest: dict, new_manifest: dict, new_root: Path, out_path: Path) -> dict:
+    """
+    Собирает патч old → new
+
+    Returns:
+        Содержимое patch.json
+
+    Raises:
+        DeltaError: Изменились символические ссылки (их zip не переносит)
+    """
+    if old_manifest.get('links', {}) != new_manifest.get('links', {}):
+        raise DeltaError('Изменились символические ссылки бандла — только полный установщик')
+
+    old_files, new_files = old_manifest['files'], new_manifest['files']
+    changed = [rel_path for rel_path, entry in new_files.items()
+               if old_files.get(rel_path, {}).get('sha256') != entry['sha256']]
+    removed = sorted(set(old_files) - set(new_files))
+
+    info = {
+        'from': old_manifest['version'],
+        'to': new_manifest['version'],
+        'files': {rel_path: new_files[rel_path]['sha256'] for rel_path in changed},
+        'base': {rel_path: old_files[rel_path]['sha256']
+                 for rel_path in changed + removed if rel_path in old_files},
+        'removed': removed,
+    }
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(out_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        archive.writestr(PATCH_INFO, json.dumps(info, ensure_ascii=False, indent=2))
+        for rel_path in changed:
+            archive.write(Path(new_root) / rel_path, f'{PATCH_FILES_DIR}/{rel_path}')
+    return info
+
+
+def _safe_rel_path(rel_path: str) -> PurePosixPath:
+    path = PurePosixPath(rel_path)
+    if path.is_absolute() or '..' in path.parts or not path.parts:
+        raise DeltaError(f'Недопустимый путь в патче: {rel_path}')
+    return path
+
+
+def stage_patch(patch_path: Path, root: Path, staging_dir: Path, current_version: str) -> dict:
+    """
+    Проверяет патч и распаковывает его новые файлы в staging_dir
+
+    Установка не меняется: копирует файлы apply-скрипт (write_apply_script).
+
+    Returns:
+        Содержимое patch.json
+
+    Raises:
+        DeltaError: Патч не для этой версии, файлы установки изменены
+            или распакованный файл не совпал с хешем
+    """
+    root, staging_dir = Path(root), Path(staging_dir)
+    try:
+        archive = zipfile.ZipFile(patch_path)
+    except (OSError, zipfile.BadZipFile) as e:
+        raise DeltaError(f'Патч повреждён: {e}') from e
+
+    with archive:
+        try:
+            info = json.loads(archive.read(PATCH_INFO))
+        except (KeyError, ValueError) as e:
+            raise DeltaError(f'В патче нет {PATCH_INFO}') from e
+        if info.get('from') != current_version:
+            raise DeltaError(f"Патч для версии {info.get('from')}, установлена {current_version}")
+
+        for rel_path, sha256 in info['base'].items():
+            installed = root / _safe_rel_path(rel_path)
+            if not installed.is_file() or file_sha256(installed) != sha256:
+                raise DeltaError(f'Файл установки отличается от версии {current_version}: {rel_path}')
+
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        for rel_path, sha256 in info['files'].items():
+            member = archive.getinfo(f'{PATCH_FILES_DIR}/{rel_path}')
+            target = staging_dir / _safe_rel_path(rel_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with archive.open(member) as source, open(target, 'wb') as f:
+                shutil.copyfileobj(source, f, _BUFFER_SIZE)
+            if file_sha256(target) != sha256:
+                raise DeltaError(f'Файл патча повреждён: {rel_path}')
+            mode = member.external_attr >> 16
+            if mode & 0o777:
+                os.chmod(target, mode & 0o777)
+        for rel_path in info['removed']:
+            _safe_rel_path(rel_path)
+    return info
+
+
+def _windows_script(staging_dir: Path, root: Path, removed, pid: int, started: Path) -> str:
+    lines = [
+        '@echo off',
+        'chcp 65001 >NUL',
+        f'type NUL > "{started}"',
+        ':wait',
+        f'tasklist /FI "PID eq {pid}" /NH 2>NUL | find " {pid} " >NUL',
+        'if not errorlevel 1 (',
+        '  timeout /t 1 /nobreak >NUL',
+        '  goto wait',
+        ')',
+        f'robocopy "{staging_dir}" "{root}" /E /R:10 /W:1 /NFL /NDL /NJH /NJS /NP >NUL',
+        'if errorlevel 8 exit /b 1',
+    ]
+    lines += [f'del /f /q "{root / PurePosixPath(rel_path)}" >NUL 2>&1' for rel_path in removed]
+    lines.append(f'start "" "{root / "UTMka.exe"}"')
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def _posix_script(staging_dir: Path, root: Path, removed, pid: int, started: Path) -> str:
+    relaunch = (f'open {shlex.quote(str(root))}' if root.suffix == '.app'
+                else shlex.quote(str(root / 'UTMka')) + ' &')
+    lines = [
+        '#!/bin/sh',
+        f': > {shlex.quote(str(started))}',
+        f'while kill -0 {pid} 2>/dev/null; do sleep 0.5; done',
+        f'cp -Rp {shlex.quote(str(staging_dir))}/. {shlex.quote(str(root))}/ || exit 1',
+    ]
+    lines += [f'rm -f {shlex.quote(str(root / rel_path))}' for rel_path in removed]
+    lines.append(relaunch)
+    return '\n'.join(lines) + '\n'
+
+
+def started_marker(script: Path) -> Path:
+    """Файл, который apply-скрипт создаёт сразу после запуска"""
+    return Path(script).with_suffix('.started')
+
+
+def write_apply_script(staging_dir: Path, root: Path, removed, pid: int) -> Path:
+    """
+    Скрипт, который отметит запуск (started_marker), дождётся выхода
+    процесса pid, скопирует staging_dir поверх установки, удалит removed
+    и снова запустит приложение
+    """
+    staging_dir, root = Path(staging_dir), Path(root)
+    if os.name == 'nt':
+        script = staging_dir.with_name(staging_dir.name + '-apply.cmd')
+        script.write_text(_windows_script(staging_dir, root, removed, pid, started_marker(script)),
+                          encoding='utf-8')
+    else:
+        script = staging_dir.with_name(staging_dir.name + '-apply.sh')
+        script.write_text(_posix_script(staging_dir, root, removed, pid, started_marker(script)),
+                          encoding='utf-8')
+        os.chmod(script, 0o755)
+    return script
+
+
+def _is_writable(root: Path) -> bool:
+    """Проверка записью: os.access не учитывает UAC и ACL Program Files"""
+    probe = root / '.utmka-write-test'
+    try:
+        probe.write_bytes(b'')
+        probe.unlink()
+        return True
+    except OSError:
+        return False
+
+
+def _spawn_apply_script(script: Path, root: Path) -> subprocess.Popen:
+    """Процесс скрипта; для защищённой папки — с запросом прав"""
+    elevate = not _is_writable(root)
+    if os.name == 'nt':
+        if elevate:
+            # Отказ в UAC — исключение Start-Process; PowerShell выходит с кодом 1
+            quoted = str(script).replace("'", "''")
+            return subprocess.Popen([
+                'powershell', '-NoProfile', '-WindowStyle', 'Hidden', '-Command',
+                f"try {{ Start-Process -FilePath cmd.exe -ArgumentList '/c \"{quoted}\"' "
+                f"-Verb RunAs -WindowStyle Hidden -ErrorAction Stop }} catch {{ exit 1 }}"
+            ], creationflags=subprocess.CREATE_NO_WINDOW)
+        return subprocess.Popen(['cmd', '/c', str(script)],
+                                creationflags=subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP)
+    if elevate and sys.platform == 'darwin':
+        # osascript ждёт конца скрипта; отмена запроса пароля — выход с ошибкой
+        command = f'sh {shlex.quote(str(script))}'.replace('\\', '\\\\').replace('"', '\\"')
+        return subprocess.Popen(['osascript', '-e', f'do shell script "{command}" with administrator privileges'])
+    return subprocess.Popen(['sh', str(script)], start_new_session=True)
+
+
+def launch_apply_script(script: Path, root: Path, timeout: float = APPLY_START_TIMEOUT):
+    """
+    Запускает скрипт отдельным процессом и ждёт его отметки о запуске
+
+    Raises:
+        DeltaError: Скрипт не запустился — отказ в правах администратора,
+            ошибка запуска или нет отметки за timeout секунд
+    """
+    started = started_marker(script)
+    started.unlink(missing_ok=True)
+    try:
+        process = _spawn_apply_script(Path(script), Path(root))
+    except OSError as e:
+        raise DeltaError(f'Не удалось запустить обновление: {e}') from e
+
+    deadline = time.monotonic() + timeout
+    while not started.exists():
+        if process.poll() not in (None, 0):
+            raise DeltaError('Обновление не запущено: нет прав на запись в папку установки')
+        if time.monotonic() > deadline:
+            process.kill()
+            raise DeltaError('Обновление не запущено: истекло время ожидания')
+        time.sleep(0.1)
+
+
+def write_release_delta(bundle: Path, version: str, out_dir: Path, tag: str,
+                        previous_manifest: Optional[Path] = None) -> Dict[str, Path]:
+    """
+    Ассеты релиза: манифест бандла и (если передан манифест прошлой версии) патч
+
+    Returns:
+        {'manifest': путь, 'patch': путь} — patch отсутствует, если его не собрать
+    """
+    out_dir = Path(out_dir)
+    manifest = bundle_manifest(bundle, version)
+    manifest_path = out_dir / manifest_asset_name(version, tag)
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding='utf-8')
+    result = {'manifest': manifest_path}
+
+    if previous_manifest:
+        with open(previous_manifest, 'r', encoding='utf-8') as f:
+            old_manifest = json.load(f)
+        patch_path = out_dir / patch_asset_name(old_manifest['version'], version, tag)
+        try:
+            build_patch(old_manifest, manifest, bundle, patch_path)
+            result['patch'] = patch_path
+        except DeltaError as e:
+            print(f"⚠ Патч не собран: {e}")
+    return result
+
+
+def main():
+    """python -m src.core.delta <бандл> --version X --platform windows [--previous манифест.json]"""
+    parser = argparse.ArgumentParser(description='Манифест бандла и патч для дельта-обновлений')
+    parser.add_argument('bundle', type=Path, help='dist/UTMka или dist/UTMka.app')
+    parser.add_argument('--version', required=True)
+    parser.add_argument('--platform', default=platform_tag(), help='windows, macos-arm64, macos-x86_64')
+    parser.add_argument('--previous', type=Path, default=None, help='Манифест прошлого релиза')
+    parser.add_argument('--out', type=Path, default=None, help='Папка для ассетов (по умолчанию рядом с бандлом)')
+    args = parser.parse_args()
+
+    result = write_release_delta(args.bundle, args.version, args.out or args.bundle.parent,
+                                 args.platform, args.previous)
+    for kind, path in result.items():
+        print(f"  ✓ {kind}: {path} ({path.stat().st_size / 1024:.0f} КБ)")
+
+
+if __name__ == '__main__':
+    main()
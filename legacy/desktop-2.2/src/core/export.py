@@ -0,0 +1,106 @@
+"""
+Потоковый экспорт истории и шаблонов
+
+Строки читаются из БД пачками (yield_per) и сразу кодируются в CSV/JSON,
+поэтому память не зависит от размера выгрузки, а первые байты уходят
+клиенту до того, как прочитана последняя запись.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator, List
+from urllib.parse import quote
+
+from flask import Response, stream_with_context
+
+# Поля выгрузки — те же, что в to_dict() без id, user_email и created_at
+HISTORY_EXPORT_FIELDS = [
+    'base_url', 'full_url',
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+    'short_url', 'tag_name', 'tag_color'
+]
+TEMPLATE_EXPORT_FIELDS = [
+    'name',
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+    'tag_name', 'tag_color'
+]
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_rows(query, fields: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+    """Итерирует запрос пачками, отдавая только поля выгрузки"""
+    for item in query.yield_per(batch_size):
+        yield {field: getattr(item, field) for field in fields}
+
+
+def iter_csv(rows: Iterable[dict], fields: List[str]) -> Iterator[str]:
+    """CSV построчно: заголовок, затем по строке на запись"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        # Отдаём накопленное, когда буфер подрос, чтобы не дробить ответ
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_json_array(rows: Iterable[dict]) -> Iterator[str]:
+    """JSON-массив по одному объекту на строку"""
+    yield '['
+    separator = '\n'
+    for row in rows:
+        yield separator + json.dumps(row, ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    """NDJSON: по одному JSON-объекту на строку"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_export(format_type: str, rows: Iterable[dict], fields: List[str]) -> Iterator[str]:
+    """Генератор содержимого файла выгрузки в нужном формате"""
+    if format_type == 'csv':
+        return iter_csv(rows, fields)
+    if format_type == 'ndjson':
+        return iter_ndjson(rows)
+    return iter_json_array(rows)
+
+
+def content_disposition(filename: str) -> str:
+    """Заголовок Content-Disposition, безопасный для не-ASCII имён"""
+    ascii_name = filename.encode('ascii', 'replace').decode('ascii').replace('?', '_')
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def stream_export(query, fields: List[str], format_type: str, basename: str) -> Response:
+    """
+    Отдаёт выгрузку как файл для скачивания, не собирая её в памяти
+
+    Args:
+        query: Упорядоченный запрос по записям пользователя
+        fields: Поля выгрузки
+        format_type: 'csv', 'json' или 'ndjson'
+        basename: Имя файла без расширения
+    """
+    rows = iter_rows(query, fields)
+    response = Response(
+        stream_with_context(iter_export(format_type, rows, fields)),
+        content_type=EXPORT_MIMETYPES[format_type]
+    )
+    response.headers['Content-Disposition'] = content_disposition(f'{basename}.{format_type}')
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
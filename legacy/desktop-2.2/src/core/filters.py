@@ -0,0 +1,108 @@
+"""
+Фильтры и фасеты истории
+
+Фильтры приходят query-параметрами (utm_source, utm_medium, utm_campaign,
+tag_name, date_from, date_to) и применяются в SQL, поэтому работают по
+всей истории, а не по загруженной в браузер странице.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import func
+
+from src.core.models import db, History
+
+# Фильтры по точному значению колонки
+HISTORY_FILTER_FIELDS = ('utm_source', 'utm_medium', 'utm_campaign', 'tag_name')
+
+# Колонки, по которым считаются фасеты
+HISTORY_FACET_FIELDS = ('utm_source', 'utm_medium', 'utm_campaign', 'tag_name')
+
+
+def _parse_bound(value: str, end: bool) -> datetime:
+    """
+    Граница периода: дата (YYYY-MM-DD) или дата-время в ISO-формате
+
+    Дата без времени в date_to включает весь день. Время со смещением
+    (Z, +03:00) переводится в наивное UTC — так хранится created_at.
+    """
+    try:
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            bound = datetime(day.year, day.month, day.day)
+            return bound + timedelta(days=1) if end else bound
+        text = value.strip()
+        if text.endswith(('Z', 'z')):
+            text = text[:-1] + '+00:00'
+        elif len(text) > 6 and text[-6] == ' ' and text[-3] == ':':
+            # Неэкранированный «+» в query-строке приходит пробелом
+            text = text[:-6] + '+' + text[-5:]
+        bound = datetime.fromisoformat(text)
+        if bound.tzinfo is not None:
+            bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+        return bound
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+
+
+def parse_history_filters(args) -> Dict[str, object]:
+    """
+    Читает фильтры истории из query-параметров
+
+    Returns:
+        {поле: значение} для заданных фильтров; date_from/date_to — datetime
+
+    Raises:
+        ValueError: если дата в неверном формате
+    """
+    filters = {}
+    for field in HISTORY_FILTER_FIELDS:
+        value = args.get(field)
+        if value:
+            filters[field] = value
+    if args.get('date_from'):
+        filters['date_from'] = _parse_bound(args['date_from'], end=False)
+    if args.get('date_to'):
+        filters['date_to'] = _parse_bound(args['date_to'], end=True)
+    return filters
+
+
+def apply_history_filters(query, filters: Dict[str, object]):
+    """Добавляет фильтры к запросу History"""
+    for field in HISTORY_FILTER_FIELDS:
+        if field in filters:
+            query = query.filter(getattr(History, field) == filters[field])
+    if 'date_from' in filters:
+        query = query.filter(History.created_at >= filters['date_from'])
+    if 'date_to' in filters:
+        # date_to из даты без времени уже сдвинут на начало следующего дня
+        query = query.filter(History.created_at < filters['date_to'])
+    return query
+
+
+def history_facets(query, limit: int = 50) -> Dict[str, List[dict]]:
+    """
+    Считает записи по значениям source/medium/campaign/tag
+
+    Args:
+        query: Запрос History с фильтрами пользователя
+        limit: Максимум значений в каждом фасете (самые частые)
+
+    Returns:
+        {'utm_source': [{'value': 'yandex', 'count': 120}, ...], ...}
+        Записи без значения считаются под value = None.
+    """
+    subquery = query.with_entities(*(getattr(History, f) for f in HISTORY_FACET_FIELDS)).subquery()
+    facets = {}
+    for field in HISTORY_FACET_FIELDS:
+        column = subquery.c[field]
+        count = func.count().label('count')
+        rows = db.session.execute(
+            db.select(column, count)
+              .group_by(column)
+              .order_by(count.desc(), column)
+              .limit(limit)
+        ).all()
+        facets[field] = [{'value': value, 'count': n} for value, n in rows]
+    return facets
+
@@ -0,0 +1,409 @@
+"""
+Пакетный импорт истории и шаблонов
+
+Записи проверяются и нормализуются пачками, а вставляются одним
+executemany на пачку (Core insert, без ORM-объектов) с коммитом после
+каждой пачки. Так импорт сотен тысяч строк упирается в SQLite, а не в
+накладные расходы unit of work на каждую строку.
+
+Файлы CSV и JSON читаются потоково (iter_csv_records/iter_json_records),
+поэтому загрузка большого файла не держит его целиком в памяти.
+"""
+import csv
+import io
+import json
+import time
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from src.core.models import db, History, Template
+from src.core.services import UTMService
+from src.core.versions import HISTORY, TEMPLATES
+from src.core.changes import record_reset
+
+UTM_FIELDS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term')
+
+# Ограничения длины — как у колонок History
+_HISTORY_MAX_LENGTHS = {
+    'user_email': 255,
+    'base_url': 2000,
+    'full_url': 4000,
+    'utm_source': 255,
+    'utm_medium': 255,
+    'utm_campaign': 255,
+    'utm_content': 255,
+    'utm_term': 255,
+    'short_url': 500,
+    'tag_name': 100,
+    'tag_color': 20,
+}
+
+# Ограничения длины — как у колонок Template
+_TEMPLATE_MAX_LENGTHS = {
+    'user_email': 255,
+    'name': 255,
+    'utm_source': 255,
+    'utm_medium': 255,
+    'utm_campaign': 255,
+    'utm_content': 255,
+    'utm_term': 255,
+    'tag_name': 100,
+    'tag_color': 20,
+}
+
+# Размер порции чтения файла при потоковом разборе
+READ_CHUNK_SIZE = 64 * 1024
+
+# Предел размера одной записи JSON (в символах): незакрытый объект или
+# строка не должны дочитывать в буфер весь файл
+MAX_RECORD_SIZE = 1024 * 1024
+
+# Пробельные символы JSON (RFC 8259)
+JSON_WHITESPACE = ' \t\r\n'
+
+# Сколько отклонённых строк перечислять в отчёте (счётчик — всегда полный)
+MAX_REPORTED_REJECTS = 100
+
+
+def _text(value) -> Optional[str]:
+    """Приводит значение к строке без пробелов по краям; пустое — None"""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        if isinstance(value, (dict, list)):
+            raise ValueError('must be a string')
+        value = str(value)
+    value = value.strip()
+    return value or None
+
+
+def normalize_history_row(item, user_email: Optional[str] = None) -> dict:
+    """
+    Проверяет запись импорта и дополняет её так же, как add_history
+
+    base_url и пустые UTM-поля берутся из самой ссылки. Запись без ссылки
+    принимается, как и прежним импортом: full_url и base_url — пустые строки.
+
+    Args:
+        item: Запись из файла импорта
+        user_email: Владелец по умолчанию, если в записи его нет
+
+    Returns:
+        Словарь колонок для вставки в history_new
+
+    Raises:
+        ValueError: если запись нельзя импортировать
+    """
+    if not isinstance(item, dict):
+        raise ValueError('item must be an object')
+
+    email = _text(item.get('user_email')) or user_email
+    if not email:
+        raise ValueError('user_email is required')
+
+    full_url = _text(item.get('full_url')) or _text(item.get('url')) or ''
+    base_url = _text(item.get('base_url'))
+    if base_url is None:
+        base_url = UTMService.extract_base_url(full_url) if full_url else ''
+
+    row = {
+        'user_email': email,
+        'full_url': full_url,
+        'base_url': base_url,
+        'short_url': _text(item.get('short_url')),
+        'tag_name': _text(item.get('tag_name')),
+        'tag_color': _text(item.get('tag_color')),
+    }
+
+    utm_params = None
+    for field in UTM_FIELDS:
+        value = _text(item.get(field))
+        if value is None and full_url:
+            if utm_params is None:
+                utm_params = UTMService.parse_utm_params(full_url)
+            value = utm_params.get(field)
+        row[field] = value
+
+    _check_lengths(row, _HISTORY_MAX_LENGTHS)
+    return row
+
+
+def normalize_template_row(item, user_email: Optional[str] = None) -> dict:
+    """
+    Проверяет шаблон из файла импорта
+
+    Raises:
+        ValueError: если шаблон нельзя импортировать
+    """
+    if not isinstance(item, dict):
+        raise ValueError('item must be an object')
+
+    email = _text(item.get('user_email')) or user_email
+    if not email:
+        raise ValueError('user_email is required')
+
+    name = _text(item.get('name'))
+    if not name:
+        raise ValueError('name is required')
+
+    row = {'user_email': email, 'name': name}
+    for field in UTM_FIELDS + ('tag_name', 'tag_color'):
+        row[field] = _text(item.get(field))
+
+    _check_lengths(row, _TEMPLATE_MAX_LENGTHS)
+    return row
+
+
+def _check_lengths(row: dict, max_lengths: dict):
+    for field, max_length in max_lengths.items():
+        if row[field] is not None and len(row[field]) > max_length:
+            raise ValueError(f'{field} is longer than {max_length} characters')
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_import_history(
+    items: Iterable,
+    chunk_size: int = 5000,
+    user_email: Optional[str] = None,
+    progress_callback: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Импортирует записи истории пачками по chunk_size, по транзакции на пачку
+
+    Args:
+        items: Записи импорта (список или любой итератор)
+        chunk_size: Размер пачки на одну транзакцию
+        user_email: Владелец по умолчанию для записей без user_email
+        progress_callback: Вызывается после каждой пачки с её сводкой
+
+    Returns:
+        dict: {
+            'imported_count', 'rejected_count',
+            'rejected': [{'index', 'error'}, ...] (первые MAX_REPORTED_REJECTS),
+            'chunks': [{'chunk', 'inserted', 'rejected', 'seconds'}, ...],
+            'seconds', 'rows_per_second'
+        }
+    """
+    return _bulk_import(
+        History.__table__, HISTORY, normalize_history_row,
+        items, chunk_size, user_email, progress_callback
+    )
+
+
+def bulk_import_templates(
+    items: Iterable,
+    chunk_size: int = 5000,
+    user_email: Optional[str] = None,
+    progress_callback: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """Импортирует шаблоны пачками; аргументы и отчёт — как у bulk_import_history"""
+    return _bulk_import(
+        Template.__table__, TEMPLATES, normalize_template_row,
+        items, chunk_size, user_email, progress_callback
+    )
+
+
+def _bulk_import(table, scope, normalize, items, chunk_size, user_email, progress_callback) -> dict:
+    started = time.perf_counter()
+    imported_count = 0
+    rejected_count = 0
+    rejected = []
+    chunks = []
+    index = 0
+
+    def reject(position: int, error: str):
+        nonlocal rejected_count
+        rejected_count += 1
+        if len(rejected) < MAX_REPORTED_REJECTS:
+            rejected.append({'index': position, 'error': error})
+
+    for chunk_number, chunk in enumerate(_chunks(items, max(1, chunk_size)), start=1):
+        chunk_started = time.perf_counter()
+        chunk_rejected = 0
+        rows = []
+        positions = []
+        for item in chunk:
+            try:
+                rows.append(normalize(item, user_email))
+                positions.append(index)
+            except ValueError as e:
+                reject(index, str(e))
+                chunk_rejected += 1
+            index += 1
+
+        inserted = 0
+        if rows:
+            try:
+                db.session.execute(table.insert(), rows)
+                record_reset((row['user_email'] for row in rows), scope)
+                db.session.commit()
+                inserted = len(rows)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error importing {table.name} chunk {chunk_number}: {e}")
+                for position in positions:
+                    reject(position, 'chunk insert failed')
+                chunk_rejected += len(rows)
+
+        imported_count += inserted
+        summary = {
+            'chunk': chunk_number,
+            'inserted': inserted,
+            'rejected': chunk_rejected,
+            'seconds': round(time.perf_counter() - chunk_started, 4),
+        }
+        chunks.append(summary)
+        if progress_callback:
+            progress_callback(summary)
+
+    seconds = time.perf_counter() - started
+    return {
+        'imported_count': imported_count,
+        'rejected_count': rejected_count,
+        'rejected': rejected,
+        'chunks': chunks,
+        'seconds': round(seconds, 4),
+        'rows_per_second': round(imported_count / seconds) if seconds > 0 else imported_count,
+    }
+
+
+def iter_csv_records(stream) -> Iterator[dict]:
+    """
+    Читает CSV построчно (колонки — как в экспорте)
+
+    Args:
+        stream: Бинарный файловый объект (загруженный файл или тело запроса)
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.DictReader(text):
+            yield row
+    finally:
+        text.detach()
+
+
+def iter_json_records(stream, max_record_size: int = MAX_RECORD_SIZE) -> Iterator:
+    """
+    Читает JSON-массив объектов (или NDJSON) по одному элементу
+
+    Файл читается порциями по READ_CHUNK_SIZE, и из буфера декодируется
+    очередной элемент; в памяти одновременно — только незаконченный хвост,
+    не длиннее max_record_size.
+
+    Raises:
+        ValueError: если файл не является JSON-массивом или NDJSON
+            (в том числе лишние или пропущенные запятые, данные после ']')
+            или одна запись длиннее max_record_size
+    """
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    buffer = ''
+    position = 0
+    eof = False
+    in_array = None
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        if len(buffer) - position > max_record_size:
+            raise ValueError(f'record is larger than {max_record_size} characters')
+        chunk = text.read(READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip(chars: str):
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in chars:
+                position += 1
+            if position < len(buffer) or not fill():
+                return
+
+    try:
+        skip(JSON_WHITESPACE)
+        if position >= len(buffer):
+            return
+        in_array = buffer[position] == '['
+        if in_array:
+            position += 1
+
+        # Элементы массива разделены ровно одной запятой; после ']' — только пробелы
+        separated = True
+        while True:
+            skip(JSON_WHITESPACE)
+            if position >= len(buffer):
+                if in_array:
+                    raise ValueError('unexpected end of JSON array')
+                return
+            if in_array and buffer[position] == ']':
+                position += 1
+                skip(JSON_WHITESPACE)
+                if position < len(buffer):
+                    raise ValueError('unexpected data after JSON array')
+                return
+            if in_array and not separated:
+                if buffer[position] != ',':
+                    raise ValueError("expected ',' between JSON array items")
+                position += 1
+                skip(JSON_WHITESPACE)
+            separated = False
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if fill():
+                        continue
+                    raise ValueError('invalid JSON')
+                # Число в конце порции могло оборваться — дочитываем
+                if end == len(buffer) and not isinstance(item, (dict, list, str)) and fill():
+                    continue
+                break
+            position = end
+            yield item
+    finally:
+        text.detach()
+
+
+def detect_upload_format(explicit: Optional[str], filename: Optional[str], mimetype: str) -> Optional[str]:
+    """Формат загружаемого файла: явно указанный, по расширению или по Content-Type"""
+    if explicit:
+        explicit = explicit.lower()
+        return explicit if explicit in ('csv', 'json', 'ndjson') else None
+    if filename and '.' in filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension in ('csv', 'json', 'ndjson'):
+            return extension
+    if 'csv' in mimetype:
+        return 'csv'
+    return 'json'
+
+
+def iter_upload_records(stream, format_type: str, user_email: str,
+                        max_record_size: int = MAX_RECORD_SIZE) -> Iterator:
+    """
+    Записи загруженного файла с владельцем user_email
+
+    Экспорт не содержит user_email, а чужой указанный в файле игнорируется:
+    импортируемые записи всегда принадлежат тому, кто загружает файл.
+    """
+    if format_type == 'csv':
+        records = iter_csv_records(stream)
+    else:
+        records = iter_json_records(stream, max_record_size)
+    for record in records:
+        if isinstance(record, dict):
+            record['user_email'] = user_email
+        yield record
@@ -0,0 +1,201 @@
+"""
+Версионные миграции схемы БД
+
+Номер последней применённой миграции хранится в таблице schema_version.
+При старте читается только он (один SELECT); если схема актуальна,
+create_all, рефлексия таблиц и ALTER не выполняются вовсе.
+
+Новая колонка, индекс или таблица — новая функция в MIGRATIONS со
+следующим номером. Миграции должны быть идемпотентны (IF NOT EXISTS,
+checkfirst, проверка колонок): если приложение упадёт между миграцией
+и записью её номера, она выполнится ещё раз.
+
+Несколько процессов (воркеры web-сервера) могут стартовать одновременно:
+миграции выполняются под межпроцессной блокировкой — advisory lock в
+Postgres, lock-файл во временной папке в SQLite (имя — по пути к базе,
+чтобы не засорять папку данных). Остальные ждут её и затем видят уже
+актуальную версию.
+"""
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+import sqlalchemy
+
+from src.core.models import db, ChangeLog, History, SchemaVersion
+from src.core.search import install_history_fts
+
+
+# created_at для записей, у которых его не было (см. _history_created_at)
+LEGACY_CREATED_AT = datetime(1970, 1, 1)
+
+
+def _create_tables(engine):
+    """Таблицы, которых ещё нет (новая БД или таблицы из новых версий)"""
+    db.metadata.create_all(engine)
+
+
+def _history_tag_columns(engine):
+    """tag_name и tag_color в history_new (БД версий до 2.1)"""
+    columns = {col['name'] for col in sqlalchemy.inspect(engine).get_columns('history_new')}
+    with engine.begin() as conn:
+        if 'tag_name' not in columns:
+            conn.execute(sqlalchemy.text('ALTER TABLE history_new ADD COLUMN tag_name VARCHAR(100)'))
+        if 'tag_color' not in columns:
+            conn.execute(sqlalchemy.text('ALTER TABLE history_new ADD COLUMN tag_color VARCHAR(20)'))
+
+
+def _history_indexes(engine):
+    """Индексы пагинации и фильтров (create_all не добавляет их в старые таблицы)"""
+    with engine.begin() as conn:
+        for index in History.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _history_fts(engine):
+    """Полнотекстовый индекс для /history/search (без FTS5 — повторно при старте, ensure_history_fts)"""
+    install_history_fts(engine)
+
+
+def _change_log_indexes(engine):
+    """Индекс по времени события для удаления старых событий журнала"""
+    with engine.begin() as conn:
+        for index in ChangeLog.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _history_created_at(engine):
+    """
+    created_at без NULL: курсор пагинации строится по (created_at, id)
+
+    В базах прежних версий колонка допускала NULL. Такие записи получают
+    LEGACY_CREATED_AT — самое раннее время, поэтому остаются в конце
+    истории, как и раньше в SQLite (NULL меньше любой даты).
+    """
+    table = History.__table__
+    with engine.begin() as conn:
+        conn.execute(table.update().where(table.c.created_at.is_(None)).values(created_at=LEGACY_CREATED_AT))
+
+
+# (номер, описание, функция) — номера идут подряд, порядок не менять
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'create tables', _create_tables),
+    (2, 'history tag columns', _history_tag_columns),
+    (3, 'history indexes', _history_indexes),
+    (4, 'history full-text index', _history_fts),
+    (5, 'change log retention index', _change_log_indexes),
+    (6, 'history created_at backfill', _history_created_at),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine) -> int:
+    """Номер последней применённой миграции (0 — таблицы schema_version нет)"""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(sqlalchemy.text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+        except sqlalchemy.exc.DBAPIError:
+            return 0
+
+
+# Ключ pg_advisory_lock для миграций (произвольная константа приложения)
+_PG_LOCK_KEY = 0x55544D6B  # 'UTMk'
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Эксклюзивная блокировка файла (ждёт, пока её не отпустит другой процесс)"""
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK сдаётся через 10 секунд — ждём дальше
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _lock_path(database: str) -> str:
+    """
+    Lock-файл миграций SQLite-базы во временной папке
+
+    Файл не удаляется после миграций: удаление, пока другой процесс ждёт
+    блокировку на нём, дало бы двум процессам разные «замки».
+    """
+    digest = hashlib.sha1(os.path.abspath(database).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f'utmka-{digest}.migrate.lock')
+
+
+@contextmanager
+def migration_lock(engine):
+    """Межпроцессная блокировка на время миграций"""
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            conn.execute(sqlalchemy.text('SELECT pg_advisory_lock(:key)'), {'key': _PG_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(sqlalchemy.text('SELECT pg_advisory_unlock(:key)'), {'key': _PG_LOCK_KEY})
+                conn.commit()
+    elif engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+        with _file_lock(_lock_path(engine.url.database)):
+            yield
+    else:
+        yield
+
+
+def run_migrations(engine) -> List[int]:
+    """
+    Применяет миграции новее текущей версии схемы
+
+    Returns:
+        Номера применённых миграций (пустой список — схема актуальна)
+    """
+    if current_version(engine) >= SCHEMA_VERSION:
+        return []
+    with migration_lock(engine):
+        # Пока ждали блокировку, миграции мог выполнить другой процесс
+        version = current_version(engine)
+        if version >= SCHEMA_VERSION:
+            return []
+        return _apply_migrations(engine, version)
+
+
+def _apply_migrations(engine, version: int) -> List[int]:
+    """Выполняет миграции с номером больше version (под migration_lock)"""
+    # Журнал версий нужен до первой записи в него
+    SchemaVersion.__table__.create(engine, checkfirst=True)
+
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        migrate(engine)
+        try:
+            with engine.begin() as conn:
+                conn.execute(SchemaVersion.__table__.insert().values(
+                    version=number, description=description, applied_at=datetime.utcnow()
+                ))
+        except sqlalchemy.exc.IntegrityError:
+            pass  # параллельно запущенный процесс уже записал эту версию
+        applied.append(number)
+        print(f"Миграция схемы {number}: {description}")
+    return applied
@@ -5,12 +5,42 @@ Desktop версия использует user_email для идентифика
 Web версия (будущее) будет использовать user_id с FK.
 """
 from datetime import datetime
+from typing import Iterable, List
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
 
 
+class ListProjectionMixin:
+    """
+    Списки без ORM-объектов: выбираются только колонки LIST_FIELDS
+    кортежами, а в dict они превращаются без обращения к атрибутам модели
+    """
+    LIST_FIELDS: tuple = ()
+
+    @classmethod
+    def list_columns(cls) -> list:
+        return [getattr(cls, field) for field in cls.LIST_FIELDS]
+
+    @classmethod
+    def project(cls, query):
+        """Запрос модели → запрос кортежей LIST_FIELDS"""
+        return query.with_entities(*cls.list_columns())
+
+    @classmethod
+    def rows_to_dicts(cls, rows: Iterable) -> List[dict]:
+        """Кортежи из project() → то же, что to_dict() для каждой записи"""
+        fields = cls.LIST_FIELDS
+        result = []
+        for row in rows:
+            item = dict(zip(fields, row))
+            created_at = item['created_at']
+            item['created_at'] = created_at.isoformat() if created_at else None
+            result.append(item)
+        return result
+
+
 class User(db.Model):
     """Модель пользователя с поддержкой OAuth"""
     __tablename__ = 'users'
@@ -65,9 +95,18 @@ class User(db.Model):
         }
 
 
-class History(db.Model):
+class History(ListProjectionMixin, db.Model):
     """История UTM-ссылок (соответствует таблице history_new)"""
     __tablename__ = 'history_new'
+    __table_args__ = (
+        # Keyset пагинация: WHERE user_email = ? ORDER BY created_at DESC, id DESC
+        db.Index('ix_history_new_user_created_id', 'user_email', 'created_at', 'id'),
+        # Фильтры и фасеты GET /history, /history/facets
+        db.Index('ix_history_new_user_source', 'user_email', 'utm_source'),
+        db.Index('ix_history_new_user_medium', 'user_email', 'utm_medium'),
+        db.Index('ix_history_new_user_campaign', 'user_email', 'utm_campaign'),
+        db.Index('ix_history_new_user_tag', 'user_email', 'tag_name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_email = db.Column(db.String(255), nullable=False, index=True)
@@ -81,7 +120,14 @@ class History(db.Model):
     short_url = db.Column(db.String(500))
     tag_name = db.Column(db.String(100))
     tag_color = db.Column(db.String(20))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Часть курсора пагинации; NULL из прежних версий заполняет миграция
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    LIST_FIELDS = (
+        'id', 'user_email', 'base_url', 'full_url',
+        'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+        'short_url', 'tag_name', 'tag_color', 'created_at'
+    )
 
     def to_dict(self) -> dict:
         return {
@@ -101,7 +147,7 @@ class History(db.Model):
         }
 
 
-class Template(db.Model):
+class Template(ListProjectionMixin, db.Model):
     """Шаблоны UTM"""
     __tablename__ = 'templates'
     
@@ -117,6 +163,12 @@ class Template(db.Model):
     tag_color = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
+    LIST_FIELDS = (
+        'id', 'user_email', 'name',
+        'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+        'tag_name', 'tag_color', 'created_at'
+    )
+
     def to_dict(self) -> dict:
         return {
             'id': self.id,
@@ -133,6 +185,44 @@ class Template(db.Model):
         }
 
 
+class ChangeVersion(db.Model):
+    """Счётчик изменений данных пользователя (history / templates) для ETag"""
+    __tablename__ = 'change_versions'
+
+    user_email = db.Column(db.String(255), primary_key=True)
+    scope = db.Column(db.String(20), primary_key=True)  # history, templates
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ChangeLog(db.Model):
+    """Журнал изменений истории и шаблонов для дельта-синхронизации (GET /sync)"""
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        db.Index('ix_change_log_user_seq', 'user_email', 'seq'),
+        # Удаление старых событий (prune_change_log)
+        db.Index('ix_change_log_created_at', 'created_at'),
+        # AUTOINCREMENT: номер события никогда не переиспользуется
+        {'sqlite_autoincrement': True},
+    )
+
+    seq = db.Column(db.Integer, primary_key=True)
+    user_email = db.Column(db.String(255), nullable=False)
+    scope = db.Column(db.String(20), nullable=False)  # history, templates
+    op = db.Column(db.String(10), nullable=False)  # insert, update, delete, reset
+    item_id = db.Column(db.Integer)  # для reset — NULL
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SchemaVersion(db.Model):
+    """Применённые миграции схемы (src/core/migrations.py)"""
+    __tablename__ = 'schema_version'
+
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class Subscription(db.Model):
     """История подписок пользователя"""
     __tablename__ = 'subscriptions'
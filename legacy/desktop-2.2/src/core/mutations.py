@@ -0,0 +1,42 @@
+"""
+Точечные изменения записей одним запросом
+
+UPDATE/DELETE выполняются сразу, без загрузки ORM-объекта: отсутствие
+записи определяется по rowcount, владелец — условием user_email в WHERE.
+user_email обязателен: без него чужую запись можно было бы изменить по id.
+
+Запросы строятся по таблице модели, а не по ORM-классу: ORM-вариант
+UPDATE/DELETE перед выполнением сбрасывает сессию и разбирает запрос
+для синхронизации объектов, что на одиночной операции дороже самого SQL.
+"""
+from sqlalchemy import delete, update
+
+from src.core.models import db
+
+
+def _execute_owned(model, statement, item_id: int, user_email: str) -> bool:
+    table = model.__table__
+    result = db.session.execute(
+        statement.where(table.c.id == item_id, table.c.user_email == user_email)
+    )
+    return bool(result.rowcount)
+
+
+def update_owned(model, item_id: int, user_email: str, **values) -> bool:
+    """
+    UPDATE одной записи пользователя
+
+    Returns:
+        False, если записи нет (или она чужая)
+    """
+    return _execute_owned(model, update(model.__table__).values(**values), item_id, user_email)
+
+
+def delete_owned(model, item_id: int, user_email: str) -> bool:
+    """
+    DELETE одной записи пользователя
+
+    Returns:
+        False, если записи нет (или она чужая)
+    """
+    return _execute_owned(model, delete(model.__table__), item_id, user_email)
@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) пагинация по (created_at, id)
+
+Курсор непрозрачен для клиента: это base64 от пары (created_at, id)
+последней отданной записи. Следующая страница выбирается условием
+«строго раньше курсора», поэтому запрос идёт по индексу
+(user_email, created_at, id) без OFFSET.
+
+created_at не бывает NULL (NOT NULL в модели, старые записи заполнены
+миграцией), поэтому сравнение не требует COALESCE, мешающего индексу.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или создан не этим сервером"""
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Кодирует позицию записи в непрозрачный курсор"""
+    payload = json.dumps([created_at.isoformat(), item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Декодирует курсор обратно в (created_at, id)
+
+    Raises:
+        InvalidCursor: если строка не является корректным курсором
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(cursor)
+
+
+def parse_page_size(value: Optional[str], default: int, maximum: int) -> int:
+    """Размер страницы из query-параметра, ограниченный [1, maximum]"""
+    try:
+        size = int(value) if value is not None else default
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Возвращает страницу записей от новых к старым и курсор следующей
+
+    Args:
+        query: Запрос, уже отфильтрованный по пользователю
+        model: Модель с колонками created_at и id
+        cursor: Курсор из предыдущего ответа или None для первой страницы
+        limit: Размер страницы
+
+    Returns:
+        (items, next_cursor) — next_cursor равен None на последней странице
+    """
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < item_id)
+        ))
+
+    items = query.order_by(model.created_at.desc(), model.id.desc())\
+                 .limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
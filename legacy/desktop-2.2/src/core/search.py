@@ -0,0 +1,144 @@
+"""
+Полнотекстовый поиск по истории (SQLite FTS5)
+
+history_fts — external content таблица поверх history_new: текст хранится
+только в history_new, а FTS держит индекс, который триггеры обновляют
+при каждой вставке, изменении и удалении записи.
+Если FTS5 недоступен (Postgres, сборка SQLite без FTS5), поиск
+выполняется обычным LIKE по тем же колонкам. Миграция индекса
+записывается и без FTS5, поэтому при старте ensure_history_fts
+проверяет индекс заново: сборка с FTS5 создаст его на той же базе.
+"""
+import re
+from typing import List
+
+import sqlalchemy
+from sqlalchemy import false, or_
+
+from src.core.models import History
+
+FTS_TABLE = 'history_fts'
+
+# Колонки history_new, попадающие в индекс
+FTS_COLUMNS = [
+    'full_url', 'base_url',
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+    'tag_name'
+]
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts_ddl() -> List[str]:
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='history_new', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON history_new BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON history_new BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values}); END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON history_new BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def install_history_fts(engine) -> bool:
+    """
+    Создаёт FTS5-индекс истории и триггеры синхронизации
+
+    При первом создании индекс заполняется из существующих записей.
+
+    Returns:
+        True, если FTS5 доступен и индекс готов
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    with engine.connect() as conn:
+        exists = conn.execute(sqlalchemy.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': FTS_TABLE}).first() is not None
+        try:
+            for statement in _fts_ddl():
+                conn.execute(sqlalchemy.text(statement))
+            if not exists:
+                conn.execute(sqlalchemy.text(
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+                ))
+            conn.commit()
+        except sqlalchemy.exc.OperationalError as e:
+            # SQLite собран без FTS5 — остаётся поиск через LIKE
+            conn.rollback()
+            print(f"FTS5 недоступен, поиск по истории без индекса: {e}")
+            return False
+    return True
+
+
+def history_fts_available(engine) -> bool:
+    """Есть ли FTS5-индекс истории (создаётся миграцией, см. migrations.py)"""
+    if engine.dialect.name != 'sqlite':
+        return False
+    with engine.connect() as conn:
+        return conn.execute(sqlalchemy.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': FTS_TABLE}).first() is not None
+
+
+def ensure_history_fts(engine) -> bool:
+    """
+    Есть ли FTS5-индекс истории; если нет — пробует создать его
+
+    Вызывается при каждом старте: без индекса это один неудачный
+    CREATE VIRTUAL TABLE, с индексом — один SELECT из sqlite_master.
+    """
+    return history_fts_available(engine) or install_history_fts(engine)
+
+
+def build_match_expression(text: str) -> str:
+    """
+    Превращает пользовательский ввод в безопасное выражение MATCH
+
+    Каждое слово становится префиксным термом в кавычках, термы
+    объединяются через AND: «yandex cp» → "yandex"* AND "cp"*.
+    Пустая строка — если в запросе нет ни одного слова.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    return ' AND '.join(f'"{token}"*' for token in tokens)
+
+
+def filter_history_search(query, text: str, use_fts: bool):
+    """
+    Ограничивает запрос истории записями, подходящими под поиск
+
+    Args:
+        query: Запрос History, уже отфильтрованный по пользователю
+        text: Строка поиска (непустая)
+        use_fts: Использовать FTS5-индекс (иначе LIKE по колонкам)
+    """
+    if not _TOKEN_RE.search(text):
+        # Ни одного слова (только кавычки, дефисы и т.п.) — ничего не найдено
+        return query.filter(false())
+
+    if use_fts:
+        expression = build_match_expression(text)
+        matches = sqlalchemy.text(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match'
+        ).bindparams(match=expression).columns(rowid=sqlalchemy.Integer)
+        return query.filter(History.id.in_(matches.subquery().select()))
+
+    for token in _TOKEN_RE.findall(text):
+        pattern = f'%{token}%'
+        query = query.filter(or_(*(
+            getattr(History, column).ilike(pattern) for column in FTS_COLUMNS
+        )))
+    return query
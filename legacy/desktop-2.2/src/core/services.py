@@ -1,8 +1,14 @@
 """
 Бизнес-логика UTM сервиса
 """
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-from typing import Dict, Optional
+from functools import lru_cache
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse, quote_plus, unquote
+from typing import Dict, List, Optional
+
+UTM_KEYS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term')
+
+# Размер LRU-кэшей разбора URL по умолчанию (Config.UTM_CACHE_SIZE)
+DEFAULT_CACHE_SIZE = 4096
 
 
 class UTMService:
@@ -12,13 +18,74 @@ class UTMService:
     def parse_utm_params(url: str) -> Dict[str, Optional[str]]:
         """
         Извлекает UTM-параметры из URL
-        
+
+        Повторные URL отдаются из LRU-кэша (см. configure_cache).
+
         Args:
             url: URL для парсинга
-            
+
         Returns:
             Словарь с UTM-параметрами
         """
+        if not isinstance(url, str):
+            return UTMService._parse_utm_params_full(url)
+        return dict(zip(UTM_KEYS, _utm_values_cached(url)))
+
+    @staticmethod
+    def _scan_utm_params(url: str) -> Dict[str, Optional[str]]:
+        """
+        Извлекает UTM-параметры из URL без кэша
+
+        Query-строка просматривается за один проход: разбираются только
+        ключи utm_*, значения декодируются лишь при наличии %/+, просмотр
+        останавливается, когда найдены все пять меток. Результат совпадает
+        с urlparse + parse_qs (первое непустое значение каждого ключа).
+        """
+        # IPv6-хосты и не-строки — через полный разбор, он их валидирует
+        if not isinstance(url, str) or '[' in url or ']' in url:
+            return UTMService._parse_utm_params_full(url)
+        # Не-ASCII хост urlsplit проверяет NFKC-нормализацией и может отвергнуть
+        if not url.isascii() and not url.partition('?')[0].partition('#')[0].isascii():
+            return UTMService._parse_utm_params_full(url)
+
+        result = dict.fromkeys(UTM_KEYS)
+
+        # urlsplit молча удаляет табы и переводы строк из любой части URL
+        if '\t' in url or '\r' in url or '\n' in url:
+            url = url.replace('\t', '').replace('\r', '').replace('\n', '')
+        end = url.find('#')
+        start = url.find('?', 0, end if end != -1 else len(url))
+        if start == -1:
+            return result
+        query = url[start + 1:end] if end != -1 else url[start + 1:]
+        if 'utm_' not in query and '%' not in query:
+            return result
+
+        remaining = len(UTM_KEYS)
+        for field in query.split('&'):
+            eq = field.find('=')
+            # parse_qs пропускает поля без '=' и с пустым значением
+            if eq == -1 or eq == len(field) - 1:
+                continue
+            key = field[:eq]
+            if '%' in key or '+' in key:
+                key = unquote(key.replace('+', ' '))
+            elif not key.startswith('utm_'):
+                continue
+            if key not in result or result[key] is not None:
+                continue
+            value = field[eq + 1:]
+            if '%' in value or '+' in value:
+                value = unquote(value.replace('+', ' '))
+            result[key] = value
+            remaining -= 1
+            if not remaining:
+                break
+        return result
+
+    @staticmethod
+    def _parse_utm_params_full(url: str) -> Dict[str, Optional[str]]:
+        """Эталонный разбор через urlparse + parse_qs"""
         try:
             parsed = urlparse(url)
             params = parse_qs(parsed.query)
@@ -73,10 +140,97 @@ class UTMService:
         except Exception:
             return base_url
     
+    @staticmethod
+    def build_many(base_urls: List[str], utm_param_sets: List[Dict[str, Optional[str]]]) -> List[str]:
+        """
+        Строит URL для всех сочетаний базовых URL и наборов UTM-параметров
+
+        Результат совпадает с вызовом build_utm_url для каждой пары, но каждый
+        базовый URL разбирается один раз, а каждое значение UTM кодируется
+        один раз на весь пакет.
+
+        Args:
+            base_urls: Базовые URL
+            utm_param_sets: Наборы UTM-параметров
+
+        Returns:
+            Список URL: для каждого базового URL — по одному на каждый набор,
+            в порядке utm_param_sets
+        """
+        # Наборы: {ключ: готовый фрагмент "key=value"} — как urlencode их закодирует
+        encoded_sets = []
+        for utm_params in utm_param_sets:
+            try:
+                encoded_sets.append({
+                    key: f'{quote_plus(key)}={quote_plus(value.strip())}'
+                    for key, value in utm_params.items()
+                    if value and value.strip()
+                })
+            except Exception:
+                # Необычные значения — пусть их обработает build_utm_url как есть
+                encoded_sets.append(None)
+        joined_sets = [
+            '&'.join(encoded.values()) if encoded is not None else None
+            for encoded in encoded_sets
+        ]
+        set_keys = {key for encoded in encoded_sets if encoded for key in encoded}
+
+        results = []
+        for base_url in base_urls:
+            try:
+                if not base_url.startswith(('http://', 'https://')):
+                    base_url = f'https://{base_url}'
+
+                parsed = urlparse(base_url)
+                existing = [
+                    (key, urlencode({key: values}, doseq=True))
+                    for key, values in parse_qs(parsed.query).items()
+                ]
+                head = urlunparse(parsed._replace(query='', fragment=''))
+                tail = f'#{parsed.fragment}' if parsed.fragment else ''
+            except Exception:
+                results.extend(
+                    UTMService.build_utm_url(base_url, utm_params)
+                    for utm_params in utm_param_sets
+                )
+                continue
+
+            existing_keys = {key for key, _ in existing}
+            if existing_keys.isdisjoint(set_keys):
+                # Частый случай: UTM-ключей в базовом URL нет — просто склейка строк
+                existing_query = '&'.join(fragment for _, fragment in existing if fragment)
+                prefix = f'{head}?{existing_query}&' if existing_query else f'{head}?'
+                for utm_params, joined in zip(utm_param_sets, joined_sets):
+                    if joined is None:
+                        results.append(UTMService.build_utm_url(base_url, utm_params))
+                    elif joined:
+                        results.append(f'{prefix}{joined}{tail}')
+                    elif existing_query:
+                        results.append(f'{head}?{existing_query}{tail}')
+                    else:
+                        results.append(f'{head}{tail}')
+                continue
+
+            for utm_params, encoded in zip(utm_param_sets, encoded_sets):
+                if encoded is None:
+                    results.append(UTMService.build_utm_url(base_url, utm_params))
+                    continue
+                # Существующий параметр заменяется на своём месте, новые — в конец
+                parts = [encoded.get(key, fragment) for key, fragment in existing]
+                parts.extend(
+                    fragment for key, fragment in encoded.items()
+                    if key not in existing_keys
+                )
+                query = '&'.join(part for part in parts if part)
+                results.append(f'{head}?{query}{tail}' if query else f'{head}{tail}')
+        return results
+
     @staticmethod
     def extract_base_url(url: str) -> str:
         """
         Извлекает базовый URL без параметров
+
+        Повторные URL отдаются из LRU-кэша (см. configure_cache).
         
         Args:
             url: Полный URL
@@ -84,6 +238,13 @@ class UTMService:
         Returns:
             Базовый URL без query параметров
         """
+        if not isinstance(url, str):
+            return UTMService._extract_base_url_uncached(url)
+        return _base_url_cached(url)
+
+    @staticmethod
+    def _extract_base_url_uncached(url: str) -> str:
+        """Извлекает базовый URL без кэша"""
         try:
             if not url.startswith(('http://', 'https://')):
                 url = f'https://{url}'
@@ -92,3 +253,40 @@ class UTMService:
             return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
         except Exception:
             return url.split('?')[0] if '?' in url else url
+
+    @staticmethod
+    def configure_cache(maxsize: int = DEFAULT_CACHE_SIZE):
+        """
+        Пересоздаёт кэши разбора URL с новым размером (0 — без кэша)
+
+        Кэши потокобезопасны (functools.lru_cache), содержимое и счётчики
+        при пересоздании сбрасываются.
+        """
+        global _utm_values_cached, _base_url_cached
+        _utm_values_cached = lru_cache(maxsize=maxsize)(_utm_values)
+        _base_url_cached = lru_cache(maxsize=maxsize)(UTMService._extract_base_url_uncached)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, dict]:
+        """Попадания, промахи и заполненность кэшей разбора URL"""
+        stats = {}
+        for name, cached in (('base_url', _base_url_cached), ('utm_params', _utm_values_cached)):
+            info = cached.cache_info()
+            lookups = info.hits + info.misses
+            stats[name] = {
+                'hits': info.hits,
+                'misses': info.misses,
+                'size': info.currsize,
+                'maxsize': info.maxsize,
+                'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0,
+            }
+        return stats
+
+
+def _utm_values(url: str) -> tuple:
+    # В кэше — неизменяемый кортеж: вызывающий код получает свежий dict
+    return tuple(UTMService._scan_utm_params(url).values())
+
+
+_utm_values_cached = lru_cache(maxsize=DEFAULT_CACHE_SIZE)(_utm_values)
+_base_url_cached = lru_cache(maxsize=DEFAULT_CACHE_SIZE)(UTMService._extract_base_url_uncached)
@@ -0,0 +1,128 @@
+"""
+Трассировка запуска приложения
+
+Фазы (импорты, create_app, инициализация БД, сервер готов, окно показано)
+записываются всегда — это несколько вызовов perf_counter. Время каждого
+импорта собирается только при UTMKA_TRACE_STARTUP=1: для этого
+подменяется builtins.__import__, что немного замедляет сам запуск.
+
+Отчёт пишется в logs/startup.log в папке данных приложения.
+
+Модуль использует только stdlib и должен импортироваться первым,
+чтобы отсчёт времени начинался до тяжёлых импортов.
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+TRACE_ENV = 'UTMKA_TRACE_STARTUP'
+
+# Импорты короче порога в отчёт не попадают
+IMPORT_REPORT_MIN_MS = 1.0
+
+
+class StartupTrace:
+    """Отметки времени запуска относительно импорта этого модуля"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events: List[list] = []   # [имя, глубина, начало, длительность или None]
+        self.imports: List[list] = []  # [модуль, глубина, длительность]
+        self._local = threading.local()
+        self._original_import = None
+        self._lock = threading.Lock()
+        self.finished = False
+
+    def _now(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    @contextmanager
+    def phase(self, name: str):
+        """Фаза с длительностью; вложенные фазы (в том же потоке) выводятся с отступом"""
+        if self.finished:
+            # Отчёт уже записан (например, create_app в тестах или в web)
+            yield
+            return
+        depth = getattr(self._local, 'phase_depth', 0)
+        event = [name, depth, self._now(), None]
+        with self._lock:
+            self.events.append(event)
+        self._local.phase_depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.phase_depth = depth
+            event[3] = self._now() - event[2]
+
+    def mark(self, name: str):
+        """Точечное событие (сервер готов, окно показано)"""
+        if self.finished:
+            return
+        with self._lock:
+            self.events.append([name, getattr(self._local, 'phase_depth', 0), self._now(), None])
+
+    def trace_imports(self):
+        """Включает замер каждого импорта (см. UTMKA_TRACE_STARTUP)"""
+        if self._original_import is not None:
+            return
+        original = builtins.__import__
+        local = self._local
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            depth = getattr(local, 'depth', 0)
+            entry = [name, depth, 0.0]
+            self.imports.append(entry)
+            local.depth = depth + 1
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                entry[2] = (time.perf_counter() - started) * 1000
+                local.depth = depth
+
+        self._original_import = original
+        builtins.__import__ = timed_import
+
+    def stop_imports(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self) -> str:
+        lines = [f"UTMka startup trace {datetime.now():%Y-%m-%d %H:%M:%S}", '']
+        for name, depth, start, duration in self.events:
+            label = '  ' * depth + name
+            took = f'{duration:9.1f} ms' if duration is not None else ''
+            lines.append(f'  +{start:8.1f} ms  {label:<32}{took}')
+        if self.imports:
+            lines += ['', f'Imports (>= {IMPORT_REPORT_MIN_MS:g} ms, including nested):']
+            for name, depth, duration in self.imports:
+                if duration >= IMPORT_REPORT_MIN_MS:
+                    lines.append(f"  {'  ' * depth + name:<48}{duration:9.1f} ms")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: Path) -> Optional[Path]:
+        """Записывает отчёт (перезаписывая прошлый); ошибки записи не мешают запуску"""
+        self.stop_imports()
+        self.finished = True
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(self.report(), encoding='utf-8')
+            return path
+        except OSError as e:
+            print(f"Не удалось записать {path}: {e}")
+            return None
+
+
+trace = StartupTrace()
+
+if os.environ.get(TRACE_ENV) == '1':
+    trace.trace_imports()
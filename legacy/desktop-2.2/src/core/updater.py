@@ -3,19 +3,51 @@
 """
 import sys
 import os
-import tempfile
+import json
+import hashlib
+import threading
+import time
 import subprocess
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait as futures_wait
+from pathlib import Path
+from urllib.parse import urlparse
 import requests
-from typing import Optional, Callable
+from requests.exceptions import ChunkedEncodingError
+from typing import Optional, Callable, List, Tuple
+from src.core import delta
+from src.core.config import get_data_dir
+from src.core.delta import DeltaError
 from src.core.version import __version__
 
 GITHUB_OWNER = "Goryuchnick"
 GITHUB_REPO = "UTMka-official-service"
 GITHUB_API_URL = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/latest"
 
+# Ответ GitHub о последнем релизе кэшируется на диске вместе с ETag.
+# В пределах TTL сеть не нужна; после — условный запрос с If-None-Match
+# (ответ 304 не расходует лимит запросов GitHub API).
+RELEASE_CACHE_TTL = 6 * 3600  # сек
+RELEASE_CACHE_FILE = 'release.json'
+
+# Скачивание установщика: буфер чтения и записи, максимум параллельных
+# отрезков (если сервер поддерживает Range) и минимальный размер отрезка
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+DOWNLOAD_SEGMENTS = 4
+DOWNLOAD_SEGMENT_MIN_SIZE = 8 * 1024 * 1024
+DOWNLOAD_RETRIES = 3  # продолжений отрезка после обрыва соединения
+
 # Путь к скачанному установщику (глобальная переменная для сохранения между запросами)
 _installer_path: Optional[str] = None
 
+# Текущее фоновое скачивание (см. start_download)
+_download_lock = threading.Lock()
+_download_job: Optional['DownloadJob'] = None
+
+# Фоновая проверка обновлений: одна одновременно, результат — в _check_result
+_check_lock = threading.Lock()
+_check_thread: Optional[threading.Thread] = None
+_check_result: Optional[dict] = None
+
 
 def compare_versions(current: str, latest: str) -> bool:
     """
@@ -35,9 +67,96 @@ def compare_versions(current: str, latest: str) -> bool:
         return False
 
 
-def check_for_updates() -> dict:
+def _release_cache_path():
+    return get_data_dir() / 'cache' / RELEASE_CACHE_FILE
+
+
+def _read_release_cache() -> Optional[dict]:
+    """{'etag', 'fetched_at', 'release'} или None, если кэша нет или он повреждён"""
+    try:
+        with open(_release_cache_path(), 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache.get('release'), dict) else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _write_json(path: Path, data: dict):
+    """Атомарная запись: файл не окажется наполовину записанным"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _write_release_cache(cache: dict):
+    try:
+        _write_json(_release_cache_path(), cache)
+    except OSError as e:
+        print(f"Не удалось сохранить кэш релиза: {e}")
+
+
+def fetch_latest_release(force: bool = False) -> Optional[dict]:
+    """
+    Данные последнего релиза: из кэша, пока он свежий, иначе с GitHub.
+
+    Устаревший кэш перепроверяется условным запросом (If-None-Match);
+    при ошибке сети возвращается устаревший кэш, если он есть.
+
+    Args:
+        force: Не учитывать TTL (условный запрос всё равно используется)
+
+    Returns:
+        JSON релиза из GitHub API или None
+    """
+    cache = _read_release_cache()
+    now = time.time()
+    if cache and not force and now - cache.get('fetched_at', 0) < RELEASE_CACHE_TTL:
+        return cache['release']
+
+    headers = {'Accept': 'application/vnd.github+json'}
+    if cache and cache.get('etag'):
+        headers['If-None-Match'] = cache['etag']
+
+    try:
+        response = requests.get(GITHUB_API_URL, headers=headers, timeout=10)
+        if response.status_code == 304 and cache:
+            cache['fetched_at'] = now
+        else:
+            response.raise_for_status()
+            cache = {
+                'etag': response.headers.get('ETag'),
+                'fetched_at': now,
+                'release': response.json(),
+            }
+        _write_release_cache(cache)
+    except Exception as e:
+        # Нет сети, rate limit и т.д. — остаёмся на том, что есть
+        print(f"Ошибка проверки обновлений: {e}")
+
+    return cache['release'] if cache else None
+
+
+def _no_update() -> dict:
+    return {
+        'available': False,
+        'current_version': __version__,
+        'latest_version': __version__,
+        'download_url': None,
+        'sha256': None,
+        'installer_size': None,
+        'patch_url': None,
+        'patch_sha256': None,
+        'patch_size': None,
+        'release_url': None,
+        'release_notes': ''
+    }
+
+
+def release_info(release_data: Optional[dict]) -> dict:
     """
-    Проверяет наличие обновлений через GitHub Releases API.
+    Результат проверки обновлений по данным релиза.
 
     Returns:
         dict: {
@@ -45,25 +164,41 @@ def check_for_updates() -> dict:
             'current_version': str,
             'latest_version': str,
             'download_url': str,
+            'sha256': str | None,
+            'installer_size': int | None,
+            'patch_url': str | None,       # дельта-патч вместо установщика
+            'patch_sha256': str | None,
+            'patch_size': int | None,
             'release_url': str,
             'release_notes': str
         }
     """
+    if not release_data:
+        return _no_update()
     try:
-        response = requests.get(GITHUB_API_URL, timeout=10)
-        response.raise_for_status()
-        release_data = response.json()
-
         latest_version = release_data['tag_name'].lstrip('v')
         is_newer = compare_versions(__version__, latest_version)
 
         # Ищем установщик в assets
         download_url = None
+        sha256 = None
+        installer_size = None
         platform_suffix = '.exe' if sys.platform == 'win32' else '.dmg'
 
         for asset in release_data.get('assets', []):
             if asset['name'].endswith(platform_suffix):
                 download_url = asset['browser_download_url']
+                # GitHub указывает digest ассета: 'sha256:<hex>'
+                sha256 = asset.get('digest')
+                installer_size = asset.get('size')
+                break
+
+        # Патч от установленной версии (см. src/core/delta.py) — если он меньше установщика
+        patch = None
+        patch_name = delta.patch_asset_name(__version__, latest_version)
+        for asset in release_data.get('assets', []):
+            if asset['name'] == patch_name and (not installer_size or asset.get('size', 0) < installer_size):
+                patch = asset
                 break
 
         return {
@@ -71,78 +206,384 @@ def check_for_updates() -> dict:
             'current_version': __version__,
             'latest_version': latest_version,
             'download_url': download_url,
+            'sha256': sha256,
+            'installer_size': installer_size,
+            'patch_url': patch['browser_download_url'] if patch else None,
+            'patch_sha256': patch.get('digest') if patch else None,
+            'patch_size': patch.get('size') if patch else None,
             'release_url': release_data['html_url'],
-            'release_notes': release_data.get('body', '')[:300]  # Первые 300 символов
-        }
-    except Exception as e:
-        # Молча игнорируем ошибки (нет сети, rate limit и т.д.)
-        print(f"Ошибка проверки обновлений: {e}")
-        return {
-            'available': False,
-            'current_version': __version__,
-            'latest_version': __version__,
-            'download_url': None,
-            'release_url': None,
-            'release_notes': ''
+            'release_notes': (release_data.get('body') or '')[:300]  # Первые 300 символов
         }
+    except (KeyError, TypeError, AttributeError) as e:
+        print(f"Ошибка разбора релиза: {e}")
+        return _no_update()
+
+
+def check_for_updates(force: bool = False) -> dict:
+    """
+    Проверяет наличие обновлений через GitHub Releases API (синхронно).
+
+    Returns:
+        dict: см. release_info()
+    """
+    global _check_result
+    result = release_info(fetch_latest_release(force))
+    _check_result = result
+    return result
+
+
+def start_background_check(force: bool = False) -> bool:
+    """
+    Запускает check_for_updates в фоновом потоке
+
+    Returns:
+        False, если проверка уже идёт
+    """
+    global _check_thread
+    with _check_lock:
+        if _check_thread is not None and _check_thread.is_alive():
+            return False
+        _check_thread = threading.Thread(
+            target=check_for_updates, args=(force,), name='update-check', daemon=True
+        )
+        _check_thread.start()
+        return True
+
+
+def cached_check() -> dict:
+    """
+    Результат проверки без ожидания сети
+
+    Последний результат фоновой проверки, иначе — разбор кэша на диске.
+    Если кэш устарел или его нет, запускается фоновая проверка; поле
+    checking сообщает, что стоит спросить ещё раз чуть позже.
+    """
+    cache = _read_release_cache()
+    result = _check_result or release_info(cache['release'] if cache else None)
+
+    if cache is None or time.time() - cache.get('fetched_at', 0) >= RELEASE_CACHE_TTL:
+        start_background_check()
+
+    checking = _check_thread is not None and _check_thread.is_alive()
+    return {**result, 'checking': checking}
+
+
+class DownloadError(Exception):
+    """Установщик не скачан: сервер, докачка или контрольная сумма"""
+
+
+def _updates_dir() -> Path:
+    path = get_data_dir() / 'updates'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
 
+def _installer_filename(download_url: str) -> str:
+    name = os.path.basename(urlparse(download_url).path)
+    return name or ('UTMka-Setup.exe' if sys.platform == 'win32' else 'UTMka-Setup.dmg')
+
+
+def _probe(download_url: str) -> Tuple[str, Optional[int], Optional[str], bool]:
+    """
+    Итоговый URL (после редиректов), размер, ETag и поддержка Range
+
+    Запрашивается один байт: ответ 206 с Content-Range означает, что
+    сервер умеет отдавать части файла.
+    """
+    with requests.get(download_url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=30) as r:
+        r.raise_for_status()
+        etag = r.headers.get('ETag')
+        if r.status_code == 206:
+            total = r.headers.get('Content-Range', '').rpartition('/')[2]
+            if total.isdigit():
+                return r.url, int(total), etag, True
+        length = r.headers.get('Content-Length', '')
+        return r.url, int(length) if length.isdigit() and r.status_code == 200 else None, etag, False
+
+
+def _plan_segments(size: int, count: int) -> List[List[int]]:
+    """Отрезки [начало, конец включительно, скачано байт]"""
+    step = -(-size // count)
+    return [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+
+
+def _load_segments(state_path: Path, download_url: str, size: int, etag: Optional[str]) -> Optional[list]:
+    """Отрезки прошлой попытки, если она была для того же файла"""
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (state.get('url'), state.get('size'), state.get('etag')) != (download_url, size, etag):
+        return None
+    return state.get('segments')
+
+
+def _fetch_segment(url: str, part_path: Path, segment: list, etag: Optional[str],
+                   on_chunk: Callable[[int], None], hasher=None):
+    """
+    Скачивает отрезок с позиции начало + скачано; после обрыва соединения
+    продолжает с того же места (до DOWNLOAD_RETRIES раз)
 
-def download_installer(download_url: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
+    Отрезок без конца (сервер без Range) качается целиком одним запросом.
     """
-    Скачивает установщик во временную папку.
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        start, end, done = segment
+        headers = {}
+        if end is not None:
+            if start + done > end:
+                return
+            headers['Range'] = f'bytes={start + done}-{end}'
+            if etag:
+                # Файл на сервере изменился — придёт 200 вместо 206
+                headers['If-Range'] = etag
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=30) as r:
+                r.raise_for_status()
+                if headers and r.status_code != 206:
+                    raise DownloadError('Сервер не поддерживает докачку или файл изменился')
+                with open(part_path, 'r+b') as f:
+                    f.seek(start + done)
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_BUFFER_SIZE):
+                        f.write(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        segment[2] += len(chunk)
+                        on_chunk(len(chunk))
+            return
+        except (requests.ConnectionError, requests.Timeout, ChunkedEncodingError) as e:
+            if end is None or attempt == DOWNLOAD_RETRIES:
+                raise
+            print(f"Обрыв скачивания ({e}), продолжаем с {start + segment[2]} байт")
+            time.sleep(attempt + 1)
+
+
+def download_installer(download_url: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                       sha256: Optional[str] = None, segments: int = DOWNLOAD_SEGMENTS) -> str:
+    """
+    Скачивает установщик в папку updates/ данных приложения.
+
+    Недокачанный файл (.part) и его отрезки (.part.json) сохраняются:
+    повторный вызов с тем же URL продолжает с места обрыва (Range,
+    If-Range по ETag). Большие файлы качаются несколькими отрезками
+    параллельно. SHA-256 считается по ходу скачивания (при нескольких
+    отрезках — одним проходом по готовому файлу).
 
     Args:
         download_url: URL для скачивания
         progress_callback: Функция для отслеживания прогресса (downloaded_bytes, total_bytes)
+        sha256: Ожидаемый SHA-256 ('sha256:<hex>' из digest ассета или просто hex)
+        segments: Максимум параллельных отрезков (1 — один поток)
 
     Returns:
         str: Путь к скачанному файлу
+
+    Raises:
+        DownloadError: Сервер прервал докачку или не совпала контрольная сумма
     """
     global _installer_path
 
+    dest = _updates_dir() / _installer_filename(download_url)
+    part_path = dest.with_name(dest.name + '.part')
+    state_path = dest.with_name(dest.name + '.part.json')
+    expected = sha256.lower().split(':')[-1] if sha256 else None
+
+    if expected and dest.exists() and delta.file_sha256(dest) == expected:
+        _installer_path = str(dest)
+        return _installer_path
+
+    url, size, etag, ranges = _probe(download_url)
+
+    plan = None
+    if ranges and part_path.exists() and part_path.stat().st_size == size:
+        plan = _load_segments(state_path, download_url, size, etag)
+    if plan is None:
+        if ranges and size:
+            count = max(1, min(segments, size // DOWNLOAD_SEGMENT_MIN_SIZE))
+            plan = _plan_segments(size, count)
+        else:
+            plan = [[0, None, 0]]
+        with open(part_path, 'wb') as f:
+            if size:
+                f.truncate(size)
+
+    # Один отрезок — хеш считается по ходу; при докачке сначала по уже скачанному
+    hasher = None
+    if len(plan) == 1:
+        hasher = hashlib.sha256()
+        if plan[0][2]:
+            with open(part_path, 'rb') as f:
+                remaining = plan[0][2]
+                while remaining:
+                    block = f.read(min(DOWNLOAD_BUFFER_SIZE, remaining))
+                    hasher.update(block)
+                    remaining -= len(block)
+
+    lock = threading.Lock()
+    stop = threading.Event()
+    downloaded = [sum(segment[2] for segment in plan)]
+
+    def on_chunk(length: int):
+        if stop.is_set():
+            raise DownloadError('Скачивание остановлено: ошибка в другом отрезке')
+        with lock:
+            downloaded[0] += length
+            current = downloaded[0]
+        if progress_callback:
+            progress_callback(current, size or 0)
+
+    def save_state():
+        if ranges:
+            try:
+                _write_json(state_path, {'url': download_url, 'size': size, 'etag': etag, 'segments': plan})
+            except OSError as e:
+                print(f"Не удалось сохранить состояние скачивания: {e}")
+
+    pending = [segment for segment in plan if segment[1] is None or segment[0] + segment[2] <= segment[1]]
     try:
-        response = requests.get(download_url, stream=True, timeout=30)
-        response.raise_for_status()
+        with ThreadPoolExecutor(max_workers=max(1, len(pending)), thread_name_prefix='update-segment') as pool:
+            not_done = [pool.submit(_fetch_segment, url, part_path, segment, etag, on_chunk, hasher)
+                        for segment in pending]
+            first_error = None
+            while not_done:
+                finished, not_done = futures_wait(not_done, timeout=1, return_when=FIRST_EXCEPTION)
+                for future in finished:
+                    if future.exception() is not None and first_error is None:
+                        # Остальные отрезки остановятся на следующем блоке
+                        first_error = future.exception()
+                        stop.set()
+                save_state()
+            if first_error is not None:
+                raise first_error
+    except Exception as e:
+        print(f"Ошибка скачивания: {e}")
+        raise
+    finally:
+        save_state()
 
-        # Определяем расширение файла
-        extension = '.exe' if sys.platform == 'win32' else '.dmg'
+    if size and downloaded[0] != size:
+        raise DownloadError(f'Скачано {downloaded[0]} из {size} байт')
 
-        # Создаём временный файл
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix=extension,
-            prefix='UTMka-Setup-'
-        )
-        temp_path = temp_file.name
+    digest = hasher.hexdigest() if hasher is not None else delta.file_sha256(part_path)
+    if expected and digest != expected:
+        part_path.unlink()
+        state_path.unlink(missing_ok=True)
+        raise DownloadError('Контрольная сумма установщика не совпадает')
 
-        # Скачиваем с отслеживанием прогресса
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
+    os.replace(part_path, dest)
+    state_path.unlink(missing_ok=True)
+    _installer_path = str(dest)
+    return _installer_path
 
-        with open(temp_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
 
-                    if progress_callback and total_size > 0:
-                        progress_callback(downloaded, total_size)
+class DownloadJob:
+    """Фоновое скачивание установщика; состояние — для GET /api/update/progress"""
+
+    def __init__(self, download_url: str, sha256: Optional[str] = None):
+        self.url = download_url
+        self.sha256 = sha256
+        self.status = 'downloading'  # downloading → done | error
+        self.downloaded = 0
+        self.total = 0
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+        self._speed_base: Optional[Tuple[float, int]] = None  # (время, байт) первого отчёта
+        self._thread = threading.Thread(target=self._run, name='update-download', daemon=True)
+
+    def start(self) -> 'DownloadJob':
+        self._thread.start()
+        return self
+
+    def _progress(self, downloaded: int, total: int):
+        if self._speed_base is None:
+            self._speed_base = (time.monotonic(), downloaded)
+        self.downloaded = downloaded
+        self.total = total
+
+    def _run(self):
+        try:
+            self.path = download_installer(self.url, self._progress, sha256=self.sha256)
+            self.downloaded = self.total = os.path.getsize(self.path)
+            self.status = 'done'
+        except Exception as e:
+            self.error = str(e)
+            self.status = 'error'
+
+    def to_dict(self) -> dict:
+        speed = 0
+        if self._speed_base is not None:
+            started, base = self._speed_base
+            elapsed = time.monotonic() - started
+            speed = int((self.downloaded - base) / elapsed) if elapsed > 0 else 0
+        return {
+            'status': self.status,
+            'url': self.url,
+            'downloaded': self.downloaded,
+            'total': self.total,
+            'percent': int(self.downloaded * 100 / self.total) if self.total else 0,
+            'speed': speed,  # байт/с в текущей попытке (без докачанного ранее)
+            'installer_path': self.path,
+            'error': self.error,
+        }
 
-        _installer_path = temp_path
-        return temp_path
 
-    except Exception as e:
-        print(f"Ошибка скачивания: {e}")
-        raise
+def start_download(download_url: str, sha256: Optional[str] = None) -> DownloadJob:
+    """
+    Запускает скачивание в фоне; пока оно идёт, возвращается текущее
+    (повторное нажатие «Установить» не запускает второе)
+    """
+    global _download_job
+    with _download_lock:
+        if _download_job is None or _download_job.status != 'downloading':
+            _download_job = DownloadJob(download_url, sha256).start()
+        return _download_job
+
+
+def download_progress() -> dict:
+    """Состояние последнего скачивания ({'status': 'idle'} — не запускалось)"""
+    job = _download_job
+    return job.to_dict() if job is not None else {'status': 'idle'}
+
+
+def install_patch(patch_path: str):
+    """
+    Применяет скачанный дельта-патч (см. src/core/delta.py).
+
+    Патч проверяется и распаковывается в updates/patch-staged, затем
+    запускается скрипт, который после выхода приложения копирует файлы
+    поверх установки и запускает его снова. Приложение завершается,
+    только когда скрипт отметил свой запуск: при отказе в правах
+    администратора оно продолжает работать.
+
+    Raises:
+        DeltaError: Патч не подходит к установке или скрипт не запустился —
+            нужен полный установщик
+    """
+    root = delta.install_root()
+    staging_dir = _updates_dir() / 'patch-staged'
+    info = delta.stage_patch(patch_path, root, staging_dir, __version__)
+    script = delta.write_apply_script(staging_dir, root, info['removed'], os.getpid())
+    delta.launch_apply_script(script, root)
+
+    # Ответ на /install должен успеть уйти клиенту. Процесс завершается
+    # целиком: скрипт ждёт его выхода, а sys.exit из потока запроса
+    # завершил бы только этот поток
+    threading.Timer(1.0, os._exit, args=(0,)).start()
 
 
 def install_update(installer_path: str):
     """
     Запускает установщик и завершает текущее приложение.
 
+    Для дельта-патча (.zip) — install_patch.
+
     Args:
-        installer_path: Путь к скачанному установщику
+        installer_path: Путь к скачанному установщику или патчу
     """
+    if installer_path.endswith('.zip'):
+        install_patch(installer_path)
+        return
+
     try:
         if sys.platform == 'win32':
             # Windows: Inno Setup с тихой установкой
@@ -0,0 +1,89 @@
+"""
+Версии данных пользователя для условных GET
+
+Каждый маршрут, меняющий историю или шаблоны, увеличивает версию
+(user_email, scope) в той же транзакции, что и само изменение.
+GET-маршруты строят из версии ETag и отвечают 304, если клиент прислал
+его в If-None-Match, — не выполняя запрос к данным и не кодируя JSON.
+"""
+import zlib
+from datetime import datetime
+from typing import Optional, Tuple
+
+from flask import Response, request
+from sqlalchemy import insert, update
+
+from src.core.models import db, ChangeVersion
+
+HISTORY = 'history'
+TEMPLATES = 'templates'
+
+
+def bump_version(user_email: str, scope: str):
+    """Увеличивает версию данных пользователя (без commit)"""
+    # Запросы уровня таблицы: без flush сессии и ORM-обработки UPDATE —
+    # версия меняется в каждом маршруте записи
+    table = ChangeVersion.__table__
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(table)
+        .where(table.c.user_email == user_email, table.c.scope == scope)
+        .values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        db.session.execute(
+            insert(table).values(user_email=user_email, scope=scope, version=1, updated_at=now)
+        )
+
+
+def get_version(user_email: str, scope: str) -> Tuple[int, Optional[datetime]]:
+    """Текущая версия и время последнего изменения; (0, None), если изменений не было"""
+    row = db.session.execute(
+        db.select(ChangeVersion.version, ChangeVersion.updated_at)
+        .where(ChangeVersion.user_email == user_email, ChangeVersion.scope == scope)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def make_etag(scope: str, version: int, updated_at: Optional[datetime], variant: bytes = b'') -> str:
+    """
+    ETag ответа: версия данных плюс отпечаток параметров запроса
+
+    Время изменения входит в ETag, чтобы версия, заново набранная после
+    пересоздания базы, не совпала со старой. variant — обычно query string:
+    разные фильтры и страницы при одной версии дают разные ответы.
+    """
+    stamp = f'{updated_at.timestamp():.6f}' if updated_at else '0'
+    return f'{scope}-{version}-{stamp}-{zlib.crc32(variant):08x}'
+
+
+class ConditionalGet:
+    """
+    Условный GET по версии данных пользователя
+
+    Usage:
+        conditional = ConditionalGet(user_email, HISTORY)
+        if conditional.not_modified:
+            return conditional.not_modified_response()
+        ...
+        return conditional.apply(response)
+    """
+
+    def __init__(self, user_email: str, scope: str):
+        version, self.last_modified = get_version(user_email, scope)
+        self.etag = make_etag(scope, version, self.last_modified, request.query_string)
+
+    @property
+    def not_modified(self) -> bool:
+        return request.if_none_match.contains_weak(self.etag)
+
+    def apply(self, response: Response) -> Response:
+        """Добавляет валидаторы ETag/Last-Modified к ответу"""
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def not_modified_response(self) -> Response:
+        return self.apply(Response(status=304))
@@ -0,0 +1,49 @@
+"""
+Запуск приложения в фоновом потоке, пока окно показывает заставку
+
+Модуль не импортирует pywebview: окно передаётся готовым объектом
+(нужны только load_url и load_html).
+"""
+import traceback
+
+from src.core.startup import trace
+from src.desktop.server import LocalServer
+from src.desktop.splash import error_html
+
+
+def prune_change_log(app):
+    """Удаляет события журнала изменений старше CHANGE_LOG_RETENTION_DAYS"""
+    try:
+        from src.core.changes import prune_change_log as prune
+        with app.app_context():
+            prune(app.config.get('CHANGE_LOG_RETENTION_DAYS', 30))
+    except Exception:
+        traceback.print_exc()
+
+
+def boot(window, server: LocalServer):
+    """
+    Создаёт Flask-приложение и запускает сервер, пока окно показывает
+    заставку; по готовности окно переходит на приложение
+    """
+    try:
+        # Flask и SQLAlchemy импортируются здесь, параллельно с запуском GUI
+        with trace.phase('imports (app)'):
+            from src.api import create_app
+        with trace.phase('create_app'):
+            app = create_app('desktop')
+        server.start(app)
+        trace.mark('server ready')
+        print(f"Сервер: {server.backend}")
+        window.load_url(server.url)
+
+        # Проверка обновлений — в фоне, к запросу UI ответ уже будет в кэше
+        from src.core import updater
+        updater.start_background_check()
+
+        # Старые события журнала /sync удаляются раз за запуск — уже после
+        # перехода окна на приложение, в этом же фоновом потоке
+        prune_change_log(app)
+    except Exception:
+        traceback.print_exc()
+        window.load_html(error_html(traceback.format_exc()))
@@ -1,12 +1,17 @@
 """
 Desktop приложение UTMka
 """
-import sys
+# Первым — трассировка запуска: отсчёт времени начинается до тяжёлых импортов
+from src.core.startup import trace
+
 import base64
 import threading
-import webview
-from src.desktop.utils import find_free_port, wait_for_server
-from src.api import create_app
+
+with trace.phase('imports'):
+    import webview
+    from src.desktop.boot import boot
+    from src.desktop.server import LocalServer
+    from src.desktop.splash import SPLASH_HTML
 
 
 class Api:
@@ -50,44 +55,17 @@ class Api:
             return {'success': False, 'error': str(e)}
 
 
-def run_server(app, port: int):
-    """Запуск Flask сервера"""
-    app.run(
-        host='127.0.0.1',
-        port=port,
-        debug=False,
-        use_reloader=False,
-        threaded=True
-    )
-
-
 def main():
     """Точка входа"""
-    # Создаём Flask приложение
-    app = create_app('desktop')
-
-    # Находим свободный порт
-    port = find_free_port()
-    print(f"Используем порт: {port}")
-
-    # Запускаем сервер в фоновом потоке
-    server_thread = threading.Thread(
-        target=run_server,
-        args=(app, port),
-        daemon=True
-    )
-    server_thread.start()
+    # Порт известен сразу: сокет привязан к порту 0, ОС выбрала свободный
+    server = LocalServer()
+    print(f"Используем порт: {server.port}")
 
-    # Ждём готовности сервера
-    if not wait_for_server(port, timeout=30):
-        print("Ошибка: сервер не запустился")
-        sys.exit(1)
-
-    # Создаём JS API и окно
+    # Окно создаётся сразу с заставкой, не дожидаясь сервера
     api = Api()
     window = webview.create_window(
         'UTMka - сервис для бизнеса и маркетологов',
-        f'http://127.0.0.1:{port}',
+        html=SPLASH_HTML,
         width=1200,
         height=900,
         resizable=True,
@@ -96,10 +74,30 @@ def main():
         js_api=api
     )
     api._window = window
+    trace.mark('window created')
+
+    def on_shown():
+        trace.mark('window shown')
+
+    def on_loaded():
+        # Загружено приложение (а не заставка) — запуск закончен, пишем logs/startup.log
+        if trace.finished or not (window.get_current_url() or '').startswith(server.url):
+            return
+        from src.core.config import get_data_dir
+        trace.mark('page loaded')
+        trace.write(get_data_dir() / 'logs' / 'startup.log')
+
+    window.events.shown += on_shown
+    window.events.loaded += on_loaded
+
+    threading.Thread(target=boot, args=(window, server), name='boot', daemon=True).start()
 
     # Запускаем GUI
     webview.start()
 
+    # Окно закрыто — останавливаем сервер (пул потоков waitress/cheroot)
+    server.shutdown()
+
 
 if __name__ == '__main__':
     main()
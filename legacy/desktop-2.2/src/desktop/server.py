@@ -0,0 +1,190 @@
+"""
+Локальный HTTP-сервер desktop-приложения
+
+Сокет привязывается один раз к порту 0 — свободный порт выбирает ОС,
+без перебора 5000..5100. Сокет начинает принимать соединения сразу
+после listen(), поэтому сервер готов, как только start() вернулся:
+окно переходит на приложение без опроса порта с паузами.
+
+WSGI-сервер выбирается настройкой SERVER_BACKEND: waitress или cheroot
+(фиксированный пул потоков, ограничение соединений, keep-alive) либо
+dev-сервер werkzeug (поток на каждое соединение) — если ни waitress,
+ни cheroot не установлены.
+"""
+import importlib.util
+import socket
+import threading
+from typing import Dict, Optional
+
+LOCAL_HOST = '127.0.0.1'
+
+# Порядок выбора для SERVER_BACKEND = 'auto'
+SERVER_BACKENDS = ('waitress', 'cheroot', 'werkzeug')
+
+
+def bind_local_socket(host: str = LOCAL_HOST, backlog: int = 128) -> socket.socket:
+    """Слушающий сокет на свободном порту (порт — sock.getsockname()[1])"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        # Принятые соединения наследуют TCP_NODELAY: мелкие JSON-ответы
+        # не ждут подтверждения предыдущего пакета (алгоритм Нейгла)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.bind((host, 0))
+        sock.listen(backlog)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class _WerkzeugBackend:
+    """Dev-сервер werkzeug: без пула, настройки потоков не применяются"""
+    name = 'werkzeug'
+
+    def __init__(self, app, sock: socket.socket, options: Dict[str, int]):
+        from werkzeug.serving import make_server
+
+        host, port = sock.getsockname()
+        self._server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+        # make_server работает с дубликатом дескриптора — исходный больше не нужен
+        sock.close()
+
+    def serve(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _WaitressBackend:
+    name = 'waitress'
+
+    def __init__(self, app, sock: socket.socket, options: Dict[str, int]):
+        from waitress.server import create_server
+
+        self._server = create_server(
+            app,
+            sockets=[sock],
+            threads=options['threads'],
+            connection_limit=options['connection_limit'],
+            channel_timeout=options['channel_timeout'],
+            ident='UTMka',
+        )
+
+    def serve(self):
+        self._server.run()
+        self._server.task_dispatcher.shutdown()
+
+    def stop(self):
+        # close() из другого потока закрывает сокеты под работающим циклом
+        # asyncore, и поток сервера падает с EBADF. Сокеты закрываются
+        # в самом цикле (через trigger) — карта соединений пустеет,
+        # и run() возвращается
+        from waitress import wasyncore
+
+        server = self._server
+        server.trigger.pull_trigger(lambda: wasyncore.close_all(server._map))
+
+
+class _CherootBackend:
+    name = 'cheroot'
+
+    def __init__(self, app, sock: socket.socket, options: Dict[str, int]):
+        from cheroot import wsgi
+
+        class PreboundServer(wsgi.Server):
+            # cheroot сам создаёт сокет в prepare(); подставляем уже привязанный
+            def bind(self, family, type, proto=0):
+                self.socket = sock
+                return sock
+
+        self._server = PreboundServer(
+            sock.getsockname(), app,
+            numthreads=options['threads'],
+            max=options['threads'],
+            timeout=options['channel_timeout'],
+            accepted_queue_size=options['connection_limit'],
+        )
+        self._server.prepare()
+
+    def serve(self):
+        self._server.serve()
+
+    def stop(self):
+        self._server.stop()
+
+
+_BACKEND_CLASSES = {
+    'waitress': _WaitressBackend,
+    'cheroot': _CherootBackend,
+    'werkzeug': _WerkzeugBackend,
+}
+
+
+def choose_backend(name: str = 'auto') -> str:
+    """
+    Имя WSGI-сервера по настройке с учётом установленных пакетов
+
+    'auto' — первый доступный из SERVER_BACKENDS. Если заданный сервер
+    не установлен, используется werkzeug.
+    """
+    candidates = SERVER_BACKENDS if name == 'auto' else (name,)
+    for candidate in candidates:
+        if candidate == 'werkzeug' or importlib.util.find_spec(candidate) is not None:
+            return candidate
+    print(f"WSGI-сервер {name} не установлен, используется dev-сервер werkzeug")
+    return 'werkzeug'
+
+
+class LocalServer:
+    """
+    Flask-приложение на заранее привязанном сокете в фоновом потоке
+
+    Usage:
+        server = LocalServer()          # порт известен сразу
+        ...                             # окно можно создавать параллельно
+        server.start(app)               # после возврата можно открывать server.url
+    """
+
+    def __init__(self, host: str = LOCAL_HOST):
+        self.host = host
+        self.socket = bind_local_socket(host)
+        self.port = self.socket.getsockname()[1]
+        self.backend: Optional[str] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def start(self, app, backend: Optional[str] = None):
+        """
+        Запускает сервер в daemon-потоке
+
+        Сервер и его лимиты берутся из конфигурации приложения:
+        SERVER_BACKEND, SERVER_THREADS, SERVER_CONNECTION_LIMIT,
+        SERVER_CHANNEL_TIMEOUT. backend переопределяет SERVER_BACKEND.
+        """
+        config = app.config
+        self.backend = choose_backend(backend or config.get('SERVER_BACKEND', 'auto'))
+        options = {
+            'threads': config.get('SERVER_THREADS', 8),
+            'connection_limit': config.get('SERVER_CONNECTION_LIMIT', 100),
+            'channel_timeout': config.get('SERVER_CHANNEL_TIMEOUT', 120),
+        }
+        self._server = _BACKEND_CLASSES[self.backend](app, self.socket, options)
+        self._thread = threading.Thread(
+            target=self._server.serve, name='local-server', daemon=True
+        )
+        self._thread.start()
+
+    def shutdown(self, timeout: float = 10):
+        """Останавливает сервер и ждёт завершения его потока"""
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
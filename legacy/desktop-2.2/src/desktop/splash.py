@@ -0,0 +1,46 @@
+"""
+Заставка окна на время запуска сервера
+
+Окно создаётся сразу с этой страницей, а когда сервер готов,
+переходит на приложение. Стили встроены: сервера ещё нет.
+"""
+from html import escape
+
+_PAGE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<style>
+  html, body {{ height: 100%; margin: 0; }}
+  body {{
+    display: flex; flex-direction: column; align-items: center; justify-content: center;
+    background: #0B1120; color: #e2e8f0;
+    font: 15px -apple-system, "Segoe UI", Roboto, sans-serif;
+  }}
+  @media (prefers-color-scheme: light) {{
+    body {{ background: #ffffff; color: #1e293b; }}
+  }}
+  h1 {{ font-size: 28px; font-weight: 600; margin: 0 0 12px; letter-spacing: 0.02em; }}
+  .spinner {{
+    width: 22px; height: 22px; border-radius: 50%;
+    border: 3px solid rgba(99, 102, 241, 0.25); border-top-color: #6366f1;
+    animation: spin 0.8s linear infinite;
+  }}
+  @keyframes spin {{ to {{ transform: rotate(360deg); }} }}
+  pre {{ max-width: 80%; white-space: pre-wrap; opacity: 0.8; }}
+</style>
+</head>
+<body>
+  <h1>UTMka</h1>
+  {body}
+</body>
+</html>"""
+
+SPLASH_HTML = _PAGE.format(body='<div class="spinner"></div>')
+
+
+def error_html(message: str) -> str:
+    """Страница ошибки запуска (вместо заставки)"""
+    return _PAGE.format(
+        body=f'<p>Не удалось запустить приложение</p><pre>{escape(message)}</pre>'
+    )
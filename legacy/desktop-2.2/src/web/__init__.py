@@ -0,0 +1,3 @@
+"""
+Web-версия UTMka (production-сервер)
+"""
@@ -0,0 +1,168 @@
+"""
+Production web-сервер
+
+gunicorn в режиме pre-fork: мастер-процесс и WEB_WORKERS воркеров
+с WEB_THREADS потоками (gthread). Приложение не загружается в мастере
+(preload_app=False) — каждый воркер сам вызывает create_app и получает
+собственный engine и пул соединений; соединения, открытые до fork,
+между процессами не делятся.
+
+Миграции схемы и удаление старых событий журнала /sync выполняются
+один раз в мастере до запуска воркеров. create_app в воркерах видит
+актуальную версию схемы и ограничивается одним SELECT; при ручном
+запуске без мастера (gunicorn 'src.api:create_app()') гонку между
+воркерами исключает migration_lock.
+
+Перезапуск без простоя — SIGHUP мастеру: новые воркеры стартуют, старые
+дорабатывают текущие запросы (до WEB_GRACEFUL_TIMEOUT). Воркер также
+перезапускается после WEB_MAX_REQUESTS запросов.
+
+На Windows gunicorn не работает — там приложение запускается
+в одном процессе под waitress.
+"""
+import importlib.util
+import os
+from typing import Dict, Optional
+
+from src.core.config import get_config
+
+
+def _standalone_engine(config):
+    """Engine без пула вне приложения (в мастере, до fork)"""
+    import sqlalchemy
+    from sqlalchemy.pool import NullPool
+
+    from src.core.database import install_sqlite_pragmas
+
+    engine = sqlalchemy.create_engine(
+        config.SQLALCHEMY_DATABASE_URI,
+        poolclass=NullPool,
+        connect_args=config.SQLALCHEMY_ENGINE_OPTIONS.get('connect_args', {}),
+    )
+    # journal_mode=WAL сохраняется в файле SQLite — воркеры стартуют уже с ним
+    install_sqlite_pragmas(engine, getattr(config, 'SQLITE_PRAGMAS', None))
+    return engine
+
+
+def migrate(config_name: str) -> list:
+    """
+    Применяет миграции отдельным engine без пула (в мастере, до fork)
+
+    Returns:
+        Номера применённых миграций
+    """
+    from src.core.migrations import run_migrations
+
+    engine = _standalone_engine(get_config(config_name))
+    try:
+        return run_migrations(engine)
+    finally:
+        engine.dispose()
+
+
+def prune(config_name: str) -> int:
+    """
+    Удаляет старые события журнала изменений (в мастере, после migrate)
+
+    Returns:
+        Число удалённых событий
+    """
+    from sqlalchemy.orm import Session
+
+    from src.core.changes import prune_change_log
+
+    config = get_config(config_name)
+    engine = _standalone_engine(config)
+    try:
+        with Session(engine) as session:
+            return prune_change_log(getattr(config, 'CHANGE_LOG_RETENTION_DAYS', 30), session)
+    finally:
+        engine.dispose()
+
+
+def gunicorn_options(config_name: str, **overrides) -> Dict[str, object]:
+    """Настройки gunicorn из WEB_* конфигурации (overrides — непустые значения поверх)"""
+    config = get_config(config_name)
+    options = {
+        'bind': config.WEB_BIND,
+        'workers': config.WEB_WORKERS,
+        'threads': config.WEB_THREADS,
+        'worker_class': 'gthread',
+        'timeout': config.WEB_TIMEOUT,
+        'graceful_timeout': config.WEB_GRACEFUL_TIMEOUT,
+        'max_requests': config.WEB_MAX_REQUESTS,
+        'max_requests_jitter': config.WEB_MAX_REQUESTS_JITTER,
+        'preload_app': False,
+        'proc_name': 'utmka-web',
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    return options
+
+
+def _on_starting(config_name: str):
+    def on_starting(server):
+        applied = migrate(config_name)
+        server.log.info('Schema migrations applied: %s', applied or 'none (up to date)')
+        server.log.info('Change log events pruned: %d', prune(config_name))
+    return on_starting
+
+
+def _worker_exit(server, worker):
+    """Закрывает соединения пула воркера до выхода процесса"""
+    app = getattr(worker, 'wsgi', None)
+    if app is None:
+        return
+    from src.core.models import db
+    with app.app_context():
+        db.engine.dispose()
+
+
+def run_gunicorn(config_name: str = 'production', **overrides):
+    from gunicorn.app.base import BaseApplication
+
+    class WebApplication(BaseApplication):
+        def load_config(self):
+            options = gunicorn_options(config_name, **overrides)
+            options['on_starting'] = _on_starting(config_name)
+            options['worker_exit'] = _worker_exit
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from src.api import create_app
+            return create_app(config_name)
+
+    WebApplication().run()
+
+
+def run_waitress(config_name: str = 'production', bind: Optional[str] = None,
+                 threads: Optional[int] = None, **ignored):
+    """Один процесс с пулом потоков (Windows или нет gunicorn)"""
+    from waitress import serve
+    from src.api import create_app
+
+    config = get_config(config_name)
+    migrate(config_name)
+    prune(config_name)
+    serve(
+        create_app(config_name),
+        listen=bind or config.WEB_BIND,
+        threads=threads or config.WEB_THREADS,
+        channel_timeout=config.WEB_TIMEOUT,
+        ident='UTMka',
+    )
+
+
+def run(config_name: str = 'production', **overrides):
+    """
+    Запускает web-сервер: gunicorn, если он доступен, иначе waitress
+
+    Args:
+        config_name: Конфигурация ('production' или 'web')
+        overrides: bind, workers, threads — поверх WEB_* из конфигурации
+    """
+    if os.name != 'nt' and importlib.util.find_spec('gunicorn') is not None:
+        run_gunicorn(config_name, **overrides)
+    else:
+        print("gunicorn недоступен — запуск в одном процессе под waitress")
+        run_waitress(config_name, **overrides)
@@ -0,0 +1,74 @@
+"""
+Бенчмарк пакетной сборки ссылок: build_many против build_utm_url в цикле
+
+Запуск из корня приложения:
+    python tests/bench/bench_build_many.py [--pages 2000] [--repeat 3]
+
+Декартово произведение посадочных страниц и 30 наборов UTM (как в
+кампании: 3 источника × 2 канала × 5 кампаний). Страницы генерируются
+детерминированно; перед замером результаты сравниваются построчно.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.services import UTMService  # noqa: E402
+
+
+def make_pages(count: int) -> list:
+    pages = []
+    for i in range(count):
+        if i % 3 == 0:
+            pages.append(f'https://shop.example.ru/catalog/item-{i}?ref=home&color=красный')
+        elif i % 3 == 1:
+            pages.append(f'example.ru/p/{i}#top')
+        else:
+            pages.append(f'https://a.example.ru/l/{i}?utm_source=old&page=2')
+    return pages
+
+
+def make_sets() -> list:
+    return [
+        {'utm_source': source, 'utm_medium': medium, 'utm_campaign': f' кампания {campaign} ',
+         'utm_content': '', 'utm_term': None}
+        for source in ('yandex', 'google', 'vk')
+        for medium in ('cpc', 'email')
+        for campaign in range(5)
+    ]
+
+
+def best_of(func, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages, sets = make_pages(args.pages), make_sets()
+    loop_seconds, expected = best_of(
+        lambda: [UTMService.build_utm_url(page, utm) for page in pages for utm in sets], args.repeat
+    )
+    batch_seconds, result = best_of(lambda: UTMService.build_many(pages, sets), args.repeat)
+    if result != expected:
+        sys.exit('build_many расходится с build_utm_url')
+
+    total = len(expected)
+    print(f'{len(pages)} страниц × {len(sets)} наборов = {total} ссылок, лучший из {args.repeat}')
+    print(f'build_utm_url в цикле  {loop_seconds * 1000:8.1f} ms  {total / loop_seconds:10.0f} ссылок/с')
+    print(f'build_many             {batch_seconds * 1000:8.1f} ms  {total / batch_seconds:10.0f} ссылок/с')
+    print(f'ускорение: {loop_seconds / batch_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
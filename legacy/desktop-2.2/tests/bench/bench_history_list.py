@@ -0,0 +1,81 @@
+"""
+Бенчмарк списка истории: ORM-объекты + to_dict против проекции колонок
+
+Запуск из корня приложения:
+    python tests/bench/bench_history_list.py [--rows 10000] [--repeat 5]
+
+Сравниваются прежний путь (query.all() → to_dict() → стандартный JSON)
+и нынешний (project() → rows_to_dicts() → провайдер приложения) на
+временной базе; перед замером проверяется, что JSON одинаковый.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from flask import jsonify  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from src.api import create_app  # noqa: E402
+from src.core.config import DesktopConfig  # noqa: E402
+from src.core.models import History  # noqa: E402
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # URI базы вычисляется при импорте config — задаём его явно
+    directory = Path(tempfile.mkdtemp(prefix='utmka-bench-'))
+    os.chdir(directory)
+    DesktopConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{directory / "bench.db"}'
+    app = create_app('desktop')
+    app.test_client().post('/import_history', json=[
+        {'user_email': 'bench@example.com', 'tag_name': 'promo',
+         'url': f'https://shop.example.ru/catalog/{i}?utm_source=yandex&utm_medium=cpc&utm_campaign=c{i % 30}'}
+        for i in range(args.rows)
+    ])
+    provider, stdlib = app.json, DefaultJSONProvider(app)
+
+    with app.test_request_context():
+        query = History.query.filter_by(user_email='bench@example.com')\
+                             .order_by(History.created_at.desc()).limit(args.rows)
+
+        def orm_to_dict():
+            app.json = stdlib
+            return jsonify([item.to_dict() for item in query.all()])
+
+        def projection():
+            app.json = provider
+            return jsonify(History.rows_to_dicts(History.project(query).all()))
+
+        if json.loads(orm_to_dict().get_data()) != json.loads(projection().get_data()):
+            sys.exit('ответы расходятся')
+
+        old = best_of(orm_to_dict, args.repeat)
+        new = best_of(projection, args.repeat)
+
+    print(f'{args.rows} записей, лучший из {args.repeat}, провайдер: {type(provider).__name__}')
+    print(f'ORM + to_dict + stdlib     {old * 1000:8.1f} ms')
+    print(f'проекция + rows_to_dicts   {new * 1000:8.1f} ms')
+    print(f'ускорение: {old / new:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
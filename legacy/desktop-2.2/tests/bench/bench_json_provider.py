@@ -0,0 +1,87 @@
+"""
+Бенчмарк JSON-провайдера: orjson против стандартного на списке истории
+
+Запуск из корня приложения:
+    python tests/bench/bench_json_provider.py [--rows 5000] [--repeat 20]
+
+Данные генерируются с фиксированным seed, поэтому прогоны сравнимы.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from src.api.json_provider import OrjsonProvider, orjson  # noqa: E402
+
+
+def make_rows(count: int, tags: list, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        source = rng.choice(['google', 'yandex', 'vk', 'telegram'])
+        rows.append({
+            'id': i,
+            'user_email': 'bench@example.com',
+            'base_url': 'https://example.com/landing',
+            'full_url': f'https://example.com/landing?utm_source={source}&utm_campaign=c{i % 50}',
+            'utm_source': source,
+            'utm_medium': rng.choice(['cpc', 'email', 'social']),
+            'utm_campaign': f'c{i % 50}',
+            'utm_content': None,
+            'utm_term': None,
+            'short_url': None,
+            'tag_name': rng.choice(tags),
+            'tag_color': '#ff0000',
+            # Как rows_to_dicts: дата уже строкой ISO
+            'created_at': (started + timedelta(minutes=i)).isoformat(),
+        })
+    return rows
+
+
+def measure(label: str, func, repeat: int) -> float:
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    best = min(timings) * 1000
+    print(f'{label:32} best {best:8.2f} ms  median {sorted(timings)[len(timings) // 2] * 1000:8.2f} ms')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if orjson is None:
+        sys.exit('orjson не установлен')
+
+    app = Flask(__name__)
+    print(f'{args.rows} строк истории, лучший из {args.repeat} прогонов')
+    datasets = {
+        'ASCII-теги': [None, 'promo', 'sale'],
+        'кириллические теги': [None, 'Акция', 'promo'],
+    }
+    with app.app_context():
+        for title, tags in datasets.items():
+            rows = make_rows(args.rows, tags)
+            # Прежний ответ приложения — stdlib с экранированием не-ASCII
+            stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+            print(f'\n{title}:')
+            baseline = measure('stdlib response, ensure_ascii', lambda: stdlib.response(rows), args.repeat)
+            best = measure('orjson response, utf-8', lambda: fast.response(rows), args.repeat)
+            print(f'ускорение: {baseline / best:.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Бенчмарк одиночных изменений истории: маршрут целиком, до и после
+
+Запуск из корня приложения:
+    python tests/bench/bench_mutations.py [--rows 3000] [--requests 500]
+
+PUT /history/<id>/tag, PUT /history/<id>/short_url и DELETE /history/<id>
+вызываются через test client — с разбором запроса, журналом изменений
+(change_log), версией данных для ETag и commit. Для сравнения в приложение
+добавляются прежние маршруты (/baseline/...): get_or_404, изменение
+ORM-объекта, commit, без журнала и версий. Печатаются задержка и число
+SQL-запросов на операцию, а для нового маршрута — сами запросы.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from flask import Blueprint, jsonify, request  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from src.api import create_app  # noqa: E402
+from src.core.config import DesktopConfig  # noqa: E402
+from src.core.models import db, History  # noqa: E402
+
+EMAIL = 'bench@example.com'
+
+baseline_bp = Blueprint('baseline', __name__, url_prefix='/baseline')
+
+
+@baseline_bp.route('/history/<int:item_id>', methods=['DELETE'])
+def baseline_delete(item_id):
+    history = History.query.get_or_404(item_id)
+    db.session.delete(history)
+    db.session.commit()
+    return jsonify({'success': True})
+
+
+@baseline_bp.route('/history/<int:item_id>/tag', methods=['PUT'])
+def baseline_tag(item_id):
+    data = request.json
+    history = History.query.get_or_404(item_id)
+    history.tag_name = data.get('tag_name', '')
+    history.tag_color = data.get('tag_color', '')
+    db.session.commit()
+    return jsonify({'success': True})
+
+
+@baseline_bp.route('/history/<int:item_id>/short_url', methods=['PUT'])
+def baseline_short_url(item_id):
+    history = History.query.get_or_404(item_id)
+    history.short_url = request.json.get('short_url')
+    db.session.commit()
+    return jsonify({'success': True})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    count = min(args.requests, (args.rows - 1) // 6)
+
+    # URI базы вычисляется при импорте config — задаём его явно
+    directory = Path(tempfile.mkdtemp(prefix='utmka-bench-'))
+    os.chdir(directory)
+    DesktopConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{directory / "bench.db"}'
+    app = create_app('desktop')
+    app.register_blueprint(baseline_bp)
+    client = app.test_client()
+    client.post('/import_history', json=[
+        {'user_email': EMAIL, 'url': f'https://shop.example.ru/p{i}?utm_source=yandex'} for i in range(args.rows)
+    ])
+    statements = []
+    with app.app_context():
+        ids = db.session.execute(db.select(History.id).order_by(History.id)).scalars().all()
+        event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, sql, *a: statements.append(sql))
+
+    def route(method, path, **kwargs):
+        def call(item_id):
+            response = client.open(path.format(item_id), method=method, **kwargs)
+            assert response.status_code == 200, response.get_data()
+        return call
+
+    tag = {'json': {'tag_name': 'promo', 'tag_color': '#f00'}}
+    short_url = {'json': {'short_url': 'https://s.io/x'}}
+    cases = [
+        ('tag', route('PUT', '/baseline/history/{}/tag', **tag),
+         route('PUT', f'/history/{{}}/tag?user_email={EMAIL}', **tag)),
+        ('short_url', route('PUT', '/baseline/history/{}/short_url', **short_url),
+         route('PUT', f'/history/{{}}/short_url?user_email={EMAIL}', **short_url)),
+        ('delete', route('DELETE', '/baseline/history/{}'),
+         route('DELETE', f'/history/{{}}?user_email={EMAIL}')),
+    ]
+
+    def measure(func, batch):
+        func(batch[0])  # прогрев: кэш запросов SQLAlchemy, строка версии
+        del statements[:]
+        started = time.perf_counter()
+        for item_id in batch[1:]:
+            func(item_id)
+        return (time.perf_counter() - started) / (len(batch) - 1) * 1000, len(statements) / (len(batch) - 1)
+
+    print(f'{count} запросов каждого вида через test client')
+    batches = iter([ids[k * count:(k + 1) * count] for k in range(6)])
+    for name, baseline, current in cases:
+        baseline_ms, baseline_sql = measure(baseline, next(batches))
+        current_ms, current_sql = measure(current, next(batches))
+        print(f'{name:10} прежний маршрут {baseline_ms:5.2f} ms, {baseline_sql:3.1f} SQL'
+              f' | маршрут с журналом {current_ms:5.2f} ms, {current_sql:3.1f} SQL')
+
+    del statements[:]
+    cases[-1][2](ids[-1])
+    print('\nSQL маршрута DELETE /history/<id>:')
+    for sql in statements:
+        print('  ' + ' '.join(sql.split())[:100])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Бенчмарк PRAGMA SQLite: конкурентные чтение и запись с WAL и без
+
+Запуск из корня приложения:
+    python tests/bench/bench_sqlite_pragmas.py [--rows 5000] [--seconds 5] [--readers 4] [--writers 2]
+
+Для каждого профиля — своя временная база со схемой приложения
+(create_app) и rows записями истории. Читатели и писатели — отдельные
+процессы, каждый со своим соединением sqlite3 и PRAGMA профиля, так что
+измеряется конкуренция за блокировки файла базы, а не за GIL. Читатель
+выполняет запрос первой страницы GET /history, писатель — транзакцию
+POST /history (запись, событие журнала, версия данных). Печатаются
+p50/p99 задержки и число операций; «locked» — операции, не дождавшиеся
+блокировки за busy_timeout.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.api import create_app  # noqa: E402
+from src.core.config import Config, DesktopConfig  # noqa: E402
+from src.core.models import db  # noqa: E402
+
+PROFILES = {
+    'rollback journal': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'WAL (Config)': Config.SQLITE_PRAGMAS,
+}
+
+EMAIL = 'bench@example.com'
+
+READ_SQL = (
+    'SELECT id, base_url, full_url, utm_source, utm_medium, utm_campaign, utm_content, utm_term, '
+    'short_url, tag_name, tag_color, created_at FROM history_new '
+    'WHERE user_email = ? ORDER BY created_at DESC, id DESC LIMIT 100'
+)
+WRITE_SQL = [
+    ('INSERT INTO history_new (user_email, base_url, full_url, utm_source, created_at) '
+     'VALUES (?, ?, ?, ?, ?)',
+     lambda now: (EMAIL, 'https://shop.example.ru/', 'https://shop.example.ru/?utm_source=write', 'write', now)),
+    ("INSERT INTO change_log (user_email, scope, op, item_id, created_at) VALUES (?, 'history', 'insert', "
+     'last_insert_rowid(), ?)',
+     lambda now: (EMAIL, now)),
+    ("UPDATE change_versions SET version = version + 1, updated_at = ? WHERE user_email = ? AND scope = 'history'",
+     lambda now: (now, EMAIL)),
+]
+
+BUSY_TIMEOUT = 5.0
+
+
+def percentile(values: list, share: float) -> float:
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))] * 1000
+
+
+def connect(database: str, pragmas: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(database, timeout=BUSY_TIMEOUT, isolation_level=None)
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name}={value}')
+    return conn
+
+
+def worker(kind: str, database: str, pragmas: dict, start_at: float, stop_at: float, results):
+    """Процесс читателя или писателя: (kind, задержки, число locked)"""
+    conn = connect(database, pragmas)
+    timings, locked = [], 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    while time.time() < stop_at:
+        started = time.perf_counter()
+        try:
+            if kind == 'read':
+                conn.execute(READ_SQL, (EMAIL,)).fetchall()
+            else:
+                now = datetime.utcnow().isoformat(sep=' ')
+                conn.execute('BEGIN IMMEDIATE')
+                for sql, params in WRITE_SQL:
+                    conn.execute(sql, params(now))
+                conn.execute('COMMIT')
+        except sqlite3.OperationalError:
+            locked += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            continue
+        timings.append(time.perf_counter() - started)
+    conn.close()
+    results.put((kind, timings, locked))
+
+
+def prepare(pragmas: dict, rows: int) -> str:
+    """Временная база со схемой приложения и rows записями истории"""
+    # URI базы вычисляется при импорте config — задаём его явно
+    directory = Path(tempfile.mkdtemp(prefix='utmka-bench-'))
+    os.chdir(directory)
+    database = directory / 'bench.db'
+    DesktopConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+    DesktopConfig.SQLITE_PRAGMAS = pragmas
+    app = create_app('desktop')
+    app.test_client().post('/import_history', json=[
+        {'user_email': EMAIL, 'url': f'https://shop.example.ru/p{i}?utm_source=yandex'} for i in range(rows)
+    ])
+    with app.app_context():
+        db.engine.dispose()
+    return str(database)
+
+
+def run(title: str, pragmas: dict, args) -> None:
+    database = prepare(pragmas, args.rows)
+    results = multiprocessing.Queue()
+    start_at = time.time() + 1.0  # все процессы успевают открыть соединения
+    stop_at = start_at + args.seconds
+    processes = [
+        multiprocessing.Process(target=worker, args=(kind, database, pragmas, start_at, stop_at, results))
+        for kind in ['read'] * args.readers + ['write'] * args.writers
+    ]
+    for process in processes:
+        process.start()
+    collected = {'read': ([], 0), 'write': ([], 0)}
+    for _ in processes:
+        kind, timings, locked = results.get()
+        collected[kind] = (collected[kind][0] + timings, collected[kind][1] + locked)
+    for process in processes:
+        process.join()
+
+    (reads, read_locked), (writes, write_locked) = collected['read'], collected['write']
+    print(f'{title:17} чтение n={len(reads):6d} p50={percentile(reads, .5):6.2f} ms '
+          f'p99={percentile(reads, .99):7.2f} ms locked={read_locked}'
+          f' | запись n={len(writes):5d} p50={percentile(writes, .5):6.2f} ms '
+          f'p99={percentile(writes, .99):7.2f} ms locked={write_locked}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    args = parser.parse_args()
+
+    print(f'{args.readers} читателей и {args.writers} писателей — отдельные процессы, {args.seconds:g} с')
+    for title, pragmas in PROFILES.items():
+        run(title, pragmas, args)
+
+
+if __name__ == '__main__':
+    main()
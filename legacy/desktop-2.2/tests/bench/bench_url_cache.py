@@ -0,0 +1,60 @@
+"""
+Бенчмарк LRU-кэшей разбора URL (extract_base_url + parse_utm_params)
+
+Запуск из корня приложения:
+    python tests/bench/bench_url_cache.py [--rows 50000] [--pages 200] [--cache-size 4096]
+
+Поток ссылок как при импорте: rows записей по pages посадочным страницам
+(страницы повторяются, порядок — фиксированный seed). Сравнивается
+разбор без кэша (configure_cache(0)) и с кэшем заданного размера.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.services import UTMService  # noqa: E402
+
+
+def make_stream(rows: int, pages: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    urls = [
+        f'https://shop.example.ru/catalog/{i}?utm_source=yandex&utm_medium=cpc&utm_campaign=c{i % 20}&yclid={i * 7919}'
+        for i in range(pages)
+    ]
+    return [rng.choice(urls) for _ in range(rows)]
+
+
+def run(stream: list, cache_size: int) -> float:
+    UTMService.configure_cache(cache_size)
+    started = time.perf_counter()
+    for url in stream:
+        UTMService.extract_base_url(url)
+        UTMService.parse_utm_params(url)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--cache-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    stream = make_stream(args.rows, args.pages)
+    uncached = run(stream, 0)
+    cached = run(stream, args.cache_size)
+    stats = UTMService.cache_stats()
+
+    print(f'{args.rows} ссылок по {args.pages} страницам')
+    print(f'без кэша         {uncached * 1000:8.1f} ms  {uncached / args.rows * 1e6:6.2f} мкс/ссылку')
+    print(f'кэш {args.cache_size:<12} {cached * 1000:8.1f} ms  {cached / args.rows * 1e6:6.2f} мкс/ссылку')
+    print(f'ускорение: {uncached / cached:.1f}x, попадания: '
+          + ', '.join(f'{name} {info["hit_rate"]:.1%}' for name, info in stats.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Бенчмарк разбора UTM-меток: urlparse + parse_qs против однопроходного скана
+
+Запуск из корня приложения:
+    python tests/bench/bench_utm_params.py [--urls 20000] [--repeat 5] [--corpus urls.txt]
+
+Корпус по умолчанию генерируется с фиксированным seed: рекламные ссылки
+с трекинговым «шумом» до и после UTM-меток. --corpus читает свои URL
+(по одному на строку). Перед замером проверяется, что результаты обоих
+разборов совпадают на всём корпусе.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.services import UTMService  # noqa: E402
+
+NOISE_KEYS = [
+    'gclid', 'fbclid', 'yclid', 'ysclid', 'msclkid', '_openstat', 'from', 'ref', 'p', 'sort',
+    'color', 'size', 'lang', 'sid', '_ga', '_gl', 'mc_cid', 'roistat', 'sub1', 'sub2',
+]
+
+UTM_TAILS = [
+    'utm_source=yandex&utm_medium=cpc&utm_campaign=%D0%BA%D0%B0%D0%BC%D0%BF+1&utm_content={ad_id}&utm_term={keyword}',
+    'utm_source=google&utm_medium=cpc&utm_campaign=spring_sale',
+    'utm_source=vk&utm_medium=social',
+    '',
+]
+
+
+def make_corpus(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+
+    def noise() -> str:
+        return '&'.join(f'{key}={rng.randint(0, 10 ** 12)}' for key in rng.sample(NOISE_KEYS, rng.randint(0, 10)))
+
+    corpus = []
+    for i in range(count):
+        parts = [part for part in (noise(), rng.choice(UTM_TAILS), noise()) if part]
+        fragment = '#reviews' if i % 7 == 0 else ''
+        corpus.append(f'https://shop.example.ru/catalog/{i}?{"&".join(parts)}{fragment}')
+    return corpus
+
+
+def measure(label: str, func, corpus: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for url in corpus:
+            func(url)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f'{label:24} {best * 1000:8.1f} ms  {best / len(corpus) * 1e6:6.2f} мкс/URL')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--urls', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--corpus', type=Path, help='файл с URL, по одному на строку')
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = [line.rstrip('\n') for line in args.corpus.open(encoding='utf-8') if line.strip()]
+    else:
+        corpus = make_corpus(args.urls)
+
+    mismatches = [url for url in corpus
+                  if UTMService._scan_utm_params(url) != UTMService._parse_utm_params_full(url)]
+    if mismatches:
+        sys.exit(f'результаты расходятся на {len(mismatches)} URL, например: {mismatches[0]}')
+
+    print(f'{len(corpus)} URL, лучший из {args.repeat} прогонов')
+    full = measure('urlparse + parse_qs', UTMService._parse_utm_params_full, corpus, args.repeat)
+    scan = measure('скан без кэша', UTMService._scan_utm_params, corpus, args.repeat)
+    print(f'ускорение скана: {full / scan:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
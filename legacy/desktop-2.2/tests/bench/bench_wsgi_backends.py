@@ -0,0 +1,123 @@
+"""
+Нагрузочный бенчмарк WSGI-серверов desktop-бэкенда (LocalServer)
+
+Запуск из корня приложения:
+    python tests/bench/bench_wsgi_backends.py [--clients 4 16 48] [--seconds 5] [--interval 0.1]
+
+Каждый клиент — поток с keep-alive соединением, который опрашивает
+маршруты UI (версия, страница истории, шаблоны, синхронизация) с паузой
+interval, как открытые окна и вкладки. Для каждого установленного
+сервера печатаются p50/p95/p99 задержки, ошибки и число потоков сервера.
+"""
+import argparse
+import http.client
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.api import create_app  # noqa: E402
+from src.core.config import DesktopConfig  # noqa: E402
+from src.desktop.server import LocalServer, choose_backend  # noqa: E402
+
+EMAIL = 'bench@example.com'
+PATHS = [
+    '/api/version',
+    f'/history?user_email={EMAIL}&limit=100',
+    f'/templates?user_email={EMAIL}',
+    f'/sync?user_email={EMAIL}&since=0&limit=100',
+]
+
+
+def percentile(values: list, share: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * share))] * 1000
+
+
+def run(app, backend: str, clients: int, seconds: float, interval: float):
+    base_threads = threading.active_count()
+    server = LocalServer()
+    server.start(app, backend=backend)
+    server.wait()
+
+    latencies, errors, peak = [], [0], [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def connect():
+        return http.client.HTTPConnection('127.0.0.1', server.port, timeout=30)
+
+    def client(offset: int):
+        conn, own = connect(), []
+        request_number = offset
+        while time.perf_counter() < stop:
+            path = PATHS[request_number % len(PATHS)]
+            request_number += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[0] += 1
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    conn = connect()
+            except (OSError, http.client.HTTPException):
+                errors[0] += 1
+                conn.close()
+                conn = connect()
+            own.append(time.perf_counter() - started)
+            peak[0] = max(peak[0], threading.active_count())
+            time.sleep(interval)
+        conn.close()
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    latencies.sort()
+    print(f'{backend:9} клиентов={clients:3d} запросов={len(latencies):6d}'
+          f' rps={len(latencies) / seconds:6.0f} p50={percentile(latencies, .5):6.1f} ms'
+          f' p95={percentile(latencies, .95):6.1f} ms p99={percentile(latencies, .99):6.1f} ms'
+          f' ошибок={errors[0]} потоков сервера={max(0, peak[0] - clients - base_threads)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, nargs='+', default=[4, 16, 48])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--interval', type=float, default=0.1, help='пауза клиента между запросами, сек')
+    parser.add_argument('--backends', nargs='+', default=['werkzeug', 'waitress', 'cheroot'])
+    args = parser.parse_args()
+
+    # URI базы вычисляется при импорте config — задаём его явно
+    directory = Path(tempfile.mkdtemp(prefix='utmka-bench-'))
+    os.chdir(directory)
+    DesktopConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{directory / "bench.db"}'
+    logging.disable(logging.CRITICAL)  # журнал запросов dev-сервера
+    app = create_app('desktop')
+    client = app.test_client()
+    client.post('/import_history', json=[
+        {'user_email': EMAIL, 'url': f'https://shop.example.ru/p{i}?utm_source=yandex&utm_medium=cpc'}
+        for i in range(2000)
+    ])
+    client.post('/templates', json=[{'user_email': EMAIL, 'name': f'Шаблон {i}', 'utm_source': 'vk'} for i in range(20)])
+
+    backends = [name for name in args.backends if choose_backend(name) == name]
+    for clients in args.clients:
+        for backend in backends:
+            run(app, backend, clients, args.seconds, args.interval)
+
+
+if __name__ == '__main__':
+    main()
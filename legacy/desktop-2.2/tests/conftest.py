@@ -0,0 +1,78 @@
+"""
+Общие фикстуры: приложение на временной SQLite-базе, локальный HTTP-сервер
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.api import create_app
+from src.core.config import DevelopmentConfig
+from src.core.models import db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # В dev-режиме папка данных — текущая директория
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(DevelopmentConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    app = create_app('development')
+    app.config['TESTING'] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def add_history(client):
+    """Добавляет запись через POST /history и возвращает её id"""
+    def add(url='https://example.com/?utm_source=google&utm_medium=cpc', user_email='a@test.ru', **extra):
+        response = client.post('/history', json={'url': url, 'user_email': user_email, **extra})
+        assert response.status_code == 200
+        return response.json['id']
+    return add
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(self)
+        self.server.handle_get(self)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """
+    Локальный HTTP-сервер вместо GitHub и хранилища релизов
+
+    Тест задаёт server.handle_get(request) — обработчик GET; принятые
+    запросы копятся в server.requests, адрес — server.url(path).
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    server.requests = []
+    server.url = lambda path='/': f'http://127.0.0.1:{server.server_port}{path}'
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def updater(tmp_path, monkeypatch):
+    """src.core.updater с папкой данных во временной директории и чистым состоянием"""
+    from src.core import updater as module
+    monkeypatch.chdir(tmp_path)
+    for name in ('_check_thread', '_check_result', '_download_job', '_installer_path'):
+        monkeypatch.setattr(module, name, None)
+    return module
@@ -0,0 +1,143 @@
+"""
+Статика с хешами в именах: сборка, манифест и маршрут /assets/<path>
+"""
+import gzip
+import json
+
+import pytest
+
+from src import api
+from src.core import assets
+from src.core.config import DevelopmentConfig
+
+INDEX = '''<html><head>
+<link rel="stylesheet" href="css/main.css">
+<link rel="stylesheet" href="https://cdn.example.com/lib.css">
+<script src="js/icons.js" defer></script>
+</head><body><script type="module" src="./js/app.js"></script></body></html>
+'''
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    root = tmp_path / 'frontend'
+    (root / 'js').mkdir(parents=True)
+    (root / 'css').mkdir()
+    (root / 'index.html').write_text(INDEX, encoding='utf-8')
+    (root / 'css/main.css').write_text('body { color: #111; }\n' * 100)
+    (root / 'js/icons.js').write_text('window.icons = {};\n')
+    (root / 'js/utils.js').write_text('export const answer = 42;\n' * 100)
+    (root / 'js/app.js').write_text("import { answer } from './utils.js';\nconsole.log(answer);\n")
+    return root
+
+
+@pytest.fixture
+def served_frontend(frontend, monkeypatch):
+    """Приложение берёт статику из временной frontend/ — фикстура идёт до app"""
+    monkeypatch.setattr(api, 'get_resource_path', lambda relative_path: str(frontend))
+    monkeypatch.setattr(DevelopmentConfig, 'FINGERPRINTED_ASSETS', True)
+    return frontend
+
+
+@pytest.fixture
+def built_frontend(served_frontend):
+    """Собранная статика: манифест читается при создании приложения"""
+    return assets.build_assets(served_frontend)
+
+
+def test_build_manifest(frontend):
+    manifest = assets.build_assets(frontend)
+    assert set(manifest) == {'js/app.js', 'js/utils.js', 'js/icons.js', 'css/main.css'}
+    for source, target in manifest.items():
+        stem, ext = source.rsplit('.', 1)
+        assert target.startswith(f'assets/{stem}.') and target.endswith(f'.{ext}')
+        built = frontend / target
+        assert gzip.decompress(built.with_name(built.name + '.gz').read_bytes()) == built.read_bytes()
+
+    saved = json.loads((frontend / 'assets/manifest.json').read_text(encoding='utf-8'))
+    assert saved == {'files': manifest}
+    # Повторная сборка без изменений даёт те же имена
+    assert assets.build_assets(frontend) == manifest
+
+
+def test_build_rewrites_references(frontend):
+    manifest = assets.build_assets(frontend)
+    index = (frontend / 'assets/index.html').read_text(encoding='utf-8')
+    assert f'href="{manifest["css/main.css"]}"' in index
+    assert f'src="{manifest["js/app.js"]}"' in index
+    assert f'src="{manifest["js/icons.js"]}"' in index
+    assert 'href="https://cdn.example.com/lib.css"' in index
+
+    app_js = (frontend / manifest['js/app.js']).read_text(encoding='utf-8')
+    utils_name = manifest['js/utils.js'].rsplit('/', 1)[1]
+    assert f"from './{utils_name}'" in app_js
+
+
+def test_dependency_change_renames_importer(frontend):
+    before = assets.build_assets(frontend)
+    (frontend / 'js/utils.js').write_text('export const answer = 43;\n')
+    after = assets.build_assets(frontend)
+    assert after['js/utils.js'] != before['js/utils.js']
+    # Импорт в app.js указывает на новое имя — меняется и хеш app.js
+    assert after['js/app.js'] != before['js/app.js']
+    assert after['js/icons.js'] == before['js/icons.js']
+    assert not (frontend / before['js/utils.js']).exists()
+
+
+def test_store_without_manifest(frontend):
+    assert assets.AssetStore.load(frontend) is None
+
+
+def test_store_reads_once(frontend, monkeypatch):
+    manifest = assets.build_assets(frontend)
+    store = assets.AssetStore.load(frontend)
+    rel_path = manifest['js/utils.js'].split('/', 1)[1]
+    content, encoding = store.get(rel_path, {'gzip': 1, 'br': 0})
+    assert encoding == 'gzip'
+    plain, encoding = store.get(rel_path, {'gzip': 0, 'br': 0})
+    assert encoding is None
+    assert gzip.decompress(content) == plain == (frontend / manifest['js/utils.js']).read_bytes()
+
+    # Повторно файлы берутся из памяти
+    (frontend / manifest['js/utils.js']).unlink()
+    (frontend / manifest['js/utils.js']).with_suffix('.js.gz').unlink()
+    assert store.get(rel_path, {'gzip': 1, 'br': 0}) == (content, 'gzip')
+    assert store.get(rel_path, {'gzip': 0, 'br': 0}) == (plain, None)
+    # Исходные и прочие файлы вне сборки не отдаются
+    assert store.get('manifest.json', {'gzip': 0, 'br': 0}) is None
+    assert store.get('js/utils.js', {'gzip': 0, 'br': 0}) is None
+
+
+def test_hashed_asset_immutable(built_frontend, client):
+    manifest = built_frontend
+
+    response = client.get('/' + manifest['js/utils.js'], headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == f'public, max-age={assets.IMMUTABLE_MAX_AGE}, immutable'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/javascript'
+    assert 'Accept-Encoding' in response.vary
+
+    assert client.get('/assets/js/utils.js').status_code == 404
+    assert client.get('/assets/manifest.json').status_code == 404
+
+
+def test_index_revalidated(built_frontend, client):
+    manifest = built_frontend
+
+    response = client.get('/')
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert manifest['js/app.js'] in response.get_data(as_text=True)
+    cached = client.get('/', headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_fallback_without_manifest(served_frontend, client):
+    assert client.application.extensions['assets'] is None
+    response = client.get('/')
+    assert response.status_code == 200
+    assert 'src="./js/app.js"' in response.get_data(as_text=True)
+    assert 'no-store' in response.headers['Cache-Control']
+    # Исходные файлы отдаются как обычная статика, /assets/ — нет
+    assert client.get('/js/app.js').status_code == 200
+    assert client.get('/assets/js/app.js').status_code == 404
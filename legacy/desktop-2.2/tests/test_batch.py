@@ -0,0 +1,72 @@
+"""
+Пакетные изменения истории: проверка пакета и применение одной транзакцией
+"""
+import pytest
+
+from src.core.batch import BatchError, validate_operations
+
+
+@pytest.mark.parametrize('operations', [
+    None,
+    [],
+    [{'op': 'drop', 'ids': [1]}],
+    [{'op': 'delete', 'ids': [1, True]}],
+    [{'op': 'delete', 'ids': '1'}],
+    [{'op': 'short_url', 'items': [{'id': True, 'short_url': 'https://s.io/a'}]}],
+    [{'op': 'short_url', 'items': [{'id': 1, 'short_url': ''}]}],
+    [{'op': 'short_url', 'items': [{'id': 1, 'short_url': 'x' * 501}]}],
+    [{'op': 'tag', 'ids': [1], 'tag_name': 5}],
+    [{'op': 'tag', 'ids': [1], 'tag_name': 'ok', 'tag_color': ['#fff']}],
+    [{'op': 'tag', 'ids': [1], 'tag_name': 'x' * 101}],
+])
+def test_validate_rejects(operations):
+    with pytest.raises(BatchError):
+        validate_operations(operations)
+
+
+def test_validate_normalizes():
+    assert validate_operations([
+        {'op': 'delete', 'ids': [3, 1, 3]},
+        {'op': 'tag', 'ids': [1], 'tag_name': 'promo', 'tag_color': None},
+        {'op': 'short_url', 'items': [{'id': 2, 'short_url': 'https://s.io/a'}]},
+    ]) == [
+        {'op': 'delete', 'ids': [3, 1]},
+        {'op': 'tag', 'ids': [1], 'tag_name': 'promo', 'tag_color': ''},
+        {'op': 'short_url', 'items': {2: 'https://s.io/a'}},
+    ]
+
+
+def test_batch_bad_operation_is_400(client, add_history):
+    history_id = add_history()
+    response = client.post('/history/batch', json={
+        'user_email': 'a@test.ru',
+        'operations': [{'op': 'delete', 'ids': [history_id]}, {'op': 'tag', 'ids': [history_id], 'tag_name': 1}],
+    })
+    assert response.status_code == 400
+    assert 'operations[1].tag_name' in response.json['error']
+    # Пакет отклонён целиком — удаление из первой операции не выполнено
+    assert len(client.get('/history?user_email=a@test.ru').json) == 1
+
+
+def test_batch_applies_in_order(client, add_history):
+    first, second, third = add_history(), add_history(), add_history()
+    foreign = add_history(user_email='b@test.ru')
+    response = client.post('/history/batch', json={
+        'user_email': 'a@test.ru',
+        'operations': [
+            {'op': 'delete', 'ids': [first, foreign]},
+            {'op': 'tag', 'ids': [first, second], 'tag_name': 'promo', 'tag_color': '#f00'},
+            {'op': 'short_url', 'items': [{'id': third, 'short_url': 'https://s.io/x'}]},
+        ],
+    })
+    assert response.status_code == 200
+    assert response.json['results'] == [
+        {'op': 'delete', 'affected': 1, 'missing': [foreign]},
+        {'op': 'tag', 'affected': 1, 'missing': [first]},
+        {'op': 'short_url', 'affected': 1, 'missing': []},
+    ]
+    rows = {row['id']: row for row in client.get('/history?user_email=a@test.ru').json}
+    assert set(rows) == {second, third}
+    assert rows[second]['tag_name'] == 'promo'
+    assert rows[third]['short_url'] == 'https://s.io/x'
+    assert len(client.get('/history?user_email=b@test.ru').json) == 1
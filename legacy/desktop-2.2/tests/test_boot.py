@@ -0,0 +1,62 @@
+"""
+Запуск desktop: окно с заставкой переходит на приложение или на страницу ошибки
+"""
+import urllib.request
+
+import pytest
+
+import src.api
+from src.desktop.boot import boot
+from src.desktop.server import LocalServer
+
+
+class FakeWindow:
+    """Окно pywebview: запоминает, что было загружено"""
+
+    def __init__(self, on_load_url=None):
+        self.urls, self.pages = [], []
+        self._on_load_url = on_load_url
+
+    def load_url(self, url):
+        if self._on_load_url:
+            self._on_load_url(url)
+        self.urls.append(url)
+
+    def load_html(self, html):
+        self.pages.append(html)
+
+
+@pytest.fixture
+def server():
+    server = LocalServer()
+    yield server
+    server.shutdown()
+
+
+def test_boot_opens_app_when_server_is_up(app, server, monkeypatch):
+    from src.core import updater
+    monkeypatch.setattr(src.api, 'create_app', lambda config_name: app)
+    monkeypatch.setattr(updater, 'start_background_check', lambda: True)
+
+    def request_version(url):
+        # Окно переходит на приложение, когда сервер уже отвечает
+        with urllib.request.urlopen(f'{url}/api/version', timeout=5) as response:
+            assert response.status == 200
+
+    window = FakeWindow(on_load_url=request_version)
+    boot(window, server)
+    assert window.urls == [server.url]
+    assert window.pages == []
+
+
+def test_boot_shows_error_page_when_create_app_fails(server, monkeypatch):
+    def broken(config_name):
+        raise RuntimeError('database disk image is malformed')
+
+    monkeypatch.setattr(src.api, 'create_app', broken)
+    window = FakeWindow()
+    boot(window, server)
+    assert window.urls == []
+    assert len(window.pages) == 1
+    assert 'Не удалось запустить приложение' in window.pages[0]
+    assert 'database disk image is malformed' in window.pages[0]
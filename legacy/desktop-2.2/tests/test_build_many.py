@@ -0,0 +1,46 @@
+"""
+Пакетная сборка ссылок: build_many совпадает с build_utm_url для каждой пары
+"""
+from src.core.services import UTMService
+
+BASE_URLS = [
+    'https://example.com/landing',
+    'example.com/p/1#top',
+    'https://example.com/l?utm_source=old&page=2',
+    'https://example.com/?ref=home&color=красный&x=',
+    'http://example.com/?a=1&a=2',
+    'https://example.com/;params?q=1#frag',
+    'https://[bad',
+    '',
+]
+
+UTM_SETS = [
+    {'utm_source': 'yandex', 'utm_medium': 'cpc', 'utm_campaign': ' весна 2024 '},
+    {'utm_source': 'google', 'utm_content': '', 'utm_term': None},
+    {'utm_source': 'a&b=c', 'utm_term': 'x y+z'},
+    {},
+    {'utm_source': 5},
+]
+
+
+def test_matches_build_utm_url():
+    expected = [UTMService.build_utm_url(url, utm) for url in BASE_URLS for utm in UTM_SETS]
+    assert UTMService.build_many(BASE_URLS, UTM_SETS) == expected
+
+
+def test_batch_endpoint(client, app):
+    response = client.post('/api/build/batch', json={
+        'base_urls': ['https://example.com/a', 'https://example.com/b'],
+        'utm_params': [{'utm_source': 'yandex'}, {'utm_source': 'google'}],
+    })
+    assert response.json == {'success': True, 'count': 4, 'urls': [
+        'https://example.com/a?utm_source=yandex', 'https://example.com/a?utm_source=google',
+        'https://example.com/b?utm_source=yandex', 'https://example.com/b?utm_source=google',
+    ]}
+
+    assert client.post('/api/build/batch', json={'base_urls': 'x', 'utm_params': []}).status_code == 400
+    app.config['BUILD_BATCH_MAX_URLS'] = 3
+    response = client.post('/api/build/batch', json={
+        'base_urls': ['a.ru', 'b.ru'], 'utm_params': [{'utm_source': 's'}, {'utm_source': 't'}],
+    })
+    assert response.status_code == 400
@@ -0,0 +1,118 @@
+"""
+Журнал изменений и GET /sync (src/core/changes.py)
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from src.core.changes import prune_change_log
+from src.core.models import db, ChangeLog
+from src.web.server import prune
+
+
+def _sync(client, since=0, **params):
+    response = client.get('/sync', query_string={'user_email': 'a@test.ru', 'since': since, **params})
+    assert response.status_code == 200
+    return response.json
+
+
+def test_sync_returns_changes_after_since(client, add_history):
+    first = add_history()
+    state = _sync(client)
+    assert [item['id'] for item in state['history']['upserted']] == [first]
+    assert state['resync_required'] is False
+
+    second = add_history('https://example.com/b?utm_source=ya')
+    client.delete(f'/history/{first}?user_email=a@test.ru')
+    delta = _sync(client, state['next_since'])
+    assert [item['id'] for item in delta['history']['upserted']] == [second]
+    assert delta['history']['deleted'] == [first]
+
+    assert _sync(client, delta['next_since'])['history'] == {'upserted': [], 'deleted': []}
+
+
+def test_sync_collapses_events_and_pages(client, add_history):
+    ids = [add_history(f'https://example.com/{i}?utm_source=x') for i in range(5)]
+    client.put(f'/history/{ids[0]}/tag?user_email=a@test.ru', json={'tag_name': 't'})
+
+    page = _sync(client, limit=3)
+    assert page['has_more'] is True
+    rest = _sync(client, page['next_since'], limit=100)
+    assert rest['has_more'] is False
+    seen = {item['id'] for item in page['history']['upserted'] + rest['history']['upserted']}
+    assert seen == set(ids)
+
+
+def test_sync_other_user_events_not_visible(client, add_history):
+    add_history(user_email='b@test.ru')
+    assert _sync(client)['history']['upserted'] == []
+
+
+def test_sync_log_lock_row_is_not_a_data_version(client, add_history):
+    """Строка блокировки журнала не влияет на ETag истории"""
+    add_history()
+    etag = client.get('/history?user_email=a@test.ru').headers['ETag']
+    response = client.get('/history?user_email=a@test.ru', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_pruned_log_requires_resync(app, client, add_history):
+    old_id = add_history()
+    old_since = _sync(client)['next_since']
+    add_history('https://example.com/new?utm_source=x')
+    current = _sync(client, old_since)['next_since']
+
+    with app.app_context():
+        # Первое событие «устарело» — его удаляет очистка журнала
+        db.session.execute(
+            db.update(ChangeLog).where(ChangeLog.item_id == old_id)
+            .values(created_at=datetime.utcnow() - timedelta(days=60))
+        )
+        db.session.commit()
+        assert prune_change_log(30) == 1
+
+    stale = _sync(client, 0)
+    assert stale['resync_required'] is True
+    assert stale['reset'] == ['history', 'templates']
+    assert stale['next_since'] == current
+
+    # Клиент, уже получивший удалённое событие, продолжает как обычно
+    fresh = _sync(client, old_since)
+    assert fresh['resync_required'] is False
+    assert len(fresh['history']['upserted']) == 1
+
+
+def test_standalone_prune(app, client, add_history):
+    """Очистка в мастере gunicorn — своей сессией, без контекста приложения"""
+    old_id = add_history()
+    add_history('https://example.com/new?utm_source=x')
+    with app.app_context():
+        db.session.execute(
+            db.update(ChangeLog).where(ChangeLog.item_id == old_id)
+            .values(created_at=datetime.utcnow() - timedelta(days=60))
+        )
+        db.session.commit()
+    assert prune('development') == 1
+    assert prune('development') == 0
+    assert _sync(client, 0)['resync_required'] is True
+
+
+def test_sqlite_write_does_not_lock_log(app, client, add_history):
+    """В SQLite запись события — без INSERT/UPDATE строки блокировки журнала"""
+    history_id = add_history()
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def collect(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', collect)
+    try:
+        response = client.delete(f'/history/{history_id}?user_email=a@test.ru')
+    finally:
+        event.remove(engine, 'before_cursor_execute', collect)
+    assert response.status_code == 200
+    assert not [sql for sql in statements if 'ON CONFLICT' in sql]
+    # DELETE, событие журнала и версия данных для ETag
+    assert len(statements) == 3
@@ -0,0 +1,125 @@
+"""
+Сжатие ответов: выбор кодировки, пороги и исключения, потоковая выгрузка, ETag
+"""
+import gzip
+import json
+
+import pytest
+from flask import Response
+
+from src.api import compression
+from src.core.config import DevelopmentConfig
+
+
+@pytest.fixture(autouse=True)
+def compression_enabled(monkeypatch):
+    # Настройки читаются при создании приложения — до фикстуры app
+    monkeypatch.setattr(DevelopmentConfig, 'COMPRESSION_ENABLED', True)
+    monkeypatch.setattr(DevelopmentConfig, 'COMPRESSION_MIN_SIZE', 1024)
+
+
+@pytest.fixture
+def history(add_history):
+    for i in range(40):
+        add_history(f'https://shop.example.ru/catalog/{i}?utm_source=yandex&utm_campaign=spring')
+    return '/history?user_email=a@test.ru'
+
+
+def test_gzip_json(client, history):
+    response = client.get(history, headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    body = gzip.decompress(response.get_data())
+    assert len(json.loads(body)) == 40
+    assert int(response.headers['Content-Length']) == len(response.get_data()) < len(body)
+
+    stats = client.get('/api/compression/stats').json
+    assert stats['enabled'] is True
+    assert stats['encodings']['gzip']['responses'] == 1
+
+
+def test_identity_without_accept_encoding(client, history):
+    response = client.get(history)
+    assert 'Content-Encoding' not in response.headers
+    # Кэш должен различать ответы по Accept-Encoding и для несжатого варианта
+    assert 'Accept-Encoding' in response.vary
+    assert len(response.json) == 40
+
+
+@pytest.mark.skipif(compression.brotli is None, reason='brotli не установлен')
+def test_brotli_preferred(client, history):
+    response = client.get(history, headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert len(json.loads(compression.brotli.decompress(response.get_data()))) == 40
+    # q-значения клиента важнее порядка сервера
+    response = client.get(history, headers={'Accept-Encoding': 'br;q=0.5, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+@pytest.mark.skipif(compression.brotli is not None, reason='brotli установлен')
+def test_brotli_only_client_without_brotli(client, history):
+    response = client.get(history, headers={'Accept-Encoding': 'br'})
+    assert 'Content-Encoding' not in response.headers
+    assert client.get(history, headers={'Accept-Encoding': 'br, gzip'}).headers['Content-Encoding'] == 'gzip'
+
+
+def test_small_response_not_compressed(client):
+    response = client.get('/api/version', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'version' in response.json
+
+
+def test_encoded_and_partial_responses_untouched(app, client):
+    body = b'{"data": "' + b'x' * 4096 + b'"}'
+
+    @app.route('/test/encoded')
+    def encoded():
+        return Response(gzip.compress(body), mimetype='application/json', headers={'Content-Encoding': 'gzip'})
+
+    @app.route('/test/partial')
+    def partial():
+        return Response(body[:2048], status=206, mimetype='application/json',
+                        headers={'Content-Range': f'bytes 0-2047/{len(body)}'})
+
+    response = client.get('/test/encoded', headers={'Accept-Encoding': 'gzip'})
+    assert gzip.decompress(response.get_data()) == body
+
+    response = client.get('/test/partial', headers={'Accept-Encoding': 'gzip', 'Range': 'bytes=0-2047'})
+    assert response.status_code == 206
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == body[:2048]
+
+
+def test_streamed_export(client, history):
+    response = client.post('/export_history', json={'user_email': 'a@test.ru', 'format': 'csv', 'stream': True},
+                           headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    lines = gzip.decompress(response.get_data()).decode('utf-8-sig').splitlines()
+    assert len(lines) == 41  # заголовок и 40 строк
+
+
+def test_etag_revalidation(client, history):
+    first = client.get(history, headers={'Accept-Encoding': 'gzip'})
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    for accept in ('gzip', 'identity'):
+        cached = client.get(history, headers={'Accept-Encoding': accept, 'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.get_data() == b''
+        assert 'Content-Encoding' not in cached.headers
+
+
+def test_strong_etag_becomes_weak(app, client):
+    @app.route('/test/strong')
+    def strong():
+        response = Response('{"data": "' + 'y' * 4096 + '"}', mimetype='application/json')
+        response.set_etag('v1')
+        return response
+
+    response = client.get('/test/strong', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert client.get('/test/strong').headers['ETag'] == '"v1"'
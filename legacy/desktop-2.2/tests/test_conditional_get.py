@@ -0,0 +1,112 @@
+"""
+Условные GET: ETag по версии данных пользователя и 304 Not Modified
+"""
+import re
+from pathlib import Path
+
+import pytest
+
+
+def _get(client, path, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return client.get(path, headers=headers)
+
+
+def test_history_304_until_changed(client, add_history):
+    history_id = add_history()
+    path = '/history?user_email=a@test.ru'
+    first = _get(client, path)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/') and first.headers['Cache-Control'] == 'no-cache'
+    assert first.headers.get('Last-Modified')
+
+    cached = _get(client, path, etag)
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+    assert cached.headers['ETag'] == etag
+
+    client.put(f'/history/{history_id}/tag?user_email=a@test.ru', json={'tag_name': 'promo'})
+    changed = _get(client, path, etag)
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.json[0]['tag_name'] == 'promo'
+
+
+@pytest.mark.parametrize('write', [
+    lambda client, item_id: client.post('/history', json={'url': 'https://example.com/?utm_source=x', 'user_email': 'a@test.ru'}),
+    lambda client, item_id: client.delete(f'/history/{item_id}?user_email=a@test.ru'),
+    lambda client, item_id: client.put(f'/history/{item_id}/short_url?user_email=a@test.ru', json={'short_url': 'https://s.io/a'}),
+    lambda client, item_id: client.post('/history/batch', json={'user_email': 'a@test.ru', 'operations': [{'op': 'delete', 'ids': [item_id]}]}),
+    lambda client, item_id: client.post('/import_history', json=[{'user_email': 'a@test.ru', 'url': 'https://example.com/'}]),
+], ids=['add', 'delete', 'short_url', 'batch', 'import'])
+def test_every_history_write_invalidates(client, add_history, write):
+    item_id = add_history()
+    path = '/history?user_email=a@test.ru'
+    etag = _get(client, path).headers['ETag']
+    write(client, item_id)
+    assert _get(client, path, etag).status_code == 200
+
+
+def test_versions_are_per_user_and_per_query(client, add_history):
+    add_history()
+    path = '/history?user_email=a@test.ru'
+    etag = _get(client, path).headers['ETag']
+
+    add_history(user_email='b@test.ru')
+    assert _get(client, path, etag).status_code == 304
+
+    # Другие параметры — другой ответ при той же версии
+    paged = _get(client, path + '&limit=10')
+    assert paged.headers['ETag'] != etag
+    assert _get(client, path + '&limit=10', etag).status_code == 200
+    assert _get(client, path + '&limit=10', paged.headers['ETag']).status_code == 304
+
+
+def test_templates_and_facets(client, add_history):
+    client.post('/templates', json={'user_email': 'a@test.ru', 'name': 'Google', 'utm_source': 'google'})
+    path = '/templates?user_email=a@test.ru'
+    etag = _get(client, path).headers['ETag']
+    assert _get(client, path, etag).status_code == 304
+
+    # Изменения истории не сбрасывают кэш шаблонов
+    add_history()
+    assert _get(client, path, etag).status_code == 304
+
+    template_id = _get(client, path).json[0]['id']
+    client.delete(f'/templates/{template_id}?user_email=a@test.ru')
+    assert _get(client, path, etag).status_code == 200
+
+    facets = '/history/facets?user_email=a@test.ru'
+    etag = _get(client, facets).headers['ETag']
+    assert _get(client, facets, etag).status_code == 304
+    add_history(url='https://example.com/?utm_source=vk')
+    assert _get(client, facets, etag).status_code == 200
+
+
+def _ui_fetch_options(path):
+    """Параметры fetch() из frontend/js/api.js для запроса к path"""
+    source = (Path(__file__).resolve().parents[1] / 'frontend/js/api.js').read_text(encoding='utf-8')
+    match = re.search(r'fetch\(`' + re.escape(path) + r'\?[^`]*`, \{(.*?)\n {12}\}\);', source, re.S)
+    assert match, f'fetch({path}) не найден в api.js'
+    return match.group(1)
+
+
+@pytest.mark.parametrize('path', ['/history', '/templates'])
+def test_ui_request_revalidates(client, add_history, path):
+    # Заголовок запроса Cache-Control: no-cache отключает HTTP-кэш WebView,
+    # и If-None-Match не отправляется; cache: 'no-cache' проверяет ETag
+    options = _ui_fetch_options(path)
+    assert "cache: 'no-cache'" in options
+    assert "'Cache-Control'" not in options
+
+    add_history()
+    url = f'{path}?user_email=a@test.ru'
+    first = client.get(url, headers={'Accept': 'application/json'})
+    # Так Chromium повторяет запрос с cache: 'no-cache' при сохранённом ответе
+    revalidated = client.get(url, headers={
+        'Accept': 'application/json',
+        'Cache-Control': 'max-age=0',
+        'If-None-Match': first.headers['ETag'],
+    })
+    assert revalidated.status_code == 304
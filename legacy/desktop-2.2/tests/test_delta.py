@@ -0,0 +1,259 @@
+"""
+Дельта-обновления: сборка патча, проверка перед применением и переход на полный установщик
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from src.core import delta
+from src.core.version import __version__
+
+NEW_VERSION = '99.0.0'
+
+
+def _make_bundle(root, marker):
+    (root / '_internal/frontend/js').mkdir(parents=True)
+    (root / '_internal/lib').mkdir(parents=True)
+    for i in range(3):
+        (root / f'_internal/lib/lib{i}.so').write_bytes(bytes([i]) * 4096)
+    (root / 'UTMka').write_text(f'#!/bin/sh\necho {marker} > "{root.parent / "relaunched"}"\n')
+    os.chmod(root / 'UTMka', 0o755)
+    (root / '_internal/frontend/js/app.js').write_text('console.log(1)')
+    (root / '_internal/frontend/index.html').write_text('<html>')
+
+
+@pytest.fixture
+def bundles(tmp_path):
+    """Бандл установленной версии и следующей: app.js и exe изменены, new.js добавлен, index.html удалён"""
+    old, new = tmp_path / 'old', tmp_path / 'new'
+    _make_bundle(old, 'old')
+    shutil.copytree(old, new)
+    (new / 'UTMka').write_text(f'#!/bin/sh\necho new > "{tmp_path / "relaunched"}"\n')
+    (new / '_internal/frontend/js/app.js').write_text('console.log(2)')
+    (new / '_internal/frontend/js/new.js').write_text('export const x = 1')
+    (new / '_internal/frontend/index.html').unlink()
+    return old, new
+
+
+@pytest.fixture
+def patch(bundles, tmp_path):
+    old, new = bundles
+    patch_path = tmp_path / 'patch.zip'
+    delta.build_patch(delta.bundle_manifest(old, __version__), delta.bundle_manifest(new, NEW_VERSION),
+                      new, patch_path)
+    return patch_path
+
+
+def test_build_patch_contains_only_changes(bundles, patch):
+    with zipfile.ZipFile(patch) as archive:
+        info = json.loads(archive.read(delta.PATCH_INFO))
+        names = set(archive.namelist())
+    changed = {'UTMka', '_internal/frontend/js/app.js', '_internal/frontend/js/new.js'}
+    assert (info['from'], info['to']) == (__version__, NEW_VERSION)
+    assert set(info['files']) == changed
+    assert names == {delta.PATCH_INFO} | {f'{delta.PATCH_FILES_DIR}/{path}' for path in changed}
+    assert info['removed'] == ['_internal/frontend/index.html']
+    # Новый файл не сверяется с установкой, изменённые и удалённые — сверяются
+    assert set(info['base']) == {'UTMka', '_internal/frontend/js/app.js', '_internal/frontend/index.html'}
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='apply-скрипт POSIX')
+def test_stage_and_apply(bundles, patch, tmp_path):
+    old, new = bundles
+    staging_dir = tmp_path / 'updates/patch-staged'
+    info = delta.stage_patch(patch, old, staging_dir, __version__)
+    # До запуска скрипта установка не меняется
+    assert (old / '_internal/frontend/js/app.js').read_text() == 'console.log(1)'
+
+    exited = subprocess.Popen(['true'])
+    exited.wait()
+    script = delta.write_apply_script(staging_dir, old, info['removed'], exited.pid)
+    subprocess.run(['sh', str(script)], check=True, timeout=10)
+
+    assert delta.bundle_manifest(old, NEW_VERSION)['files'] == delta.bundle_manifest(new, NEW_VERSION)['files']
+    assert os.access(old / 'UTMka', os.X_OK)
+    for _ in range(100):
+        if (tmp_path / 'relaunched').exists():
+            break
+        subprocess.run(['sleep', '0.05'])
+    assert (tmp_path / 'relaunched').read_text().strip() == 'new'
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='apply-скрипт POSIX')
+def test_launch_waits_for_started_marker(bundles, patch, tmp_path):
+    old, _ = bundles
+    staging_dir = tmp_path / 'updates/patch-staged'
+    info = delta.stage_patch(patch, old, staging_dir, __version__)
+    app = subprocess.Popen(['sleep', '30'])
+    try:
+        script = delta.write_apply_script(staging_dir, old, info['removed'], app.pid)
+        delta.launch_apply_script(script, old, timeout=10)
+        assert delta.started_marker(script).exists()
+        # Скрипт запущен и ждёт выхода приложения — установка ещё прежняя
+        assert (old / '_internal/frontend/js/app.js').read_text() == 'console.log(1)'
+    finally:
+        app.kill()
+        app.wait()
+
+
+def test_launch_refused_elevation(bundles, tmp_path, monkeypatch):
+    """Отказ в UAC/пароле: процесс запуска выходит с ошибкой, отметки нет"""
+    script = tmp_path / 'patch-staged-apply.sh'
+    script.write_text('')
+    monkeypatch.setattr(delta, '_spawn_apply_script',
+                        lambda script, root: subprocess.Popen([sys.executable, '-c', 'raise SystemExit(1)']))
+    with pytest.raises(delta.DeltaError, match='нет прав'):
+        delta.launch_apply_script(script, bundles[0], timeout=10)
+
+
+def test_launch_times_out(bundles, tmp_path, monkeypatch):
+    script = tmp_path / 'patch-staged-apply.sh'
+    script.write_text('')
+    hung = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    monkeypatch.setattr(delta, '_spawn_apply_script', lambda script, root: hung)
+    with pytest.raises(delta.DeltaError, match='время ожидания'):
+        delta.launch_apply_script(script, bundles[0], timeout=0.3)
+    # Зависший запрос прав снимается, чтобы скрипт не запустился позже
+    assert hung.wait(timeout=5) is not None
+
+
+def test_stage_rejects_modified_install(bundles, patch, tmp_path):
+    old, _ = bundles
+    (old / '_internal/frontend/index.html').write_text('<html lang="ru">')
+    with pytest.raises(delta.DeltaError, match='index.html'):
+        delta.stage_patch(patch, old, tmp_path / 'staged', __version__)
+    assert not (tmp_path / 'staged').exists()
+
+
+def test_stage_rejects_other_version(bundles, patch, tmp_path):
+    with pytest.raises(delta.DeltaError, match='0.0.1'):
+        delta.stage_patch(patch, bundles[0], tmp_path / 'staged', '0.0.1')
+
+
+def test_stage_rejects_corrupted_patch(bundles, patch, tmp_path):
+    patch.write_bytes(patch.read_bytes()[:100])
+    with pytest.raises(delta.DeltaError):
+        delta.stage_patch(patch, bundles[0], tmp_path / 'staged', __version__)
+
+
+def test_stage_rejects_unsafe_path(bundles, tmp_path):
+    patch_path = tmp_path / 'evil.zip'
+    with zipfile.ZipFile(patch_path, 'w') as archive:
+        archive.writestr(delta.PATCH_INFO, json.dumps({
+            'from': __version__, 'to': NEW_VERSION, 'base': {},
+            'files': {'../escape.txt': '0' * 64}, 'removed': [],
+        }))
+        archive.writestr(f'{delta.PATCH_FILES_DIR}/../escape.txt', 'x')
+    with pytest.raises(delta.DeltaError, match='Недопустимый путь'):
+        delta.stage_patch(patch_path, bundles[0], tmp_path / 'staged', __version__)
+    assert not (tmp_path / 'escape.txt').exists()
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='символические ссылки')
+def test_build_patch_rejects_changed_links(bundles, tmp_path):
+    old, new = bundles
+    os.symlink('lib0.so', new / '_internal/lib/link.so')
+    with pytest.raises(delta.DeltaError):
+        delta.build_patch(delta.bundle_manifest(old, __version__), delta.bundle_manifest(new, NEW_VERSION),
+                          new, tmp_path / 'patch.zip')
+
+
+def test_write_release_delta(bundles, tmp_path):
+    old, new = bundles
+    out = tmp_path / 'release'
+    out.mkdir()
+    previous = delta.write_release_delta(old, __version__, out, 'linux')
+    assert set(previous) == {'manifest'}
+    result = delta.write_release_delta(new, NEW_VERSION, out, 'linux', previous_manifest=previous['manifest'])
+    assert result['patch'].name == delta.patch_asset_name(__version__, NEW_VERSION, 'linux')
+    assert json.loads(result['manifest'].read_text(encoding='utf-8'))['version'] == NEW_VERSION
+
+
+def _release(patch_size):
+    installer = 'UTMka-Setup.exe' if os.name == 'nt' else 'UTMka-Setup.dmg'
+    return {
+        'tag_name': f'v{NEW_VERSION}',
+        'html_url': 'https://example.com/releases',
+        'assets': [
+            {'name': installer, 'browser_download_url': 'https://example.com/setup',
+             'size': 50_000_000, 'digest': 'sha256:aa'},
+            {'name': delta.patch_asset_name(__version__, NEW_VERSION),
+             'browser_download_url': 'https://example.com/patch.zip', 'size': patch_size, 'digest': 'sha256:bb'},
+        ],
+    }
+
+
+def test_release_info_offers_smaller_patch(updater):
+    info = updater.release_info(_release(300_000))
+    assert info['available']
+    assert (info['patch_url'], info['patch_sha256'], info['patch_size']) == \
+        ('https://example.com/patch.zip', 'sha256:bb', 300_000)
+    # Патч не меньше установщика — только полный установщик
+    assert updater.release_info(_release(60_000_000))['patch_url'] is None
+
+
+def test_install_patch_stages_and_launches(bundles, patch, updater, monkeypatch):
+    old, _ = bundles
+    launched, timers = [], []
+
+    class _Timer:
+        def __init__(self, interval, function, args=()):
+            timers.append((interval, function, args))
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(delta, 'install_root', lambda: old)
+    monkeypatch.setattr(delta, 'launch_apply_script', lambda script, root: launched.append((script, root)))
+    monkeypatch.setattr(updater.threading, 'Timer', _Timer)
+
+    updater.install_update(str(patch))
+    script, root = launched[0]
+    assert root == old
+    assert script.exists()
+    assert (script.parent / 'patch-staged/_internal/frontend/js/new.js').exists()
+    # Процесс завершается после ответа клиенту, чтобы скрипт дождался выхода
+    assert timers == [(1.0, os._exit, (0,))]
+
+
+def test_install_not_frozen_falls_back(client, patch, updater):
+    # Из исходников патч не применяется — клиенту нужен полный установщик
+    response = client.post('/api/update/install', json={'path': str(patch)})
+    assert response.status_code == 409
+    assert response.json['fallback'] is True
+
+
+def test_install_modified_install_falls_back(client, bundles, patch, updater, monkeypatch):
+    old, _ = bundles
+    (old / '_internal/frontend/js/app.js').write_text('tampered')
+    launched = []
+    monkeypatch.setattr(delta, 'install_root', lambda: old)
+    monkeypatch.setattr(delta, 'launch_apply_script', lambda script, root: launched.append(script))
+
+    response = client.post('/api/update/install', json={'path': str(patch)})
+    assert response.status_code == 409
+    assert response.json['fallback'] is True
+    assert 'app.js' in response.json['error']
+    assert launched == []
+
+
+def test_install_refused_elevation_falls_back(client, bundles, patch, updater, monkeypatch):
+    """Скрипт не запустился — приложение не завершается, клиент берёт полный установщик"""
+    timers = []
+
+    def refuse(script, root):
+        raise delta.DeltaError('Обновление не запущено: нет прав на запись в папку установки')
+
+    monkeypatch.setattr(delta, 'install_root', lambda: bundles[0])
+    monkeypatch.setattr(delta, 'launch_apply_script', refuse)
+    monkeypatch.setattr(updater.threading, 'Timer', lambda *args, **kwargs: timers.append(args))
+
+    response = client.post('/api/update/install', json={'path': str(patch)})
+    assert response.status_code == 409
+    assert response.json['fallback'] is True
+    assert timers == []
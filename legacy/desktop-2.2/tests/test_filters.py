@@ -0,0 +1,46 @@
+"""
+Фильтры истории: границы периода и фильтрация в SQL
+"""
+from datetime import datetime
+
+import pytest
+
+from src.core.filters import parse_history_filters
+from src.core.models import db, History
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-05-01T10:00:00', datetime(2024, 5, 1, 10)),
+    ('2024-05-01T10:00:00Z', datetime(2024, 5, 1, 10)),
+    ('2024-05-01T10:00:00+03:00', datetime(2024, 5, 1, 7)),
+    ('2024-05-01T10:00:00 03:00', datetime(2024, 5, 1, 7)),
+    ('2024-05-01T01:30:00-02:30', datetime(2024, 5, 1, 4)),
+])
+def test_aware_bounds_are_naive_utc(value, expected):
+    bound = parse_history_filters({'date_from': value})['date_from']
+    assert bound == expected
+    assert bound.tzinfo is None
+
+
+def test_date_to_includes_whole_day():
+    assert parse_history_filters({'date_to': '2024-05-01'})['date_to'] == datetime(2024, 5, 2)
+
+
+def test_invalid_date():
+    with pytest.raises(ValueError):
+        parse_history_filters({'date_from': '2024-13-01T00:00:00Z'})
+
+
+def test_history_filtered_by_aware_bound(app, client, add_history):
+    early, late = add_history(), add_history()
+    with app.app_context():
+        db.session.get(History, early).created_at = datetime(2024, 5, 1, 6, 30)
+        db.session.get(History, late).created_at = datetime(2024, 5, 1, 7, 30)
+        db.session.commit()
+
+    # 10:00 по Москве — 07:00 UTC
+    response = client.get('/history', query_string={'user_email': 'a@test.ru', 'date_from': '2024-05-01T10:00:00+03:00'})
+    assert [row['id'] for row in response.json] == [late]
+    response = client.get('/history', query_string={'user_email': 'a@test.ru', 'date_to': '2024-05-01T07:00:00Z'})
+    assert [row['id'] for row in response.json] == [early]
+    assert client.get('/history?user_email=a@test.ru&date_from=nope').status_code == 400
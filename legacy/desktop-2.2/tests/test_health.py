@@ -0,0 +1,72 @@
+"""
+Проверки состояния /healthz и /readyz, настройки gunicorn
+"""
+import pytest
+import sqlalchemy
+
+from src.api.routes import health
+from src.core.config import WebConfig
+from src.core.migrations import SCHEMA_VERSION
+from src.core.models import db
+from src.web.server import gunicorn_options
+
+
+@pytest.fixture
+def broken_db(app, tmp_path, monkeypatch):
+    """База недоступна: engine на файл в несуществующей папке"""
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path / "missing" / "test.db"}')
+    monkeypatch.setattr(health, 'db', type('BrokenDb', (), {'engine': engine}))
+    yield
+    engine.dispose()
+
+
+def test_healthz(client):
+    response = client.get('/healthz')
+    assert response.status_code == 200
+    assert response.json == {'status': 'ok'}
+    assert response.headers['Cache-Control'] == 'no-store'
+
+
+def test_readyz(client):
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.json == {'status': 'ready', 'schema_version': SCHEMA_VERSION}
+    assert response.headers['Cache-Control'] == 'no-store'
+
+
+def test_readyz_database_unavailable(broken_db, client):
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json['status'] == 'unavailable'
+    assert response.headers['Cache-Control'] == 'no-store'
+    # Liveness не зависит от базы — воркер не перезапускается из-за неё
+    assert client.get('/healthz').status_code == 200
+
+
+def test_readyz_pending_migrations(app, client):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(sqlalchemy.text('DELETE FROM schema_version WHERE version = :v'), {'v': SCHEMA_VERSION})
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json == {'status': 'migrating', 'schema_version': SCHEMA_VERSION - 1, 'expected': SCHEMA_VERSION}
+
+
+def test_gunicorn_options():
+    options = gunicorn_options('web')
+    assert options['bind'] == WebConfig.WEB_BIND
+    assert (options['workers'], options['threads']) == (WebConfig.WEB_WORKERS, WebConfig.WEB_THREADS)
+    assert options['worker_class'] == 'gthread'
+    assert options['timeout'] == WebConfig.WEB_TIMEOUT
+    assert options['graceful_timeout'] == WebConfig.WEB_GRACEFUL_TIMEOUT
+    assert (options['max_requests'], options['max_requests_jitter']) == \
+        (WebConfig.WEB_MAX_REQUESTS, WebConfig.WEB_MAX_REQUESTS_JITTER)
+    # Каждый воркер создаёт приложение и пул соединений сам, после fork
+    assert options['preload_app'] is False
+
+
+def test_gunicorn_options_overrides():
+    options = gunicorn_options('web', bind='127.0.0.1:9000', workers=3, threads=None)
+    assert (options['bind'], options['workers']) == ('127.0.0.1:9000', 3)
+    # Незаданные аргументы командной строки не затирают конфигурацию
+    assert options['threads'] == WebConfig.WEB_THREADS
@@ -0,0 +1,128 @@
+"""
+Импорт истории и шаблонов: пакетный список и потоковая загрузка файла
+"""
+import io
+import json
+
+import pytest
+
+from src.core.importer import iter_json_records
+
+
+def _records(text: str, **kwargs):
+    return list(iter_json_records(io.BytesIO(text.encode('utf-8')), **kwargs))
+
+
+def test_iter_json_records_array_and_ndjson():
+    assert _records('[{"a": 1}, {"a": 2}]') == [{'a': 1}, {'a': 2}]
+    assert _records('{"a": 1}\n{"a": 2}\n') == [{'a': 1}, {'a': 2}]
+    assert _records('') == []
+
+
+def test_iter_json_records_across_chunks(monkeypatch):
+    monkeypatch.setattr('src.core.importer.READ_CHUNK_SIZE', 7)
+    items = [{'full_url': f'https://example.com/?utm_source=s{i}'} for i in range(20)] + [12345678]
+    assert _records(json.dumps(items)) == items
+
+
+def test_iter_json_records_rejects_oversized_record(monkeypatch):
+    monkeypatch.setattr('src.core.importer.READ_CHUNK_SIZE', 16)
+    with pytest.raises(ValueError, match='larger than'):
+        _records('[{"full_url": "' + 'x' * 1000, max_record_size=100)
+    # Записи в пределах лимита читаются, как и раньше
+    assert len(_records('[' + ', '.join(['{"a": "xxxxxxxxxx"}'] * 50) + ']', max_record_size=100)) == 50
+
+
+def test_iter_json_records_invalid():
+    with pytest.raises(ValueError):
+        _records('[{"a": 1}, {"a": ')
+    with pytest.raises(ValueError):
+        _records('[{"a": 1}')
+    with pytest.raises(ValueError, match="expected ','"):
+        _records('[{"a": 1} {"a": 2}]')
+    for broken in ('[,,{"a": 1}]', '[{"a": 1},, {"a": 2}]', '[{"a": 1},]', '[,]'):
+        with pytest.raises(ValueError):
+            _records(broken)
+    with pytest.raises(ValueError, match='after JSON array'):
+        _records('[{"a": 1}] garbage')
+    with pytest.raises(ValueError, match='after JSON array'):
+        _records('[{"a": 1}][{"a": 2}]')
+
+
+def test_iter_json_records_separators(monkeypatch):
+    monkeypatch.setattr('src.core.importer.READ_CHUNK_SIZE', 3)
+    assert _records('[]') == []
+    assert _records(' [ ] \n') == []
+    assert _records('[ {"a": 1} ,\n\t{"a": 2} ]\r\n') == [{'a': 1}, {'a': 2}]
+    assert _records('[1,2,3]') == [1, 2, 3]
+
+
+def test_import_history_list(client):
+    response = client.post('/import_history', json=[
+        {'user_email': 'a@test.ru', 'full_url': 'https://example.com/?utm_source=google&utm_medium=cpc'},
+        {'user_email': 'a@test.ru', 'url': 'https://example.com/path?utm_campaign=spring'},
+        {'full_url': 'https://example.com/'},
+    ])
+    assert response.status_code == 200
+    assert response.json['imported_count'] == 2
+    assert response.json['rejected'] == [{'index': 2, 'error': 'user_email is required'}]
+
+    rows = client.get('/history?user_email=a@test.ru').json
+    by_url = {row['full_url']: row for row in rows}
+    assert by_url['https://example.com/?utm_source=google&utm_medium=cpc']['utm_medium'] == 'cpc'
+    assert by_url['https://example.com/path?utm_campaign=spring']['base_url'] == 'https://example.com/path'
+
+
+def test_import_history_chunks(client, app):
+    app.config['IMPORT_CHUNK_SIZE'] = 2
+    items = [{'user_email': 'a@test.ru', 'full_url': f'https://example.com/?utm_source={i}'} for i in range(5)]
+    response = client.post('/import_history', json=items)
+    assert response.json['imported_count'] == 5
+    assert [chunk['inserted'] for chunk in response.json['chunks']] == [2, 2, 1]
+
+
+def test_upload_history_json_and_csv(client):
+    ndjson = '\n'.join(json.dumps({'full_url': f'https://example.com/?utm_source=n{i}'}) for i in range(3))
+    response = client.post('/import_history/upload?user_email=a@test.ru&format=ndjson', data=ndjson)
+    assert response.status_code == 200
+    assert response.json['imported_count'] == 3
+
+    csv_file = 'full_url,tag_name\nhttps://example.com/?utm_source=c1,promo\n'
+    response = client.post('/import_history/upload', data={
+        'user_email': 'a@test.ru',
+        'file': (io.BytesIO(csv_file.encode('utf-8')), 'history.csv'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.json['imported_count'] == 1
+
+    rows = client.get('/history?user_email=a@test.ru').json
+    assert len(rows) == 4
+    assert {row['user_email'] for row in rows} == {'a@test.ru'}
+
+
+def test_upload_oversized_record_is_400(client, app):
+    app.config['IMPORT_MAX_RECORD_SIZE'] = 1000
+    body = '[{"full_url": "https://example.com/?utm_source=' + 'x' * 200000
+    response = client.post('/import_history/upload?user_email=a@test.ru&format=json', data=body)
+    assert response.status_code == 400
+    assert 'larger than 1000' in response.json['error']
+
+
+def test_upload_templates(client):
+    body = json.dumps([{'name': 'Google', 'utm_source': 'google'}, {'utm_source': 'no-name'}])
+    response = client.post('/templates/upload?user_email=a@test.ru&format=json', data=body)
+    assert response.status_code == 200
+    assert response.json['imported_count'] == 1
+    assert response.json['rejected_count'] == 1
+    assert [t['name'] for t in client.get('/templates?user_email=a@test.ru').json] == ['Google']
+
+
+def test_import_history_without_url_is_kept(client):
+    # Как и прежний импорт: запись без ссылки не отклоняется
+    response = client.post('/import_history', json=[
+        {'user_email': 'a@test.ru', 'utm_source': 'google', 'tag_name': 'old'},
+    ])
+    assert response.json['imported_count'] == 1
+    assert response.json['rejected_count'] == 0
+    row = client.get('/history?user_email=a@test.ru').json[0]
+    assert (row['full_url'], row['base_url'], row['utm_source']) == ('', '', 'google')
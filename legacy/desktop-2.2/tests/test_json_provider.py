@@ -0,0 +1,70 @@
+"""
+JSON-провайдер на orjson: формат ответа совпадает со стандартным
+"""
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src.api.json_provider import OrjsonProvider, install_json_provider
+
+pytest.importorskip('orjson')
+
+SAMPLE = {
+    'created_at': datetime(2024, 5, 1, 10, 30, 15),
+    'aware': datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc),
+    'day': date(2024, 5, 1),
+    'tag_name': 'Акция «весна» 🚀',
+    'nested': [{'b': 1, 'a': 'é'}, None, True, 1.5],
+    'price': Decimal('9.90'),
+}
+
+
+@pytest.fixture
+def flask_app():
+    return Flask(__name__)
+
+
+@pytest.fixture
+def providers(flask_app):
+    stdlib = DefaultJSONProvider(flask_app)
+    stdlib.ensure_ascii = False
+    return OrjsonProvider(flask_app), stdlib
+
+
+def test_dumps_matches_stdlib(providers):
+    fast, stdlib = providers
+    fast_text, stdlib_text = fast.dumps(SAMPLE), stdlib.dumps(SAMPLE)
+    assert json.loads(fast_text) == json.loads(stdlib_text)
+    assert json.loads(fast_text)['created_at'] == 'Wed, 01 May 2024 10:30:15 GMT'
+    assert 'Акция «весна» 🚀' in fast_text
+    # Ответ кодирует сам orjson — компактно, без пробелов
+    assert fast.dumps({'b': 1, 'a': [1, 2]}) == '{"a":[1,2],"b":1}'
+
+
+def test_response_body(flask_app, providers):
+    fast, stdlib = providers
+    with flask_app.app_context():
+        body = fast.response(SAMPLE).get_data()
+        assert 'Акция'.encode('utf-8') in body
+        assert json.loads(body) == json.loads(stdlib.response(SAMPLE).get_data())
+
+
+def test_ensure_ascii_selects_stdlib():
+    # orjson не экранирует не-ASCII — при ensure_ascii провайдер выбирается один раз
+    escaped = Flask(__name__)
+    assert install_json_provider(escaped, 'auto', ensure_ascii=True) == 'stdlib'
+    assert not isinstance(escaped.json, OrjsonProvider)
+    assert escaped.json.ensure_ascii is True
+    assert install_json_provider(Flask(__name__), 'auto', ensure_ascii=False) == 'orjson'
+
+
+def test_app_responses_in_utf8(app, client, add_history):
+    assert isinstance(app.json, OrjsonProvider)
+    add_history(tag_name='Акция')
+    response = client.get('/history?user_email=a@test.ru')
+    assert 'Акция'.encode('utf-8') in response.get_data()
+    assert response.json[0]['tag_name'] == 'Акция'
@@ -0,0 +1,46 @@
+"""
+Локальный сервер desktop: запуск и остановка на каждом доступном WSGI-сервере
+"""
+import importlib.util
+import socket
+import threading
+import urllib.request
+
+import pytest
+
+from src.desktop.server import SERVER_BACKENDS, LocalServer
+
+
+def _available(name):
+    return name == 'werkzeug' or importlib.util.find_spec(name) is not None
+
+
+@pytest.fixture
+def thread_errors(monkeypatch):
+    """Необработанные исключения в потоках (поток сервера при остановке)"""
+    errors = []
+    monkeypatch.setattr(threading, 'excepthook', errors.append)
+    return errors
+
+
+@pytest.mark.parametrize('backend', [
+    pytest.param(name, marks=pytest.mark.skipif(not _available(name), reason=f'{name} не установлен'))
+    for name in SERVER_BACKENDS
+])
+def test_start_serve_stop(app, backend, thread_errors, capfd):
+    server = LocalServer()
+    server.start(app, backend=backend)
+    assert server.backend == backend
+    thread = server._thread
+
+    with urllib.request.urlopen(f'{server.url}/api/version', timeout=5) as response:
+        assert response.status == 200
+        assert 'version' in response.read().decode('utf-8')
+
+    server.shutdown()
+    assert not thread.is_alive()
+    assert thread_errors == []
+    assert 'Bad file descriptor' not in capfd.readouterr().err
+    # Порт больше не принимает соединения
+    with pytest.raises(OSError):
+        socket.create_connection((server.host, server.port), timeout=1).close()
@@ -0,0 +1,114 @@
+"""
+Миграции схемы: обновление базы прежних версий и межпроцессная блокировка
+"""
+import os
+import sqlite3
+import tempfile
+
+import pytest
+import sqlalchemy
+
+from src.api import create_app
+from src.core.config import DevelopmentConfig
+from src.core.migrations import LEGACY_CREATED_AT, SCHEMA_VERSION, _lock_path, current_version, run_migrations
+from src.core.models import db
+
+# Схема 2.2 до версионных миграций; history_new без тегов — как в базах до 2.1.
+# Даты — в формате, в котором их пишет SQLAlchemy (с микросекундами)
+BASELINE_SCHEMA = """
+CREATE TABLE history_new (
+    id INTEGER PRIMARY KEY,
+    user_email VARCHAR(255) NOT NULL,
+    base_url VARCHAR(2000) NOT NULL,
+    full_url VARCHAR(4000) NOT NULL,
+    utm_source VARCHAR(255),
+    utm_medium VARCHAR(255),
+    utm_campaign VARCHAR(255),
+    utm_content VARCHAR(255),
+    utm_term VARCHAR(255),
+    short_url VARCHAR(500),
+    {tag_columns}
+    created_at DATETIME
+);
+CREATE INDEX ix_history_new_user_email ON history_new (user_email);
+CREATE INDEX ix_history_new_created_at ON history_new (created_at);
+CREATE TABLE templates (
+    id INTEGER PRIMARY KEY,
+    user_email VARCHAR(255) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    utm_source VARCHAR(255),
+    utm_medium VARCHAR(255),
+    utm_campaign VARCHAR(255),
+    utm_content VARCHAR(255),
+    utm_term VARCHAR(255),
+    tag_name VARCHAR(100),
+    tag_color VARCHAR(20),
+    created_at DATETIME
+);
+INSERT INTO history_new (user_email, base_url, full_url, utm_source, created_at)
+VALUES ('a@test.ru', 'https://example.com/', 'https://example.com/?utm_source=old', 'old', '2023-01-01 10:00:00.000000');
+INSERT INTO history_new (user_email, base_url, full_url, utm_source, created_at)
+VALUES ('a@test.ru', 'https://example.com/', 'https://example.com/?utm_source=undated', 'undated', NULL);
+INSERT INTO templates (user_email, name, utm_source, created_at)
+VALUES ('a@test.ru', 'Old template', 'old', '2023-01-01 10:00:00');
+"""
+
+
+@pytest.fixture
+def legacy_app(tmp_path, monkeypatch, request):
+    """Приложение поверх базы прежней версии"""
+    database = tmp_path / 'test.db'
+    tag_columns = 'tag_name VARCHAR(100), tag_color VARCHAR(20),' if request.param else ''
+    with sqlite3.connect(database) as conn:
+        conn.executescript(BASELINE_SCHEMA.format(tag_columns=tag_columns))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(DevelopmentConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{database}')
+    app = create_app('development')
+    app.config['TESTING'] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('legacy_app', [False, True], ids=['before-2.1', '2.2'], indirect=True)
+def test_upgrade_from_baseline(legacy_app, tmp_path):
+    with legacy_app.app_context():
+        engine = db.engine
+        assert current_version(engine) == SCHEMA_VERSION
+        inspector = sqlalchemy.inspect(engine)
+        columns = {column['name'] for column in inspector.get_columns('history_new')}
+        assert {'tag_name', 'tag_color'} <= columns
+        indexes = {index['name'] for index in inspector.get_indexes('history_new')}
+        assert 'ix_history_new_user_created_id' in indexes
+        assert {'schema_version', 'change_log'} <= set(inspector.get_table_names())
+        # Повторный запуск ничего не делает
+        assert run_migrations(engine) == []
+
+    client = legacy_app.test_client()
+    rows = client.get('/history?user_email=a@test.ru').json
+    assert [row['utm_source'] for row in rows] == ['old', 'undated']
+    # Запись без даты получила самую раннюю и листается курсором в конце
+    assert rows[1]['created_at'] == LEGACY_CREATED_AT.isoformat()
+    first = client.get('/history?user_email=a@test.ru&limit=1').json
+    assert first['next_cursor']
+    second = client.get('/history', query_string={
+        'user_email': 'a@test.ru', 'limit': 1, 'cursor': first['next_cursor']}).json
+    assert [item['utm_source'] for item in second['items']] == ['undated']
+    assert second['next_cursor'] is None
+    assert client.get('/history/search?user_email=a@test.ru&q=old').status_code == 200
+    assert [t['name'] for t in client.get('/templates?user_email=a@test.ru').json] == ['Old template']
+    assert client.put(f'/history/{rows[0]["id"]}/tag?user_email=a@test.ru',
+                      json={'tag_name': 'new', 'tag_color': '#000'}).status_code == 200
+
+    # Lock-файл миграций не остаётся рядом с базой
+    assert not list(tmp_path.glob('*.lock'))
+
+
+def test_lock_path_in_temp_dir(tmp_path):
+    path = _lock_path(str(tmp_path / 'utm_data.db'))
+    assert os.path.dirname(path) == tempfile.gettempdir()
+    assert path.endswith('.migrate.lock')
+    # Одна база — один файл, разные базы — разные
+    assert path == _lock_path(str(tmp_path / 'utm_data.db'))
+    assert path != _lock_path(str(tmp_path / 'other.db'))
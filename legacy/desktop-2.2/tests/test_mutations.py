@@ -0,0 +1,40 @@
+"""
+Изменение и удаление записей только владельцем (src/core/mutations.py)
+"""
+
+
+def test_delete_requires_user_email(client, add_history):
+    item_id = add_history()
+    assert client.delete(f'/history/{item_id}').status_code == 400
+    assert client.delete(f'/history/{item_id}?user_email=other@test.ru').status_code == 404
+    assert client.delete(f'/history/{item_id}?user_email=a@test.ru').status_code == 200
+    assert client.delete(f'/history/{item_id}?user_email=a@test.ru').status_code == 404
+
+
+def test_update_tag_only_own_row(client, add_history):
+    item_id = add_history()
+    tag = {'tag_name': 'promo', 'tag_color': '#ff0000'}
+    assert client.put(f'/history/{item_id}/tag', json=tag).status_code == 400
+    assert client.put(f'/history/{item_id}/tag?user_email=other@test.ru', json=tag).status_code == 404
+    assert client.put(f'/history/{item_id}/tag', json={**tag, 'user_email': 'a@test.ru'}).status_code == 200
+
+    items = client.get('/history?user_email=a@test.ru').json
+    assert (items[0]['tag_name'], items[0]['tag_color']) == ('promo', '#ff0000')
+
+
+def test_update_short_url_only_own_row(client, add_history):
+    item_id = add_history()
+    body = {'short_url': 'https://s.ru/x'}
+    assert client.put(f'/history/{item_id}/short_url', json=body).status_code == 400
+    assert client.put(f'/history/{item_id}/short_url?user_email=other@test.ru', json=body).status_code == 404
+    response = client.put(f'/history/{item_id}/short_url?user_email=a@test.ru', json=body)
+    assert response.json == {'success': True, 'short_url': 'https://s.ru/x'}
+
+
+def test_delete_template_requires_owner(client):
+    client.post('/templates', json={'user_email': 'a@test.ru', 'name': 't1', 'utm_source': 'x'})
+    template_id = client.get('/templates?user_email=a@test.ru').json[0]['id']
+    assert client.delete(f'/templates/{template_id}').status_code == 400
+    assert client.delete(f'/templates/{template_id}?user_email=other@test.ru').status_code == 404
+    assert client.delete(f'/templates/{template_id}?user_email=a@test.ru').status_code == 200
+    assert client.get('/templates?user_email=a@test.ru').json == []
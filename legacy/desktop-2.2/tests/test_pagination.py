@@ -0,0 +1,80 @@
+"""
+Keyset-пагинация GET /history по (created_at, id)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.models import db, History
+from src.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def _seed(app, add_history, count=12):
+    """Записи с повторяющимся created_at: порядок внутри секунды — по id"""
+    ids = [add_history(url=f'https://example.com/{i}?utm_source={"google" if i % 2 else "yandex"}')
+           for i in range(count)]
+    with app.app_context():
+        started = datetime(2024, 5, 1, 12)
+        for position, item_id in enumerate(ids):
+            db.session.get(History, item_id).created_at = started + timedelta(seconds=position // 3)
+        db.session.commit()
+    # От новых к старым; при равном created_at — больший id раньше
+    return sorted(ids, key=lambda item_id: (ids.index(item_id) // 3, item_id), reverse=True)
+
+
+def _walk(client, limit, **params):
+    pages, cursor = [], None
+    while True:
+        query = {'user_email': 'a@test.ru', 'limit': limit, **params}
+        if cursor:
+            query['cursor'] = cursor
+        body = client.get('/history', query_string=query).json
+        pages.append([item['id'] for item in body['items']])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+    for broken in ('', 'abc', 'not base64!', encode_cursor(created_at, 42)[:-3]):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(broken)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 12, 50])
+def test_pages_cover_history_in_order(app, client, add_history, limit):
+    expected = _seed(app, add_history)
+    pages = _walk(client, limit)
+    assert [item_id for page in pages for item_id in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_pages_with_filter(app, client, add_history):
+    _seed(app, add_history)
+    pages = _walk(client, 2, utm_source='google')
+    items = [item_id for page in pages for item_id in page]
+    rows = client.get('/history?user_email=a@test.ru&utm_source=google').json
+    assert items == [row['id'] for row in rows]
+    assert len(items) == 6
+
+
+def test_legacy_list_and_limits(app, client, add_history):
+    expected = _seed(app, add_history, count=4)
+    assert [row['id'] for row in client.get('/history?user_email=a@test.ru').json] == expected
+
+    app.config['HISTORY_PAGE_SIZE_MAX'] = 3
+    body = client.get('/history?user_email=a@test.ru&limit=100').json
+    assert len(body['items']) == 3 and body['next_cursor']
+    assert len(client.get('/history?user_email=a@test.ru&limit=0').json['items']) == 1
+    assert client.get('/history?limit=10').json == {'items': [], 'next_cursor': None}
+
+
+def test_invalid_cursor_is_400(client, add_history):
+    add_history()
+    response = client.get('/history?user_email=a@test.ru&limit=10&cursor=garbage')
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid cursor'}
@@ -0,0 +1,88 @@
+"""
+Быстрый разбор UTM-меток: результат совпадает с urlparse + parse_qs
+"""
+import random
+
+import pytest
+
+from src.core.services import UTMService
+
+CASES = [
+    # обычные и без query
+    'https://example.com/?utm_source=google&utm_medium=cpc&utm_campaign=spring',
+    'https://example.com/path',
+    'https://example.com/path?',
+    'example.com/?utm_source=google',
+    '',
+    # повторные ключи: берётся первое непустое значение
+    'https://example.com/?utm_source=a&utm_source=b',
+    'https://example.com/?utm_source=&utm_source=b',
+    'https://example.com/?utm_source&utm_source=b',
+    # пустые значения и поля без '='
+    'https://example.com/?utm_source=&utm_medium=',
+    'https://example.com/?utm_source&utm_medium',
+    'https://example.com/?=google&utm_term=x',
+    'https://example.com/?utm_source==google',
+    # '+' и percent-encoding в значениях и ключах
+    'https://example.com/?utm_campaign=spring+sale&utm_term=a%2Bb',
+    'https://example.com/?utm_content=%D0%B0%D0%BA%D1%86%D0%B8%D1%8F',
+    'https://example.com/?utm%5Fsource=encoded-key&utm_source=plain',
+    'https://example.com/?utm_source%3Dx=y',
+    'https://example.com/?utm+source=x&utm_term=%20',
+    'https://example.com/?utm_term=+',
+    'https://example.com/?utm_term=%',
+    'https://example.com/?utm_term=%zz%4',
+    'https://example.com/?utm_term=%FF%FE',
+    # фрагменты
+    'https://example.com/#?utm_source=hidden',
+    'https://example.com/?utm_source=google#utm_medium=cpc',
+    'https://example.com/?utm_source=google#frag?utm_medium=cpc',
+    'https://example.com/page#section',
+    # не-UTM параметры вокруг
+    'https://example.com/?id=1&ref=abc&utm_medium=email&page=2',
+    'https://example.com/?xutm_source=a&utm_sourcex=b&UTM_SOURCE=c',
+    'https://example.com/?utm_source=a;utm_medium=b',
+    # некорректные query-строки
+    'https://example.com/?&&&utm_source=a&&',
+    'https://example.com/??utm_source=a',
+    'https://example.com/?utm_source=a?b=c&utm_medium=d',
+    'https://example.com/?utm_source=a\tb&utm_medium=c\nd',
+    'https://exa\tmple.com/?utm_source=tab\r\n',
+    'https://[::1]:8080/?utm_source=ipv6',
+    'https://[::1/?utm_source=broken-ipv6',
+    'https://example.com:bad/?utm_source=port',
+    'https://пример.рф/?utm_source=idn',
+    'https://ex＃ample.com/?utm_source=nfkc',
+    'https://example.com/?utm_source=%E2%9C%93&utm_medium=✓',
+    '  https://example.com/?utm_source=leading-space',
+    '?utm_source=only-query',
+    'mailto:user@example.com?utm_source=mail',
+]
+
+
+@pytest.mark.parametrize('url', CASES)
+def test_matches_parse_qs(url):
+    assert UTMService._scan_utm_params(url) == UTMService._parse_utm_params_full(url)
+
+
+def test_non_string():
+    for value in (None, b'https://example.com/?utm_source=bytes', 42):
+        assert UTMService._scan_utm_params(value) == UTMService._parse_utm_params_full(value)
+
+
+def test_random_urls_match_parse_qs():
+    rng = random.Random(1234)
+    alphabet = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term', 'utm_', 'utm%5Fterm',
+                'id', '=', '&', '?', '#', '+', '%', '%20', '%2B', '%D0%B0', 'a', 'б', ' ', '\t', ';', '[', ']']
+    for _ in range(5000):
+        url = 'https://example.com/p?' + ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        assert UTMService._scan_utm_params(url) == UTMService._parse_utm_params_full(url), url
+
+
+def test_public_api_uses_cache():
+    UTMService.configure_cache(16)
+    url = 'https://example.com/?utm_source=google'
+    first = UTMService.parse_utm_params(url)
+    first['utm_source'] = 'changed'
+    assert UTMService.parse_utm_params(url)['utm_source'] == 'google'
+    assert UTMService.cache_stats()['utm_params']['hits'] == 1
@@ -0,0 +1,119 @@
+"""
+Поиск по истории: FTS5-индекс и его триггеры, GET /history/search, запасной LIKE
+"""
+import pytest
+import sqlalchemy
+
+from src.api import create_app
+from src.core.config import DevelopmentConfig
+from src.core.models import db
+from src.core.search import FTS_TABLE, build_match_expression, history_fts_available
+
+
+def _search(client, q, **params):
+    response = client.get('/history/search', query_string={'user_email': 'a@test.ru', 'q': q, **params})
+    assert response.status_code == 200
+    return response.json
+
+
+def _found(client, q):
+    return {item['full_url'] for item in _search(client, q)['items']}
+
+
+@pytest.fixture(params=[True, False], ids=['fts', 'like'])
+def search_client(request, app, client):
+    """Клиент с FTS5-индексом и с поиском через LIKE"""
+    if request.param and not app.extensions['history_fts']:
+        pytest.skip('SQLite собран без FTS5')
+    app.extensions['history_fts'] = request.param
+    return client
+
+
+def test_build_match_expression():
+    assert build_match_expression('yandex cp') == '"yandex"* AND "cp"*'
+    # Синтаксис MATCH из ввода не проходит: кавычки и операторы отбрасываются
+    assert build_match_expression('"a" OR -b*') == '"a"* AND "OR"* AND "b"*'
+    assert build_match_expression('" -') == ''
+
+
+def test_search_words_and_prefixes(search_client, add_history):
+    add_history('https://shop.example.ru/?utm_source=yandex&utm_campaign=spring_sale')
+    add_history('https://shop.example.ru/?utm_source=google&utm_campaign=spring_sale')
+    add_history('https://blog.example.ru/?utm_source=yandex', tag_name='Акция')
+    add_history('https://shop.example.ru/?utm_source=yandex', user_email='b@test.ru')
+
+    assert _found(search_client, 'yand') == {
+        'https://shop.example.ru/?utm_source=yandex&utm_campaign=spring_sale',
+        'https://blog.example.ru/?utm_source=yandex',
+    }
+    # Все слова должны найтись
+    assert _found(search_client, 'yandex spring') == {
+        'https://shop.example.ru/?utm_source=yandex&utm_campaign=spring_sale',
+    }
+    # LIKE в SQLite не приводит кириллицу к нижнему регистру — регистр как в теге
+    assert _found(search_client, 'Акц') == {'https://blog.example.ru/?utm_source=yandex'}
+    assert _found(search_client, 'vk') == set()
+
+
+@pytest.mark.parametrize('q', ['"', '-', '*** ---', '""'])
+def test_search_without_words_finds_nothing(search_client, add_history, q):
+    add_history()
+    assert _search(search_client, q)['items'] == []
+    facets = search_client.get('/history/facets', query_string={'user_email': 'a@test.ru', 'q': q}).json
+    assert facets['utm_source'] == []
+
+
+def test_search_empty_query(client, add_history):
+    add_history()
+    assert _search(client, '  ') == {'items': [], 'next_cursor': None}
+
+
+def test_search_pages(search_client, add_history):
+    for i in range(5):
+        add_history(f'https://example.com/{i}?utm_source=promo')
+    first = _search(search_client, 'promo', limit=3)
+    assert len(first['items']) == 3
+    rest = _search(search_client, 'promo', limit=3, cursor=first['next_cursor'])
+    assert len(rest['items']) == 2 and rest['next_cursor'] is None
+
+
+def test_triggers_keep_index_in_sync(app, client, add_history):
+    if not app.extensions['history_fts']:
+        pytest.skip('SQLite собран без FTS5')
+    history_id = add_history('https://example.com/?utm_source=vk')
+    assert _found(client, 'vk') == {'https://example.com/?utm_source=vk'}
+
+    client.put(f'/history/{history_id}/tag?user_email=a@test.ru', json={'tag_name': 'осень'})
+    assert _found(client, 'осень') == {'https://example.com/?utm_source=vk'}
+    client.put(f'/history/{history_id}/tag?user_email=a@test.ru', json={'tag_name': 'зима'})
+    assert _found(client, 'осень') == set()
+
+    client.delete(f'/history/{history_id}?user_email=a@test.ru')
+    assert _found(client, 'vk') == set()
+    with app.app_context():
+        # external content: после удаления в индексе не остаётся строк записи
+        count = db.session.execute(sqlalchemy.text(
+            f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'vk'"
+        )).scalar()
+        assert count == 0
+
+
+def test_missing_index_is_created_on_start(app, client, add_history, tmp_path):
+    """Миграция прошла без FTS5 — сборка с FTS5 создаёт индекс при старте"""
+    if not app.extensions['history_fts']:
+        pytest.skip('SQLite собран без FTS5')
+    add_history('https://example.com/?utm_source=telegram')
+    with app.app_context():
+        with db.engine.begin() as conn:
+            for suffix in ('_ai', '_ad', '_au'):
+                conn.execute(sqlalchemy.text(f'DROP TRIGGER {FTS_TABLE}{suffix}'))
+            conn.execute(sqlalchemy.text(f'DROP TABLE {FTS_TABLE}'))
+        assert not history_fts_available(db.engine)
+        db.engine.dispose()
+
+    restarted = create_app('development')
+    assert restarted.extensions['history_fts'] is True
+    # Индекс заполнен существующими записями
+    assert _found(restarted.test_client(), 'telegram') == {'https://example.com/?utm_source=telegram'}
+    with restarted.app_context():
+        db.engine.dispose()
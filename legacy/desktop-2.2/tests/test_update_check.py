@@ -0,0 +1,108 @@
+"""
+Проверка обновлений: кэш ответа GitHub на диске, ETag и фоновая проверка
+"""
+import json
+import time
+
+import pytest
+
+RELEASE = {
+    'tag_name': 'v99.0.0',
+    'html_url': 'https://example.com/releases/v99.0.0',
+    'body': 'Что нового',
+    'assets': [
+        {'name': 'UTMka-Setup.dmg', 'browser_download_url': 'https://example.com/UTMka-Setup.dmg', 'size': 100},
+        {'name': 'UTMka-Setup.exe', 'browser_download_url': 'https://example.com/UTMka-Setup.exe', 'size': 100},
+    ],
+}
+
+
+@pytest.fixture
+def github(http_server, updater, monkeypatch):
+    """Локальная подмена GitHub API: ETag "r1", 304 на If-None-Match"""
+    def handle_get(request):
+        if request.headers.get('If-None-Match') == '"r1"':
+            request.send_response(304)
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+        body = json.dumps(RELEASE).encode('utf-8')
+        request.send_response(200)
+        request.send_header('ETag', '"r1"')
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    http_server.handle_get = handle_get
+    monkeypatch.setattr(updater, 'GITHUB_API_URL', http_server.url('/releases/latest'))
+    return http_server
+
+
+def _wait_check(updater):
+    if updater._check_thread is not None:
+        updater._check_thread.join(10)
+
+
+def test_cold_check_runs_in_background(github, updater):
+    result = updater.cached_check()
+    assert result['available'] is False
+    assert result['checking'] is True
+
+    _wait_check(updater)
+    result = updater.cached_check()
+    assert result['available'] is True
+    assert result['latest_version'] == '99.0.0'
+    assert result['checking'] is False
+    assert len(github.requests) == 1
+
+    cache = json.loads(updater._release_cache_path().read_text(encoding='utf-8'))
+    assert cache['etag'] == '"r1"'
+    assert cache['release']['tag_name'] == 'v99.0.0'
+
+
+def test_fresh_disk_cache_needs_no_network(github, updater):
+    updater.fetch_latest_release()
+    # Новый процесс: в памяти результата нет, есть только файл кэша
+    updater._check_result = None
+    result = updater.cached_check()
+    assert result['available'] is True
+    assert result['checking'] is False
+    assert len(github.requests) == 1
+
+
+def test_stale_cache_revalidates_with_etag(github, updater, monkeypatch):
+    updater.fetch_latest_release()
+    fetched_at = json.loads(updater._release_cache_path().read_text(encoding='utf-8'))['fetched_at']
+    monkeypatch.setattr(updater, 'RELEASE_CACHE_TTL', 0)
+    time.sleep(0.01)
+
+    assert updater.fetch_latest_release()['tag_name'] == 'v99.0.0'
+    assert [request.headers.get('If-None-Match') for request in github.requests] == [None, '"r1"']
+    cache = json.loads(updater._release_cache_path().read_text(encoding='utf-8'))
+    assert cache['fetched_at'] > fetched_at
+
+
+def test_offline_falls_back_to_stale_cache(github, updater, monkeypatch):
+    updater.fetch_latest_release()
+    monkeypatch.setattr(updater, 'RELEASE_CACHE_TTL', 0)
+    monkeypatch.setattr(updater, 'GITHUB_API_URL', 'http://127.0.0.1:1/releases/latest')
+    assert updater.check_for_updates()['available'] is True
+
+
+def test_no_cache_and_offline(updater, monkeypatch):
+    monkeypatch.setattr(updater, 'GITHUB_API_URL', 'http://127.0.0.1:1/releases/latest')
+    assert updater.check_for_updates()['available'] is False
+
+
+def test_check_endpoint(github, updater, client):
+    response = client.get('/api/update/check')
+    assert response.status_code == 200
+    assert response.json['checking'] is True
+    _wait_check(updater)
+    assert client.get('/api/update/check').json['available'] is True
+
+    # refresh=1 — условный запрос, даже если кэш свежий
+    client.get('/api/update/check?refresh=1')
+    _wait_check(updater)
+    assert [request.headers.get('If-None-Match') for request in github.requests] == [None, '"r1"']
@@ -0,0 +1,139 @@
+"""
+Скачивание установщика: отрезки по Range, докачка, контрольная сумма
+"""
+import hashlib
+import os
+import re
+import time
+
+import pytest
+
+DATA = os.urandom(1024 * 1024 + 123)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+CHUNK = 16 * 1024
+
+
+@pytest.fixture
+def storage(http_server, updater, monkeypatch):
+    """
+    Хранилище релизов: ETag "e1", Range/If-Range; options — поведение сервера
+    (ranges, drop_after — оборвать ответ после стольких байт, один раз)
+    """
+    http_server.options = {'ranges': True, 'drop_after': None}
+    http_server.served = 0
+
+    def handle_get(request):
+        options = http_server.options
+        start, end, status = 0, len(DATA) - 1, 200
+        requested = request.headers.get('Range')
+        if requested and options['ranges'] and request.headers.get('If-Range', '"e1"') == '"e1"':
+            first, last = re.match(r'bytes=(\d+)-(\d*)', requested).groups()
+            start, end, status = int(first), int(last) if last else end, 206
+        body = DATA[start:end + 1]
+        request.send_response(status)
+        request.send_header('ETag', '"e1"')
+        request.send_header('Content-Length', str(len(body)))
+        if status == 206:
+            request.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+        request.end_headers()
+        for offset in range(0, len(body), CHUNK):
+            if options['drop_after'] is not None and offset >= options['drop_after'] and len(body) > 1:
+                options['drop_after'] = None
+                request.close_connection = True
+                return
+            request.wfile.write(body[offset:offset + CHUNK])
+            http_server.served += len(body[offset:offset + CHUNK])
+
+    http_server.handle_get = handle_get
+    monkeypatch.setattr(updater, 'DOWNLOAD_BUFFER_SIZE', CHUNK)
+    monkeypatch.setattr(updater, 'DOWNLOAD_SEGMENT_MIN_SIZE', 256 * 1024)
+    return http_server
+
+
+def _installer_url(storage):
+    return storage.url('/UTMka-Setup.exe')
+
+
+def _ranges(storage):
+    return [request.headers.get('Range') for request in storage.requests]
+
+
+def test_single_segment_with_checksum(storage, updater):
+    progress = []
+    path = updater.download_installer(_installer_url(storage), lambda done, total: progress.append((done, total)),
+                                      sha256=f'sha256:{SHA256}', segments=1)
+    assert open(path, 'rb').read() == DATA
+    assert progress[-1] == (len(DATA), len(DATA))
+    assert updater.get_installer_path() == path
+    assert not os.path.exists(path + '.part') and not os.path.exists(path + '.part.json')
+
+
+def test_parallel_segments(storage, updater):
+    path = updater.download_installer(_installer_url(storage), sha256=SHA256, segments=4)
+    assert open(path, 'rb').read() == DATA
+    # Проба (один байт) и четыре отрезка
+    ranges = _ranges(storage)
+    assert ranges[0] == 'bytes=0-0'
+    assert len(ranges) == 5
+    assert storage.served == len(DATA) + 1
+
+
+def test_resume_after_dropped_connection(storage, updater, monkeypatch):
+    monkeypatch.setattr(updater.time, 'sleep', lambda seconds: None)
+    storage.options['drop_after'] = 256 * 1024
+    path = updater.download_installer(_installer_url(storage), sha256=SHA256, segments=1)
+    assert open(path, 'rb').read() == DATA
+    assert _ranges(storage)[-1] == f'bytes={256 * 1024}-{len(DATA) - 1}'
+
+
+def test_resume_after_interrupted_process(storage, updater):
+    def interrupt(done, total):
+        if done > total * 0.6:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        updater.download_installer(_installer_url(storage), interrupt, segments=4)
+    assert (updater._updates_dir() / 'UTMka-Setup.exe.part.json').exists()
+
+    served_before = storage.served
+    path = updater.download_installer(_installer_url(storage), sha256=SHA256, segments=4)
+    assert open(path, 'rb').read() == DATA
+    # Докачивается только недостающее
+    assert storage.served - served_before < len(DATA) * 0.6
+
+
+def test_checksum_mismatch(storage, updater):
+    with pytest.raises(updater.DownloadError):
+        updater.download_installer(_installer_url(storage), sha256='0' * 64, segments=1)
+    assert not (updater._updates_dir() / 'UTMka-Setup.exe.part').exists()
+    assert not (updater._updates_dir() / 'UTMka-Setup.exe').exists()
+
+
+def test_server_without_ranges(storage, updater):
+    storage.options['ranges'] = False
+    path = updater.download_installer(_installer_url(storage), sha256=SHA256, segments=4)
+    assert open(path, 'rb').read() == DATA
+
+
+def test_already_downloaded_is_reused(storage, updater):
+    updater.download_installer(_installer_url(storage), sha256=SHA256)
+    requests_before = len(storage.requests)
+    updater.download_installer(_installer_url(storage), sha256=SHA256)
+    assert len(storage.requests) == requests_before
+
+
+def test_download_endpoints(storage, updater, client):
+    assert client.get('/api/update/progress').json == {'status': 'idle'}
+    assert client.post('/api/update/download', json={}).status_code == 400
+
+    response = client.post('/api/update/download', json={'url': _installer_url(storage), 'sha256': SHA256})
+    assert response.status_code == 202
+    deadline = time.monotonic() + 10
+    while client.get('/api/update/progress').json['status'] == 'downloading' and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    progress = client.get('/api/update/progress').json
+    assert progress['status'] == 'done'
+    assert progress['downloaded'] == progress['total'] == len(DATA)
+    assert progress['percent'] == 100
+    assert open(progress['installer_path'], 'rb').read() == DATA